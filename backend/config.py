@@ -7,6 +7,8 @@ DATA_DIR = BASE_DIR / "data"
 JOBS_DIR = DATA_DIR / "jobs"
 UPLOADS_DIR = DATA_DIR / "uploads"
 DEMOS_DIR = BASE_DIR.parent / "precompute" / "demos"
+UPLOAD_INDEX_PATH = DATA_DIR / "upload_index.json"   # content hash / YouTube ID -> job_id
+VISION_CACHE_DIR = DATA_DIR / "vision_cache"          # cross-job Pixtral results per frame
 
 # Ensure directories exist
 JOBS_DIR.mkdir(parents=True, exist_ok=True)
@@ -16,6 +18,17 @@ DEMOS_DIR.mkdir(parents=True, exist_ok=True)
 # Mistral API
 MISTRAL_API_KEY = os.environ.get("MISTRAL_API_KEY", "")
 MISTRAL_BASE_URL = "https://api.mistral.ai/v1"
+MISTRAL_HTTP2 = True               # multiplex requests over HTTP/2 (h2, from httpx[http2]); HTTP/1.1 if it is missing
+MISTRAL_MAX_CONNECTIONS = 20       # shared client pool size across all jobs
+MISTRAL_CHAT_TIMEOUT = 120         # seconds; vision + reasoning completions
+MISTRAL_ASR_TIMEOUT = 300          # seconds; audio upload + transcription
+MISTRAL_STREAMING = True           # stream chat completions; finished JSON parts are used before the answer ends
+MISTRAL_RPS = 5                    # requests/second across all jobs (0 = unlimited)
+MISTRAL_TPM = 500_000              # tokens/minute across all jobs (0 = unlimited)
+MISTRAL_CIRCUIT_FAILURES = 5       # consecutive 5xx/timeouts that open the circuit
+MISTRAL_CIRCUIT_COOLDOWN = 15      # seconds before a probe request; doubles while failing
+MISTRAL_CIRCUIT_MAX_COOLDOWN = 120
+MISTRAL_CIRCUIT_MAX_WAIT = 300     # requests waiting longer on an open circuit fail the job
 
 # Models
 MODEL_ASR = "voxtral-mini-latest"
@@ -23,18 +36,64 @@ MODEL_VISION = "pixtral-12b-2409"
 MODEL_REASONING = "mistral-small-latest"
 MODEL_REASONING_FALLBACK = "mistral-large-latest"
 
+# Audio
+ASR_PASSTHROUGH_CODECS = {         # source codecs the ASR endpoint accepts as-is -> container suffix
+    "mp3": ".mp3",
+    "aac": ".m4a",
+    "flac": ".flac",
+    "opus": ".ogg",
+    "vorbis": ".ogg",
+}
+AUDIO_ENCODE_FORMAT = "flac"       # fallback encoding: "flac" | "opus" | "wav"
+ASR_CHUNKING_MIN_DURATION = 1800   # seconds; longer audio is transcribed in overlapping chunks
+ASR_CHUNK_SECONDS = 600            # chunk window length
+ASR_CHUNK_OVERLAP = 20             # seconds shared by consecutive chunks (stitching + speaker matching)
+ASR_CONCURRENCY = 3                # concurrent Voxtral chunk requests
+VAD_ENABLED = True                 # trim long silences locally before ASR
+VAD_FRAME_MS = 30                  # energy analysis frame length
+VAD_MARGIN_DB = 10.0               # speech = this many dB above the noise floor
+VAD_MIN_SILENCE = 2.0              # seconds; shorter pauses are kept
+VAD_PADDING = 0.4                  # seconds of context kept around speech
+VAD_MIN_SAVINGS = 0.1              # skip trimming when less than 10% would be removed
+
 # Pipeline
 MAX_FRAMES_PER_BATCH = 8            # Pixtral API hard limit is 8 images
 MAX_TOTAL_FRAMES = 150             # hard cap before vision analysis
 DEDUP_WINDOW_SIZE = 5              # compare against N last unique hashes
-VISION_CONCURRENCY = 4             # concurrent Pixtral batches
+DEDUP_MODE = "window"              # "window" (last N unique) | "global" (BK-tree over all unique frames)
+DEDUP_WORKERS = os.cpu_count() or 1  # processes decoding + hashing frames in parallel
+DEDUP_PARALLEL_MIN_FRAMES = 64     # fewer frames are hashed in-process (pool overhead not worth it)
+VISION_CONCURRENCY = 4             # initial concurrent Pixtral batches (adapted at runtime, AIMD)
+VISION_CONCURRENCY_MIN = 1
+VISION_CONCURRENCY_MAX = 12
+VISION_LATENCY_TARGET = 45.0       # seconds per batch; slower responses shrink the window
 VISION_MAX_RETRIES = 3             # retries on 429/5xx
-VISION_RETRY_BASE_DELAY = 2.0     # exponential backoff base (2s, 4s, 8s)
+VISION_RETRY_BASE_DELAY = 2.0     # exponential backoff base (2s, 4s, 8s), used when no Retry-After
+VISION_RETRY_AFTER_MAX = 60.0      # cap on server-requested back-off (seconds)
+VISION_RETRY_BUDGET = 24           # per job: Pixtral calls beyond first attempts (retries, split batches, missing frames)
 FRAME_MAX_WIDTH = 1024
+FRAME_CACHE_MAX_MB = 256           # per-job cache of kept-frame pixels / vision payloads (~150 frames at 1024px)
+VISION_REQUEST_MAX_BYTES = 1_600_000  # base64 image bytes per Pixtral request, split across its frames
+VISION_CACHE_ENABLED = True        # reuse Pixtral results for frames seen in earlier jobs
+VISION_CACHE_MATCH = "phash"       # "phash" (perceptual, survives re-encoding) | "content" (exact frame bytes)
+VISION_CACHE_MAX_MB = 64           # LRU eviction beyond this size
+VISION_CACHE_IDLE_MAX_MB = 256     # namespaces of other settings kept, most recently used first
+PREFILTER_ENABLED = True           # route frames locally; skip Pixtral for static shots and blurred transitions
+PREFILTER_EDGE_MIN = 0.08          # strong-edge fraction that marks a detailed frame (always sent)
+PREFILTER_BLUR_MAX = 300.0         # Laplacian variance below which a frame may be a blurred transition...
+PREFILTER_BLUR_RATIO = 0.35        # ...if also this much softer than the frames on both sides
+PREFILTER_STASIS_MAX = 8.0         # mean thumbnail difference (0-255) still counted as the same camera shot
+VISION_MOSAIC_ENABLED = False      # tile low-detail frames (no text, edges below PREFILTER_EDGE_MIN) into labeled grid images
+VISION_MOSAIC_GRID = 2             # tiles per side of a mosaic: up to 4 low-detail frames share one image slot
 PHASH_THRESHOLD = 8
 SCENE_DETECT_THRESHOLD = 0.3
 MIN_FRAME_INTERVAL = 30  # seconds
+FRAME_EXTRACTION_MODE = "demux"    # "demux" | "stream" (pipe frames into dedup) | "budget" (score, then seek top-K) | "sharded"
+FRAME_BUDGET_OVERSAMPLE = 2.0      # budget mode: extract up to N x MAX_TOTAL_FRAMES, dedup trims the rest
+FRAME_EXTRACTION_SHARDS = min(os.cpu_count() or 1, 8)  # sharded mode: parallel FFmpeg processes
+FRAME_SHARD_MIN_DURATION = 600     # sharded mode: shorter videos use the single demux pass
 TIMELINE_SNAPSHOT_INTERVAL = 60  # seconds
+JOB_MAX_RESUMES = 2                # restarts that may resume a job before it is marked failed
 
 # Upload limits
 MAX_UPLOAD_SIZE_MB = 500
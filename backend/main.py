@@ -1,10 +1,13 @@
 """VISTRAL Backend — FastAPI application entry point."""
 
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.pipeline.frame_dedup import shutdown_hash_pool
+from backend.pipeline.mistral_client import start_client, close_client
 from backend.routers import upload, jobs, demo, settings
 
 # Configure logging
@@ -14,10 +17,22 @@ logging.basicConfig(
     datefmt="%H:%M:%S",
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources and resume interrupted pipelines; release them on shutdown."""
+    await start_client()
+    upload.resume_incomplete_jobs()
+    yield
+    shutdown_hash_pool()
+    await close_client()
+
+
 app = FastAPI(
     title="VISTRAL API",
     description="Video World-State Intelligence by Mistral",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS — allow frontend dev server
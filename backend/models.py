@@ -82,6 +82,25 @@ class TranscriptSegment:
     end: float
 
 
+# --- Media ---
+
+@dataclass
+class MediaProbe:
+    duration: float | None = None
+    format_name: str = ""
+    size_bytes: int | None = None
+    bit_rate: int | None = None
+    has_video: bool = False
+    has_audio: bool = False
+    video_codec: str | None = None
+    width: int | None = None
+    height: int | None = None
+    fps: float | None = None
+    audio_codec: str | None = None
+    sample_rate: int | None = None
+    channels: int | None = None
+
+
 # --- Vision ---
 
 @dataclass
@@ -89,6 +108,8 @@ class FrameInfo:
     index: int
     timestamp: float
     path: str
+    repeat_timestamps: list[float] = field(default_factory=list)  # near-duplicates dropped by dedup
+    phash: int | None = None  # 64-bit perceptual hash, set by dedup
 
 
 @dataclass
@@ -100,6 +121,8 @@ class VisionEvent:
     scene_description: str = ""
     slide_title: str | None = None
     objects: list[str] = field(default_factory=list)
+    repeat_timestamps: list[float] = field(default_factory=list)
+    skipped: str | None = None  # prefilter reason ("static", "blurry") when not sent to Pixtral
 
 
 # --- Pipeline entities (from Pass A) ---
@@ -112,6 +135,7 @@ class ExtractedEntities:
     kpis: list[dict[str, Any]] = field(default_factory=list)
     decisions_raw: list[dict[str, Any]] = field(default_factory=list)
     action_items_raw: list[dict[str, Any]] = field(default_factory=list)
+    missing_sections: list[str] = field(default_factory=list)  # lost to an unparseable answer
 
 
 # --- Insights (from Pass B) ---
@@ -1,30 +1,91 @@
-"""Extract audio from video using FFmpeg. Single responsibility: video -> WAV."""
+"""Extract audio from video using FFmpeg. Single responsibility: video -> ASR-ready audio."""
 
 import asyncio
+import json
 import logging
 from pathlib import Path
 
+from backend.config import ASR_PASSTHROUGH_CODECS, AUDIO_ENCODE_FORMAT
+from backend.models import MediaProbe
+
 logger = logging.getLogger(__name__)
 
+# Encode targets when the source codec cannot be passed through: (codec args, file suffix)
+_AUDIO_ENCODINGS: dict[str, tuple[list[str], str]] = {
+    "wav": (["-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1"], ".wav"),
+    "flac": (["-acodec", "flac", "-ar", "16000", "-ac", "1"], ".flac"),
+    "opus": (["-acodec", "libopus", "-b:a", "32k", "-ar", "16000", "-ac", "1"], ".ogg"),
+}
+
+
+async def _probe_audio_codec(video_path: Path) -> str | None:
+    """Return the codec name of the first audio stream using ffprobe."""
+    cmd = [
+        "ffprobe",
+        "-v", "quiet",
+        "-print_format", "json",
+        "-show_streams",
+        "-select_streams", "a:0",
+        str(video_path),
+    ]
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, _ = await proc.communicate()
+        streams = json.loads(stdout.decode()).get("streams", [])
+        return streams[0]["codec_name"] if streams else None
+    except Exception as e:
+        logger.warning("Could not probe audio codec via ffprobe: %s", e)
+        return None
+
+
+def _audio_output(codec: str | None, output_dir: Path) -> tuple[list[str], Path]:
+    """Choose FFmpeg output args and path for the ASR audio track.
+
+    Stream-copies the source audio when the ASR endpoint accepts its codec,
+    otherwise encodes to AUDIO_ENCODE_FORMAT (16kHz mono).
+    """
+    if codec in ASR_PASSTHROUGH_CODECS:
+        suffix = ASR_PASSTHROUGH_CODECS[codec]
+        logger.info("Audio passthrough: %s stream copied without re-encoding", codec)
+        return ["-vn", "-acodec", "copy"], output_dir / f"audio{suffix}"
+
+    codec_args, suffix = _AUDIO_ENCODINGS[AUDIO_ENCODE_FORMAT]
+    return ["-vn", *codec_args], output_dir / f"audio{suffix}"
+
+
+async def plan_audio_output(
+    video_path: Path,
+    output_dir: Path,
+    probe: MediaProbe | None = None,
+) -> tuple[list[str], Path]:
+    """Return (FFmpeg output args, audio path) for the source audio codec.
+
+    Uses the job's cached probe when available, otherwise probes the file.
+    """
+    codec = probe.audio_codec if probe else await _probe_audio_codec(video_path)
+    return _audio_output(codec, output_dir)
+
 
-async def extract_audio(video_path: Path, output_dir: Path) -> Path:
-    """Extract 16kHz mono WAV from video file.
+async def extract_audio(video_path: Path, output_dir: Path, probe: MediaProbe | None = None) -> Path:
+    """Extract the audio track in a format the ASR endpoint accepts.
 
     Args:
         video_path: Path to input video.
-        output_dir: Directory to write the WAV file.
+        output_dir: Directory to write the audio file.
+        probe: Cached media probe for the job, if any.
 
     Returns:
-        Path to the extracted WAV file.
+        Path to the extracted audio file.
     """
-    output_path = output_dir / "audio.wav"
+    output_args, output_path = await plan_audio_output(video_path, output_dir, probe)
 
     cmd = [
         "ffmpeg", "-i", str(video_path),
-        "-vn",                    # no video
-        "-acodec", "pcm_s16le",   # 16-bit PCM
-        "-ar", "16000",           # 16kHz sample rate
-        "-ac", "1",               # mono
+        *output_args,
         "-y",                     # overwrite
         str(output_path),
     ]
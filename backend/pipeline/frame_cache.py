@@ -0,0 +1,153 @@
+"""Decode-once frame cache shared by dedup hashing, prefiltering and vision encoding.
+
+Each frame JPEG is decoded a single time, during dedup. That pass produces the
+32x32 pHash input and a FRAME_MAX_WIDTH copy of the pixels. Only frames that
+survive dedup keep their pixels, in a byte-bounded LRU: the prefilter measures
+them from there, and a frame actually sent to Pixtral is encoded lazily from
+them (frame_encoder), its entry then holding the payload for retries, split
+batches and re-requests. Frames that are evicted, or come from a cached media
+stage, are decoded from disk on demand.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from backend.config import FRAME_CACHE_MAX_MB, FRAME_MAX_WIDTH
+from backend.pipeline.frame_encoder import _resize, encode_frame
+from backend.pipeline.phash import _IMG_SIZE, _hash_pixels, _to_pixels, hamming, hash_files
+
+logger = logging.getLogger(__name__)
+
+# Encoded frame: (payload bytes, mime type)
+Payload = tuple[bytes, str]
+
+
+def decode_files(
+    paths: list[str | Path],
+    keep_pixels: bool = False,
+    skip_near: int | None = None,
+) -> tuple[np.ndarray, np.ndarray, list[Image.Image | None]]:
+    """Decode each frame once and return (hashes, ok, pixels).
+
+    pixels holds each decoded RGB frame, or is all None unless
+    keep_pixels is set. Sources at least twice FRAME_MAX_WIDTH are box-reduced
+    by a whole factor first (cheap, and LANCZOS follows anyway); the final
+    resize is left to keep_frame so it only runs for frames that survive
+    dedup. Picklable top-level function so it can run in the dedup process pool.
+
+    With skip_near (a dedup threshold), pixels are left out for frames within
+    that distance of an earlier frame of the batch: dedup almost always drops
+    them, and shipping them back from a worker costs more than decoding the
+    rare exception from disk again.
+    """
+    if not keep_pixels:
+        hashes, ok = hash_files(paths)
+        return hashes, ok, [None] * len(paths)
+
+    gray = np.zeros((len(paths), _IMG_SIZE, _IMG_SIZE), dtype=np.float64)
+    ok = np.zeros(len(paths), dtype=bool)
+    pixels: list[Image.Image | None] = [None] * len(paths)
+    for i, path in enumerate(paths):
+        try:
+            with Image.open(path) as img:
+                img.load()
+                gray[i] = _to_pixels(img)  # same input as hash_files
+                rgb = img if img.mode == "RGB" else img.convert("RGB")
+                if (factor := rgb.width // FRAME_MAX_WIDTH) > 1:
+                    rgb = rgb.reduce(factor)
+                pixels[i] = rgb
+            ok[i] = True
+        except Exception as e:
+            logger.warning("Failed to decode frame %s: %s", path, e)
+
+    hashes = _hash_pixels(gray) if len(paths) else np.empty(0, dtype=np.uint64)
+    hashes[~ok] = 0
+    if skip_near is not None:
+        for i in range(1, len(paths)):
+            if ok[i] and (hamming(hashes[i], hashes[:i][ok[:i]]) <= skip_near).any():
+                pixels[i] = None
+    return hashes, ok, pixels
+
+
+def keep_frame(cache: "FrameCache", path: str, img: Image.Image) -> None:
+    """Store a kept frame's decoded pixels, resized to FRAME_MAX_WIDTH."""
+    cache.put(path, _resize(img, FRAME_MAX_WIDTH))
+
+
+def _entry_size(entry: Image.Image | Payload) -> int:
+    if isinstance(entry, Image.Image):
+        return entry.width * entry.height * len(entry.getbands())
+    return len(entry[0])
+
+
+class FrameCache:
+    """Byte-bounded LRU keyed by frame path.
+
+    An entry holds a kept frame's decoded pixels until it is first encoded,
+    then its encoded vision payload.
+    """
+
+    def __init__(self, max_bytes: int = FRAME_CACHE_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, Image.Image | Payload] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()  # filled by dedup, read from vision worker threads
+        self.hits = 0
+        self.encodes = 0
+        self.disk_decodes = 0
+
+    def put(self, path: str, entry: Image.Image | Payload) -> None:
+        with self._lock:
+            if path in self._entries:
+                self._size -= _entry_size(self._entries.pop(path))
+            self._entries[path] = entry
+            self._size += _entry_size(entry)
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= _entry_size(evicted)
+
+    def _get(self, path: str) -> Image.Image | Payload | None:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+            return entry
+
+    def image(self, path: str) -> Image.Image | None:
+        """Decoded pixels of a kept frame, if still held (not yet encoded or evicted)."""
+        entry = self._get(path)
+        return entry if isinstance(entry, Image.Image) else None
+
+    def get_or_encode(self, path: str) -> Payload:
+        """Payload of a frame, encoded on first use from its cached pixels.
+
+        Decodes from disk only if the pixels are gone. CPU-bound: runs in a
+        worker thread. Two threads asking for the same unencoded frame at once
+        may both encode it; the results are identical.
+        """
+        entry = self._get(path)
+        if entry is not None and not isinstance(entry, Image.Image):
+            self.hits += 1
+            return entry
+        if entry is None:
+            self.disk_decodes += 1
+            with Image.open(path) as img:
+                payload = encode_frame(img)
+        else:
+            payload = encode_frame(entry)
+        self.encodes += 1
+        self.put(path, payload)
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            if self.hits or self.encodes:
+                logger.info("Frame cache: %d encodes (%d decoded from disk), %d reuses, %.1f MB held",
+                            self.encodes, self.disk_decodes, self.hits, self._size / 1e6)
+            self._entries.clear()
+            self._size = 0
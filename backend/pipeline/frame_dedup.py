@@ -1,28 +1,165 @@
-"""Deduplicate frames using perceptual hashing with sliding window."""
+"""Deduplicate frames using perceptual hashing (sliding window or global index)."""
 
 import logging
+import math
+import multiprocessing
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import replace
+from functools import partial
+from typing import Callable, Iterator
 
-import imagehash
+import numpy as np
 from PIL import Image
 
-from backend.config import PHASH_THRESHOLD, DEDUP_WINDOW_SIZE, MAX_TOTAL_FRAMES
+from backend.config import (
+    PHASH_THRESHOLD, DEDUP_WINDOW_SIZE, DEDUP_MODE, MAX_TOTAL_FRAMES, DEDUP_WORKERS,
+    DEDUP_PARALLEL_MIN_FRAMES,
+)
 from backend.models import FrameInfo
+from backend.pipeline.frame_cache import FrameCache, decode_files, keep_frame
+from backend.pipeline.hash_index import BKTree
+from backend.pipeline.phash import hamming
 
 logger = logging.getLogger(__name__)
 
+# Frames hashed per in-process batch (unique frames stream out chunk by chunk)
+_SERIAL_CHUNK = 32
 
-def dedup_frames(frames: list[FrameInfo], threshold: int = PHASH_THRESHOLD) -> list[FrameInfo]:
+# Frames per batch when decoded pixels come back with the hashes, and pool
+# batches in flight per worker: bounds the pixels of not-yet-decided frames
+_PIXEL_CHUNK = 8
+_CHUNKS_IN_FLIGHT = 2
+
+# Long-lived so worker start-up (NumPy/PIL imports) is paid once per server
+_hash_pool: ProcessPoolExecutor | None = None
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=DEDUP_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    """Stop the hashing worker processes (called on application shutdown)."""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
+
+
+def _decode_chunks(
+    paths: list[str],
+    keep_pixels: bool,
+    threshold: int = PHASH_THRESHOLD,
+) -> Iterator[tuple[np.ndarray, np.ndarray, list[Image.Image | None]]]:
+    """Decode and hash frames chunk by chunk, in order, as (hashes, ok, pixels).
+
+    Long lists are spread across worker processes. Workers return uint64 hash
+    arrays (8 bytes per frame), plus the decoded pixels from the same pass
+    when a frame cache is in use; only a few chunks are in flight at a time,
+    so pixels of frames dedup has not looked at yet stay bounded.
+    """
+    decode = partial(decode_files, keep_pixels=keep_pixels)
+    serial_chunk = _PIXEL_CHUNK if keep_pixels else _SERIAL_CHUNK
+    if DEDUP_WORKERS <= 1 or len(paths) < DEDUP_PARALLEL_MIN_FRAMES:
+        for i in range(0, len(paths), serial_chunk):
+            yield decode(paths[i:i + serial_chunk])
+        return
+
+    # Several chunks per worker so a slow chunk does not leave cores idle
+    size = math.ceil(len(paths) / (DEDUP_WORKERS * 4))
+    if keep_pixels:
+        size = min(size, _PIXEL_CHUNK)
+        decode = partial(decode_files, keep_pixels=True, skip_near=threshold)
+    chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+    done = 0
+    try:
+        pool = _get_hash_pool()
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(decode, chunk))
+            if len(pending) >= DEDUP_WORKERS * _CHUNKS_IN_FLIGHT:
+                yield pending.popleft().result()
+                done += 1
+        while pending:
+            yield pending.popleft().result()
+            done += 1
+    except BrokenProcessPool:
+        logger.warning("Hashing pool crashed, decoding %d remaining chunks in-process", len(chunks) - done)
+        shutdown_hash_pool()
+        for chunk in chunks[done:]:
+            yield decode(chunk)
+
+
+def iter_unique_frames(
+    frames: list[FrameInfo],
+    threshold: int = PHASH_THRESHOLD,
+    cache: FrameCache | None = None,
+) -> Iterator[FrameInfo]:
+    """Yield each unique frame as soon as it is found, in order.
+
+    Frames are decoded and hashed chunk by chunk, spread across a process pool
+    for long frame lists. Each hash is compared against earlier unique frames
+    (see UniqueFrameIndex for DEDUP_MODE); a frame is kept only if it differs
+    from ALL of them. A dropped frame's timestamp is appended to its
+    representative's repeat_timestamps, which may still grow after the
+    representative was yielded.
+
+    Args:
+        frames: Ordered list of extracted frames.
+        threshold: Minimum hamming distance to consider frames unique.
+        cache: When given, the pixels of each kept frame, taken from the same
+            decode as its hash, are stored here for the vision stage.
+    """
+    index = UniqueFrameIndex(threshold)
+    kept = 0
+
+    offset = 0
+    for hashes, ok, pixels in _decode_chunks([frame.path for frame in frames], cache is not None, threshold):
+        for frame, h, readable, px in zip(frames[offset:], hashes, ok, pixels):
+            if not readable:
+                continue
+
+            representative = index.find(h)
+            if representative is not None:
+                representative.repeat_timestamps.append(frame.timestamp)
+                continue
+
+            # Copy so repeats are never attached to the caller's frame objects
+            frame = replace(frame, repeat_timestamps=[], phash=int(h))
+            index.add(h, frame)
+            kept += 1
+            if cache is not None and px is not None:
+                keep_frame(cache, frame.path, px)
+            yield frame
+        offset += len(hashes)
+
+    logger.info("Frame dedup (%s): %d -> %d unique (%.0f%% reduction)",
+                index.mode, len(frames), kept, (1 - kept / max(len(frames), 1)) * 100)
+
+
+def dedup_frames(
+    frames: list[FrameInfo],
+    threshold: int = PHASH_THRESHOLD,
+    cache: FrameCache | None = None,
+) -> list[FrameInfo]:
     """Remove near-duplicate frames using perceptual hash comparison.
 
-    Compares each frame's phash against the last N unique frames (sliding
-    window). A frame is kept only if it differs from ALL recent hashes.
-    After dedup, applies a hard cap via uniform subsampling to keep
-    temporal distribution even.
+    Runs iter_unique_frames over the whole list, then applies a hard cap via
+    uniform subsampling to keep temporal distribution even.
 
     Args:
         frames: Ordered list of extracted frames.
         threshold: Minimum hamming distance to consider frames unique.
+        cache: Receives the decoded pixels of kept frames (see iter_unique_frames).
 
     Returns:
         Filtered list of unique frames, capped at MAX_TOTAL_FRAMES.
@@ -30,29 +167,126 @@ def dedup_frames(frames: list[FrameInfo], threshold: int = PHASH_THRESHOLD) -> l
     if not frames:
         return []
 
-    unique: list[FrameInfo] = []
-    recent_hashes: deque = deque(maxlen=DEDUP_WINDOW_SIZE)
+    return _apply_frame_cap(list(iter_unique_frames(frames, threshold, cache)))
+
+
+def emit_unique_frames(
+    frames: list[FrameInfo],
+    emit: Callable[[FrameInfo | None], None],
+    threshold: int = PHASH_THRESHOLD,
+    cache: FrameCache | None = None,
+) -> list[FrameInfo]:
+    """Dedup frames and emit each kept frame as it is found, then None when done.
+
+    Streaming counterpart of dedup_frames for a consumer (vision batching)
+    that starts work before dedup finishes. Blocking: run in a worker thread,
+    with emit handing frames over to the event loop.
+
+    Returns:
+        The kept frames in chronological order, at most MAX_TOTAL_FRAMES.
+    """
+    gate = SlotGate(frames)
+    kept: list[FrameInfo] = []
+    for frame in iter_unique_frames(frames, threshold, cache):
+        if gate.admit(frame):
+            kept.append(frame)
+            emit(frame)
+    for frame in gate.drain():
+        kept.append(frame)
+        emit(frame)
+    # Only a complete stream is terminated; on error the consumer is cancelled instead
+    emit(None)
+
+    kept.sort(key=lambda f: f.timestamp)
+    return kept
+
+
+class SlotGate:
+    """Streaming stand-in for the MAX_TOTAL_FRAMES cap.
+
+    The uniform subsample in _apply_frame_cap needs the full unique list, so
+    while streaming the video's time span is split into `cap` equal slots. The
+    first unique frame in a slot passes at once; later ones in the same slot
+    are held back. At end of stream the held frames fill whatever capacity is
+    left (uniformly subsampled), so nothing is dropped unless the cap binds.
+    If there are no more raw frames than the cap, every frame passes.
+    """
+
+    def __init__(self, frames: list[FrameInfo], cap: int = MAX_TOTAL_FRAMES):
+        self.cap = cap
+        self._open = len(frames) <= cap
+        self._start = frames[0].timestamp if frames else 0.0
+        self._span = (frames[-1].timestamp - self._start) if frames else 0.0
+        self._taken: set[int] = set()
+        self._held: list[FrameInfo] = []
+        self.admitted = 0
+        self.dropped: list[FrameInfo] = []
+
+    def admit(self, frame: FrameInfo) -> bool:
+        if not self._open:
+            slot = min(int((frame.timestamp - self._start) / self._span * self.cap), self.cap - 1) \
+                if self._span > 0 else 0
+            if slot in self._taken:
+                self._held.append(frame)
+                return False
+            self._taken.add(slot)
+        self.admitted += 1
+        return True
+
+    def drain(self) -> list[FrameInfo]:
+        """Held frames that fit in the remaining capacity."""
+        room = self.cap - self.admitted
+        held, self._held = self._held, []
+        if len(held) <= room:
+            released = held
+        else:
+            step = len(held) / room if room > 0 else 0
+            released = [held[int(i * step)] for i in range(room)]
+            chosen = {id(frame) for frame in released}
+            self.dropped = [frame for frame in held if id(frame) not in chosen]
+            logger.info("Hard cap applied while streaming: %d frames held back, %d dropped",
+                        len(held), len(self.dropped))
+        self.admitted += len(released)
+        return released
+
+
+class UniqueFrameIndex:
+    """Unique frames seen so far, queried for a near-duplicate of each new hash.
+
+    "window" mode compares against the last DEDUP_WINDOW_SIZE unique hashes.
+    "global" mode searches every earlier unique frame through a BK-tree, so a
+    slide shown again later in the video is still recognized.
+    """
+
+    def __init__(self, threshold: int = PHASH_THRESHOLD, mode: str = DEDUP_MODE):
+        self.threshold = threshold
+        self.mode = mode
+        self._recent: deque[tuple[int, FrameInfo]] = deque(maxlen=DEDUP_WINDOW_SIZE)
+        self._tree = BKTree()
 
-    for frame in frames:
-        try:
-            with Image.open(frame.path) as img:
-                h = imagehash.phash(img)
-        except Exception as e:
-            logger.warning("Failed to hash frame %s: %s", frame.path, e)
-            continue
+    def find(self, h: int | np.uint64) -> FrameInfo | None:
+        """Closest unique frame within threshold, or None if h is new."""
+        if self.mode == "global":
+            match = self._tree.nearest(int(h), self.threshold)
+            return match[1] if match else None
 
-        # Keep frame only if it differs from ALL recent unique hashes
-        is_duplicate = any((h - prev) <= threshold for prev in recent_hashes)
+        if not self._recent:
+            return None
+        window = np.fromiter((rh for rh, _ in self._recent), dtype=np.uint64, count=len(self._recent))
+        distances = hamming(h, window)
+        best = int(distances.argmin())
+        return self._recent[best][1] if distances[best] <= self.threshold else None
 
-        if not is_duplicate:
-            unique.append(frame)
-            recent_hashes.append(h)
+    def add(self, h: int | np.uint64, frame: FrameInfo) -> None:
+        """Register a kept frame."""
+        if self.mode == "global":
+            self._tree.add(int(h), frame)
+        else:
+            self._recent.append((int(h), frame))
 
-    logger.info("Frame dedup: %d -> %d unique (%.0f%% reduction)",
-                len(frames), len(unique),
-                (1 - len(unique) / max(len(frames), 1)) * 100)
 
-    # Hard cap: uniform subsampling to preserve temporal distribution
+def _apply_frame_cap(unique: list[FrameInfo]) -> list[FrameInfo]:
+    """Hard cap: uniform subsampling to preserve temporal distribution."""
     if len(unique) > MAX_TOTAL_FRAMES:
         step = len(unique) / MAX_TOTAL_FRAMES
         subsampled = [unique[int(i * step)] for i in range(MAX_TOTAL_FRAMES)]
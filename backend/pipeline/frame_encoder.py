@@ -0,0 +1,122 @@
+"""Byte-budget adaptive encoding of frames sent to Pixtral.
+
+Each frame gets the sharpest encoding that fits its share of the per-request
+byte budget. Text-heavy frames (slides, documents, code) keep their resolution
+so OCR holds up; photographic frames (talking heads, camera footage) start
+smaller and compress harder since fine detail adds little to the analysis.
+"""
+
+import io
+import logging
+
+import numpy as np
+from PIL import Image
+
+from backend.config import FRAME_MAX_WIDTH, MAX_FRAMES_PER_BATCH, VISION_REQUEST_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Raw bytes per frame; base64 adds a third on the wire, already accounted for
+FRAME_BYTE_BUDGET = VISION_REQUEST_MAX_BYTES * 3 // 4 // MAX_FRAMES_PER_BATCH
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+# (max width, format, quality, typical size relative to the first rung). The
+# first rung is always tried; if it is over budget, the size ratios pick the
+# rung expected to fit and the ladder continues down from there only if needed.
+_TEXT_LADDER = [
+    (FRAME_MAX_WIDTH, "WEBP", 90, 1.0),
+    (FRAME_MAX_WIDTH, "WEBP", 80, 0.7),
+    (896, "WEBP", 75, 0.55),
+    (768, "WEBP", 70, 0.43),
+    (640, "JPEG", 70, 0.35),
+]
+_PHOTO_LADDER = [
+    (768, "WEBP", 75, 1.0),
+    (640, "WEBP", 65, 0.74),
+    (512, "WEBP", 60, 0.53),
+    (384, "JPEG", 60, 0.3),
+]
+
+# Slides with a small palette compress best (and losslessly) as PNG
+_PNG_MAX_COLORS = 64
+
+_THUMB_SIZE = (320, 180)
+
+
+def is_text_like(img: Image.Image) -> bool:
+    """Cheap slide/document detector on a small grayscale thumbnail.
+
+    Rendered text sits on large flat backgrounds with sharp edges; camera
+    footage has sensor noise and soft gradients almost everywhere.
+    """
+    gray = np.asarray(img.convert("L").resize(_THUMB_SIZE, Image.BILINEAR), dtype=np.int16)
+    grad = np.maximum(
+        np.abs(np.diff(gray, axis=1))[:-1, :],
+        np.abs(np.diff(gray, axis=0))[:, :-1],
+    )
+    flat = float(np.mean(grad < 4))
+    edges = float(np.mean(grad > 24))
+    return flat > 0.6 and edges > 0.03
+
+
+def _resize(img: Image.Image, max_width: int) -> Image.Image:
+    if img.width <= max_width:
+        return img
+    ratio = max_width / img.width
+    return img.resize((max_width, int(img.height * ratio)), Image.LANCZOS)
+
+
+def _save(img: Image.Image, fmt: str, quality: int | None) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "PNG":
+        img.save(buf, format="PNG", optimize=True)
+    elif fmt == "WEBP":
+        img.save(buf, format="WEBP", quality=quality, method=4)
+    else:
+        img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def encode_frame(img: Image.Image, budget: int = FRAME_BYTE_BUDGET) -> tuple[bytes, str]:
+    """Encode a frame for Pixtral within a byte budget.
+
+    CPU-bound: call from a worker thread or process, never on the event loop.
+
+    Returns:
+        (payload, mime_type). If no candidate fits, the smallest one is returned.
+    """
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+
+    text_like = is_text_like(img)
+    ladder = _TEXT_LADDER if text_like else _PHOTO_LADDER
+    resized: dict[int, Image.Image] = {}
+
+    if text_like:
+        full = resized.setdefault(FRAME_MAX_WIDTH, _resize(img, FRAME_MAX_WIDTH))
+        if full.getcolors(maxcolors=_PNG_MAX_COLORS) is not None:
+            payload = _save(full, "PNG", None)
+            if len(payload) <= budget:
+                return payload, _MIME_TYPES["PNG"]
+
+    payload, fmt = b"", "JPEG"
+    rung = 0
+    while rung < len(ladder):
+        max_width, fmt, quality, _ = ladder[rung]
+        width = min(max_width, FRAME_MAX_WIDTH)
+        if width not in resized:
+            resized[width] = _resize(img, width)
+        payload = _save(resized[width], fmt, quality)
+        if len(payload) <= budget:
+            break
+        if rung == 0:
+            # Skip the rungs the first size says cannot fit
+            rung = next((i for i in range(1, len(ladder)) if len(payload) * ladder[i][3] <= budget),
+                        len(ladder) - 1)
+        else:
+            rung += 1
+    else:
+        logger.debug("Frame over budget at smallest encoding: %d > %d bytes", len(payload), budget)
+
+    return payload, _MIME_TYPES[fmt]
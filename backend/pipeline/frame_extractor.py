@@ -58,6 +58,60 @@ def _compute_frame_interval(duration_seconds: float | None) -> int:
     return interval
 
 
+def _build_select_filter(interval: int, max_width: int | None = None) -> str:
+    """Build the scene detection + interval fallback filter with showinfo logging.
+
+    When max_width is set, selected frames are downscaled before showinfo so
+    the logged frame size matches what FFmpeg outputs.
+    """
+    scale = f"scale='min(iw\\,{max_width})':-2," if max_width else ""
+    return (
+        f"select='gt(scene\\,{SCENE_DETECT_THRESHOLD})"
+        f"+isnan(prev_selected_t)"
+        f"+gte(t-prev_selected_t\\,{interval})',"
+        f"{scale}"
+        f"showinfo"
+    )
+
+
+def _parse_showinfo_timestamps(stderr_text: str) -> list[float]:
+    """Parse frame timestamps from FFmpeg showinfo output.
+
+    Format: [Parsed_showinfo...] n:   0 pts:  12345 pts_time:1.234
+    """
+    return [float(m.group(1)) for m in re.finditer(r"pts_time:\s*([\d.]+)", stderr_text)]
+
+
+def _collect_frames(frames_dir: Path, timestamps: list[float], interval: int) -> list[FrameInfo]:
+    """Pair frame files written by FFmpeg with their showinfo timestamps."""
+    frame_files = sorted(frames_dir.glob("frame_*.jpg"))
+    frames = []
+
+    for i, fpath in enumerate(frame_files):
+        ts = timestamps[i] if i < len(timestamps) else i * interval
+        frames.append(FrameInfo(index=i, timestamp=ts, path=str(fpath)))
+
+    return frames
+
+
+async def _extract_first_frame(video_path: Path, frames_dir: Path) -> list[FrameInfo]:
+    """Fallback used when scene detection selects nothing: grab the first frame."""
+    logger.warning("No frames extracted via scene detection, extracting first frame")
+    cmd_fallback = [
+        "ffmpeg", "-i", str(video_path),
+        "-vframes", "1", "-q:v", "2", "-y",
+        str(frames_dir / "frame_0001.jpg"),
+    ]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd_fallback, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    await proc.communicate()
+    fallback_path = frames_dir / "frame_0001.jpg"
+    if fallback_path.exists():
+        return [FrameInfo(index=0, timestamp=0.0, path=str(fallback_path))]
+    return []
+
+
 async def extract_frames(video_path: Path, output_dir: Path) -> list[FrameInfo]:
     """Extract frames using scene detection + minimum interval fallback.
 
@@ -79,17 +133,9 @@ async def extract_frames(video_path: Path, output_dir: Path) -> list[FrameInfo]:
     duration = await _get_video_duration(video_path)
     interval = _compute_frame_interval(duration)
 
-    # Scene detection + interval fallback filter
-    vf = (
-        f"select='gt(scene\\,{SCENE_DETECT_THRESHOLD})"
-        f"+isnan(prev_selected_t)"
-        f"+gte(t-prev_selected_t\\,{interval})',"
-        f"showinfo"
-    )
-
     cmd = [
         "ffmpeg", "-i", str(video_path),
-        "-vf", vf,
+        "-vf", _build_select_filter(interval),
         "-vsync", "vfr",
         "-q:v", "2",
         "-y",
@@ -106,37 +152,12 @@ async def extract_frames(video_path: Path, output_dir: Path) -> list[FrameInfo]:
     )
     _, stderr = await proc.communicate()
 
-    stderr_text = stderr.decode()
-
-    # Parse timestamps from showinfo output
-    # Format: [Parsed_showinfo...] n:   0 pts:  12345 pts_time:1.234
-    timestamps = []
-    for match in re.finditer(r"pts_time:\s*([\d.]+)", stderr_text):
-        timestamps.append(float(match.group(1)))
-
-    # Collect frame files
-    frame_files = sorted(frames_dir.glob("frame_*.jpg"))
-    frames = []
-
-    for i, fpath in enumerate(frame_files):
-        ts = timestamps[i] if i < len(timestamps) else i * interval
-        frames.append(FrameInfo(index=i, timestamp=ts, path=str(fpath)))
+    timestamps = _parse_showinfo_timestamps(stderr.decode())
+    frames = _collect_frames(frames_dir, timestamps, interval)
 
     # Fallback: if no frames extracted, take first frame
     if not frames:
-        logger.warning("No frames extracted via scene detection, extracting first frame")
-        cmd_fallback = [
-            "ffmpeg", "-i", str(video_path),
-            "-vframes", "1", "-q:v", "2", "-y",
-            str(frames_dir / "frame_0001.jpg"),
-        ]
-        proc = await asyncio.create_subprocess_exec(
-            *cmd_fallback, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
-        )
-        await proc.communicate()
-        fallback_path = frames_dir / "frame_0001.jpg"
-        if fallback_path.exists():
-            frames.append(FrameInfo(index=0, timestamp=0.0, path=str(fallback_path)))
+        frames = await _extract_first_frame(video_path, frames_dir)
 
     logger.info("Extracted %d frames", len(frames))
     return frames
@@ -0,0 +1,107 @@
+"""Packing of low-detail frames into labeled grid images for Pixtral.
+
+A request carries at most MAX_FRAMES_PER_BATCH images. Webcam views, plain
+title cards and other frames with nothing to read do not need a full image
+slot: with VISION_MOSAIC_ENABLED up to VISION_MOSAIC_GRID² of them are tiled
+into one mosaic, each tile stamped with its frame number so the per-frame
+answers map back to the right frame. Text-like and detailed frames always keep
+a full-resolution slot of their own, so OCR on real slides is unaffected.
+"""
+
+import logging
+import math
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from backend.config import FRAME_MAX_WIDTH, MAX_FRAMES_PER_BATCH, VISION_MOSAIC_GRID
+from backend.models import FrameInfo
+
+logger = logging.getLogger(__name__)
+
+TILES_PER_MOSAIC = VISION_MOSAIC_GRID ** 2
+
+_GUTTER = 8                     # black separator between tiles (pixels)
+_LABEL_PADDING = 6
+
+# One image of a request: a single frame, or the tiles of a mosaic
+Slot = list[FrameInfo]
+
+
+class BatchPacker:
+    """Fills request batches with up to MAX_FRAMES_PER_BATCH image slots.
+
+    Full frames take a slot each; low-detail frames share mosaic slots. A batch
+    is released as soon as it is full, or when the next frame would not fit.
+    """
+
+    def __init__(self, max_slots: int = MAX_FRAMES_PER_BATCH, tiles: int = TILES_PER_MOSAIC):
+        self.max_slots = max_slots
+        self.tiles = tiles
+        self._full: list[FrameInfo] = []
+        self._tiled: list[FrameInfo] = []
+
+    def _slots(self, full: int, tiled: int) -> int:
+        return full + math.ceil(tiled / self.tiles)
+
+    def add(self, frame: FrameInfo, low_detail: bool) -> list[list[Slot]]:
+        """Add a frame; return the batches that are now ready to send."""
+        ready = []
+        if self._slots(len(self._full) + (not low_detail), len(self._tiled) + low_detail) > self.max_slots:
+            ready.append(self._take())
+        (self._tiled if low_detail else self._full).append(frame)
+        if (self._slots(len(self._full), len(self._tiled)) == self.max_slots
+                and len(self._tiled) % self.tiles == 0):
+            ready.append(self._take())
+        return ready
+
+    def flush(self) -> list[list[Slot]]:
+        """Return the last partial batch at end of stream."""
+        return [self._take()] if self._full or self._tiled else []
+
+    def _take(self) -> list[Slot]:
+        slots = [[frame] for frame in self._full]
+        # A lone leftover low-detail frame is simply sent as a full frame
+        slots += [self._tiled[i:i + self.tiles] for i in range(0, len(self._tiled), self.tiles)]
+        self._full, self._tiled = [], []
+        return sorted(slots, key=lambda slot: slot[0].timestamp)
+
+
+def build_mosaic(frames: list[FrameInfo], first_number: int) -> Image.Image:
+    """Tile frames into a grid, each tile labeled with its frame number.
+
+    Frames are numbered first_number, first_number + 1, ... in tile order (rows
+    first). An unreadable frame leaves its tile black but keeps its label.
+    CPU-bound: runs in a worker thread.
+    """
+    columns = min(VISION_MOSAIC_GRID, len(frames))
+    rows = math.ceil(len(frames) / VISION_MOSAIC_GRID)
+    tile_w = (FRAME_MAX_WIDTH - (VISION_MOSAIC_GRID - 1) * _GUTTER) // VISION_MOSAIC_GRID
+    tile_h = tile_w * 9 // 16
+    canvas = Image.new("RGB", (columns * tile_w + (columns - 1) * _GUTTER,
+                               rows * tile_h + (rows - 1) * _GUTTER))
+    draw = ImageDraw.Draw(canvas)
+    font = ImageFont.load_default(size=max(16, tile_h // 8))
+
+    for i, frame in enumerate(frames):
+        row, col = divmod(i, VISION_MOSAIC_GRID)
+        x, y = col * (tile_w + _GUTTER), row * (tile_h + _GUTTER)
+        try:
+            with Image.open(frame.path) as img:
+                img.draft("RGB", (tile_w, tile_h))
+                tile = ImageOps.contain(img.convert("RGB"), (tile_w, tile_h), Image.LANCZOS)
+            canvas.paste(tile, (x + (tile_w - tile.width) // 2, y + (tile_h - tile.height) // 2))
+        except Exception as e:
+            logger.warning("Failed to tile frame %s: %s", frame.path, e)
+
+        label = str(first_number + i)
+        left, top, right, bottom = draw.textbbox((0, 0), label, font=font)
+        draw.rectangle((x, y, x + right - left + 2 * _LABEL_PADDING, y + bottom - top + 2 * _LABEL_PADDING),
+                       fill="black")
+        draw.text((x + _LABEL_PADDING - left, y + _LABEL_PADDING - top), label, fill="white", font=font)
+    return canvas
+
+
+def tile_position(index: int) -> str:
+    """Human-readable grid position of the tile at index (rows first)."""
+    row, col = divmod(index, VISION_MOSAIC_GRID)
+    return f"row {row + 1}, column {col + 1}"
@@ -0,0 +1,170 @@
+"""Cheap local routing of unique frames before they are sent to Pixtral.
+
+Podcasts and interviews are mostly faces with nothing to read. Each frame is
+measured on a small grayscale thumbnail (text-likeness, Laplacian edge density
+and blur variance, difference from earlier camera shots) and routed:
+
+- send: slides, documents, code and other detailed frames
+- representative: the first frame of a new low-detail camera shot is sent
+- skip: blurred transitions (a sharpness dip between neighbouring frames) and
+  low-detail frames showing the same shot as a recent representative; they
+  get a lightweight VisionEvent locally
+"""
+
+import logging
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+from backend.config import (
+    PREFILTER_EDGE_MIN, PREFILTER_BLUR_MAX, PREFILTER_BLUR_RATIO, PREFILTER_STASIS_MAX,
+)
+from backend.models import FrameInfo, VisionEvent
+from backend.pipeline.frame_cache import FrameCache
+from backend.pipeline.frame_encoder import is_text_like
+
+logger = logging.getLogger(__name__)
+
+_THUMB_SIZE = (320, 180)
+_STASIS_BLOCK = 5               # 320x180 -> 64x36 block means for shot comparison
+_EDGE_LAPLACIAN = 40            # |Laplacian| counted as a strong edge
+_RECENT_SHOTS = 4               # camera shots a frame may be matched against (cuts between speakers)
+
+
+@dataclass
+class FrameFeatures:
+    text_like: bool
+    edge_density: float         # fraction of strong Laplacian edges
+    blur: float                 # Laplacian variance; low = soft image
+    shot: np.ndarray            # 36x64 block-mean thumbnail
+
+    @property
+    def low_detail(self) -> bool:
+        """Nothing to read and few edges (webcam views, plain title cards)."""
+        return not self.text_like and self.edge_density < PREFILTER_EDGE_MIN
+
+
+def _thumbnail_stats(img: Image.Image) -> tuple[bool, np.ndarray]:
+    return is_text_like(img), np.asarray(img.convert("L").resize(_THUMB_SIZE, Image.BILINEAR), dtype=np.float32)
+
+
+def compute_features(path: str, cache: FrameCache | None = None) -> FrameFeatures | None:
+    """Measure a frame on a small thumbnail (None if it cannot be read).
+
+    Uses the frame's pixels from the job frame cache when dedup left them there.
+    """
+    img = cache.image(path) if cache is not None else None
+    try:
+        if img is not None:
+            text_like, gray = _thumbnail_stats(img)
+        else:
+            with Image.open(path) as img:
+                # JPEG decodes straight to a reduced size: a fraction of a full decode
+                img.draft("RGB", (_THUMB_SIZE[0] * 2, _THUMB_SIZE[1] * 2))
+                text_like, gray = _thumbnail_stats(img)
+    except Exception as e:
+        logger.warning("Prefilter could not read %s: %s", path, e)
+        return None
+
+    lap = (4 * gray[1:-1, 1:-1] - gray[:-2, 1:-1] - gray[2:, 1:-1]
+           - gray[1:-1, :-2] - gray[1:-1, 2:])
+    h, w = gray.shape
+    shot = gray.reshape(h // _STASIS_BLOCK, _STASIS_BLOCK, w // _STASIS_BLOCK, _STASIS_BLOCK).mean(axis=(1, 3))
+    return FrameFeatures(
+        text_like=text_like,
+        edge_density=float(np.mean(np.abs(lap) > _EDGE_LAPLACIAN)),
+        blur=float(lap.var()),
+        shot=shot,
+    )
+
+
+def is_low_detail(path: str, cache: FrameCache | None = None) -> bool:
+    """Whether a frame is low-detail (False if it cannot be read)."""
+    features = compute_features(path, cache)
+    return features is not None and features.low_detail
+
+
+# (frame, skipped event or None to send, low-detail)
+Route = tuple[FrameInfo, VisionEvent | None, bool]
+
+
+class FramePrefilter:
+    """Routes frames in arrival order; keeps per-job stats.
+
+    A blurred transition is a dip in sharpness between its neighbours, so each
+    frame is decided once the next one has arrived (one frame of lookahead).
+    Stateful: feed frames one at a time, in chronological order, then flush().
+    """
+
+    def __init__(self, cache: FrameCache | None = None):
+        self.cache = cache
+        self._pending: tuple[FrameInfo, FrameFeatures | None] | None = None
+        self._prev_blur: float | None = None
+        self._shots: deque[tuple[np.ndarray, FrameInfo]] = deque(maxlen=_RECENT_SHOTS)
+        self.stats = {"frames": 0, "sent": 0, "representatives": 0, "skipped_static": 0, "skipped_blurry": 0}
+
+    def route(self, frame: FrameInfo) -> list[Route]:
+        """Add a frame; return the decisions now possible.
+
+        Measures a thumbnail: run in a worker thread.
+        """
+        self.stats["frames"] += 1
+        features = compute_features(frame.path, self.cache)
+        decided = []
+        if self._pending is not None:
+            decided.append(self._decide(*self._pending, next_blur=features.blur if features else None))
+        self._pending = (frame, features)
+        return decided
+
+    def flush(self) -> list[Route]:
+        """Decide the last frame at end of stream."""
+        pending, self._pending = self._pending, None
+        return [self._decide(*pending, next_blur=None)] if pending is not None else []
+
+    def _decide(self, frame: FrameInfo, features: FrameFeatures | None,
+                next_blur: float | None) -> Route:
+        if features is None:
+            self._prev_blur = None
+            self.stats["sent"] += 1
+            return frame, None, False
+
+        prev_blur, self._prev_blur = self._prev_blur, features.blur
+        if features.text_like:
+            self.stats["sent"] += 1
+            return frame, None, False
+
+        # Much softer than the frames on both sides: a cross-fade or motion blur
+        if (prev_blur is not None and next_blur is not None and features.blur < PREFILTER_BLUR_MAX
+                and features.blur < PREFILTER_BLUR_RATIO * min(prev_blur, next_blur)):
+            self.stats["skipped_blurry"] += 1
+            return frame, _skipped_event(frame, "blurry", "Blurred transition frame (not analyzed)"), False
+
+        if not features.low_detail:
+            self.stats["sent"] += 1
+            return frame, None, False
+
+        for shot, representative in self._shots:
+            if float(np.abs(features.shot - shot).mean()) <= PREFILTER_STASIS_MAX:
+                self.stats["skipped_static"] += 1
+                return frame, _skipped_event(
+                    frame, "static",
+                    f"Same camera shot as {representative.timestamp:.1f}s (not analyzed)",
+                ), True
+
+        self._shots.appendleft((features.shot, frame))
+        self.stats["representatives"] += 1
+        self.stats["sent"] += 1
+        return frame, None, True
+
+
+def _skipped_event(frame: FrameInfo, reason: str, description: str) -> VisionEvent:
+    return VisionEvent(
+        frame_index=frame.index,
+        timestamp=frame.timestamp,
+        frame_path=frame.path,
+        scene_description=description,
+        repeat_timestamps=frame.repeat_timestamps,
+        skipped=reason,
+    )
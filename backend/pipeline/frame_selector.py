@@ -0,0 +1,183 @@
+"""Budget-driven two-phase frame selection.
+
+Pass 1 decodes the video once and only reads scene scores (no image output).
+A selector then picks the timestamps that fit the frame budget, and pass 2
+extracts just those frames with fast input seeks.
+"""
+
+import asyncio
+import logging
+import os
+import re
+from pathlib import Path
+
+from backend.config import (
+    SCENE_DETECT_THRESHOLD, MAX_TOTAL_FRAMES, FRAME_BUDGET_OVERSAMPLE,
+)
+from backend.models import FrameInfo
+
+logger = logging.getLogger(__name__)
+
+# Width used for scene scoring — scores are relative, full resolution is not needed
+_SCORE_WIDTH = 320
+
+# metadata=print emits a pts line followed by the score line for each frame
+_PTS_RE = re.compile(r"pts_time:\s*([\d.]+)")
+_SCORE_RE = re.compile(r"lavfi\.scene_score=([\d.]+)")
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):([\d.]+)")
+
+
+async def _scan_scene_scores(
+    video_path: Path,
+    extra_outputs: list[str] | None = None,
+) -> tuple[list[tuple[float, float]], float | None]:
+    """Pass 1: collect (timestamp, scene_score) for every scene change.
+
+    Returns:
+        (candidates, duration) — duration is parsed from FFmpeg's input banner
+        so callers without ffprobe still get it.
+    """
+    vf = (
+        f"scale={_SCORE_WIDTH}:-2,"
+        f"select='gt(scene\\,{SCENE_DETECT_THRESHOLD})',"
+        f"metadata=print"
+    )
+    cmd = [
+        "ffmpeg", "-y", "-nostats", "-i", str(video_path),
+        *(extra_outputs or []),
+        "-map", "0:v:0",
+        "-vf", vf,
+        "-f", "null", "-",
+    ]
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await proc.communicate()
+    stderr_text = stderr.decode(errors="replace")
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"FFmpeg scene scan failed: {stderr_text[-500:]}")
+
+    candidates: list[tuple[float, float]] = []
+    pending_ts: float | None = None
+    for line in stderr_text.splitlines():
+        if m := _PTS_RE.search(line):
+            pending_ts = float(m.group(1))
+        elif (m := _SCORE_RE.search(line)) and pending_ts is not None:
+            candidates.append((pending_ts, float(m.group(1))))
+            pending_ts = None
+
+    duration = None
+    if m := _DURATION_RE.search(stderr_text):
+        duration = int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3))
+
+    return candidates, duration
+
+
+def _select_timestamps(
+    candidates: list[tuple[float, float]],
+    duration: float | None,
+    interval: int,
+    budget: int,
+) -> list[float]:
+    """Choose frame timestamps from scene candidates under a frame budget.
+
+    First replays the extract_frames rule (first frame, every scene change,
+    and an interval fallback whenever no frame was selected for `interval`
+    seconds). If that exceeds the budget, the strongest scene changes win and
+    interval fallbacks (score 0) fill the remaining slots, spread evenly.
+    """
+    # The opening frame always survives the budget (select+isnan(prev_selected_t))
+    selected: list[tuple[float, float]] = [(0.0, 1.0)]
+    prev_t = 0.0
+    end = duration if duration is not None else (candidates[-1][0] if candidates else 0.0)
+
+    for t, score in candidates:
+        while t - prev_t >= interval:
+            prev_t += interval
+            selected.append((prev_t, 0.0))
+        if t > prev_t:
+            selected.append((t, score))
+            prev_t = t
+
+    while end - prev_t > interval:
+        prev_t += interval
+        selected.append((prev_t, 0.0))
+
+    if len(selected) <= budget:
+        return [t for t, _ in selected]
+
+    by_score = sorted(selected, key=lambda c: c[1], reverse=True)
+    scene_changes = [c for c in by_score if c[1] > 0][:budget]
+    fallbacks = [c for c in selected if c[1] == 0]
+    room = budget - len(scene_changes)
+    if room > 0 and fallbacks:
+        step = len(fallbacks) / room
+        scene_changes += [fallbacks[int(i * step)] for i in range(min(room, len(fallbacks)))]
+
+    logger.info("Frame budget applied: %d -> %d timestamps", len(selected), len(scene_changes))
+    return sorted(t for t, _ in scene_changes)
+
+
+async def _extract_at(video_path: Path, timestamp: float, output_path: Path) -> bool:
+    """Pass 2: grab a single frame with an input seek (keyframe jump + short decode)."""
+    cmd = [
+        "ffmpeg", "-y",
+        "-ss", f"{timestamp:.3f}",
+        "-i", str(video_path),
+        "-frames:v", "1",
+        "-q:v", "2",
+        str(output_path),
+    ]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    await proc.communicate()
+    return proc.returncode == 0 and output_path.exists()
+
+
+async def extract_frames_budgeted(
+    video_path: Path,
+    frames_dir: Path,
+    interval: int,
+    duration: float | None = None,
+    extra_outputs: list[str] | None = None,
+) -> list[FrameInfo]:
+    """Score every scene change first, then extract only the top-K frames.
+
+    The budget is MAX_TOTAL_FRAMES scaled by FRAME_BUDGET_OVERSAMPLE so that
+    dedup still has headroom to drop near-duplicates.
+
+    Args:
+        video_path: Path to input video.
+        frames_dir: Directory to write frame JPGs.
+        interval: Minimum frame interval from _compute_frame_interval.
+        duration: Video duration in seconds, if already known.
+        extra_outputs: Additional FFmpeg output args for the scoring pass
+            (e.g. the audio track for a single-pass demux).
+
+    Returns:
+        List of FrameInfo with index, timestamp, and path.
+    """
+    candidates, scanned_duration = await _scan_scene_scores(video_path, extra_outputs)
+    budget = int(MAX_TOTAL_FRAMES * FRAME_BUDGET_OVERSAMPLE)
+    timestamps = _select_timestamps(candidates, duration or scanned_duration, interval, budget)
+
+    logger.info("Scene scan: %d scene changes -> extracting %d frames (budget=%d, interval=%ds)",
+                len(candidates), len(timestamps), budget, interval)
+
+    semaphore = asyncio.Semaphore(os.cpu_count() or 4)
+
+    async def _extract(i: int, ts: float) -> FrameInfo | None:
+        path = frames_dir / f"frame_{i + 1:04d}.jpg"
+        async with semaphore:
+            if await _extract_at(video_path, ts, path):
+                return FrameInfo(index=i, timestamp=ts, path=str(path))
+        logger.warning("Failed to extract frame at %.1fs", ts)
+        return None
+
+    results = await asyncio.gather(*(_extract(i, ts) for i, ts in enumerate(timestamps)))
+    return [f for f in results if f is not None]
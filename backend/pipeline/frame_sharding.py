@@ -0,0 +1,165 @@
+"""Time-sharded parallel frame extraction for long videos.
+
+The duration is split into N ranges, each scanned for scene changes by its own
+seek-bounded FFmpeg process. The per-shard results are merged on the global
+timeline, and the interval fallback (`prev_selected_t` logic) is replayed over
+the merged sequence so frame density matches a single-process run.
+"""
+
+import asyncio
+import logging
+import shutil
+from pathlib import Path
+
+from backend.config import SCENE_DETECT_THRESHOLD, FRAME_EXTRACTION_SHARDS
+from backend.models import FrameInfo
+from backend.pipeline.frame_extractor import _parse_showinfo_timestamps
+from backend.pipeline.frame_selector import _extract_at
+
+logger = logging.getLogger(__name__)
+
+# Each shard starts decoding this many seconds early so the scene score of its
+# first in-range frame is computed against the real previous frame
+_SHARD_LEAD_IN = 2.0
+
+
+def _plan_shards(duration: float, num_shards: int) -> list[tuple[float, float]]:
+    """Split [0, duration) into num_shards contiguous (start, end) ranges."""
+    step = duration / num_shards
+    return [(i * step, duration if i == num_shards - 1 else (i + 1) * step) for i in range(num_shards)]
+
+
+async def _scan_shard(
+    video_path: Path,
+    shard_dir: Path,
+    start: float,
+    end: float,
+) -> list[tuple[float, Path]]:
+    """Extract scene-change frames in [start, end) and return (global_ts, path) pairs."""
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    seek = max(start - _SHARD_LEAD_IN, 0.0)
+
+    cmd = [
+        "ffmpeg", "-y", "-nostats",
+        "-ss", f"{seek:.3f}",
+        "-i", str(video_path),
+        "-t", f"{end - seek:.3f}",
+        "-map", "0:v:0",
+        "-vf", f"select='gt(scene\\,{SCENE_DETECT_THRESHOLD})',showinfo",
+        "-vsync", "vfr",
+        "-q:v", "2",
+        str(shard_dir / "frame_%04d.jpg"),
+    ]
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await proc.communicate()
+    stderr_text = stderr.decode(errors="replace")
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"FFmpeg shard [{start:.0f}s-{end:.0f}s] failed: {stderr_text[-500:]}")
+
+    # pts_time restarts at 0 from the seek point
+    timestamps = [seek + t for t in _parse_showinfo_timestamps(stderr_text)]
+    files = sorted(shard_dir.glob("frame_*.jpg"))
+
+    # Drop lead-in frames — they belong to the previous shard
+    return [(ts, path) for ts, path in zip(timestamps, files) if start <= ts < end]
+
+
+def _merge_with_interval(
+    scene_frames: list[tuple[float, Path]],
+    duration: float,
+    interval: int,
+) -> list[tuple[float, Path | None]]:
+    """Replay the single-process select rule over globally ordered scene changes.
+
+    Returns (timestamp, path) entries where path is None for frames that the
+    interval fallback (or isnan(prev_selected_t) at t=0) would have selected
+    and that still need to be extracted.
+    """
+    merged: list[tuple[float, Path | None]] = []
+    prev_t = 0.0
+
+    # The first frame is always selected (isnan(prev_selected_t))
+    if not scene_frames or scene_frames[0][0] > 0:
+        merged.append((0.0, None))
+
+    # gte(t-prev_selected_t, interval), as in the FFmpeg filter
+    for ts, path in scene_frames:
+        while ts - prev_t >= interval:
+            prev_t += interval
+            merged.append((prev_t, None))
+        if merged and merged[-1][0] == ts:
+            # A scene change on the fallback time is one frame, already extracted
+            merged[-1] = (ts, path)
+        else:
+            merged.append((ts, path))
+        prev_t = ts
+
+    # Strict here: the last decodable frame lies before t == duration
+    while duration - prev_t > interval:
+        prev_t += interval
+        merged.append((prev_t, None))
+
+    return merged
+
+
+async def extract_frames_sharded(
+    video_path: Path,
+    frames_dir: Path,
+    interval: int,
+    duration: float,
+    num_shards: int = FRAME_EXTRACTION_SHARDS,
+) -> list[FrameInfo]:
+    """Run scene detection over N time ranges in parallel and merge the results.
+
+    Args:
+        video_path: Path to input video.
+        frames_dir: Directory to write frame JPGs.
+        interval: Minimum frame interval from _compute_frame_interval.
+        duration: Video duration in seconds (from _get_video_duration).
+        num_shards: Number of concurrent FFmpeg processes.
+
+    Returns:
+        List of FrameInfo with globally ordered indices and timestamps.
+    """
+    shards = _plan_shards(duration, num_shards)
+    shards_root = frames_dir / "shards"
+
+    logger.info("Sharded frame extraction: %d shards of %.0fs (threshold=%.1f, interval=%ds)",
+                len(shards), duration / num_shards, SCENE_DETECT_THRESHOLD, interval)
+
+    shard_results = await asyncio.gather(*(
+        _scan_shard(video_path, shards_root / f"shard_{i:02d}", start, end)
+        for i, (start, end) in enumerate(shards)
+    ))
+    scene_frames = sorted(
+        (item for result in shard_results for item in result),
+        key=lambda item: item[0],
+    )
+    merged = _merge_with_interval(scene_frames, duration, interval)
+
+    semaphore = asyncio.Semaphore(num_shards)
+
+    async def _materialize(i: int, ts: float, src: Path | None) -> FrameInfo | None:
+        path = frames_dir / f"frame_{i + 1:04d}.jpg"
+        if src is not None:
+            src.replace(path)
+            return FrameInfo(index=i, timestamp=ts, path=str(path))
+        async with semaphore:
+            if await _extract_at(video_path, ts, path):
+                return FrameInfo(index=i, timestamp=ts, path=str(path))
+        logger.warning("Failed to extract interval frame at %.1fs", ts)
+        return None
+
+    results = await asyncio.gather(*(_materialize(i, ts, src) for i, (ts, src) in enumerate(merged)))
+    shutil.rmtree(shards_root, ignore_errors=True)
+
+    frames = [f for f in results if f is not None]
+    logger.info("Sharded extraction: %d scene changes + %d interval frames",
+                len(scene_frames), len(frames) - len(scene_frames))
+    return frames
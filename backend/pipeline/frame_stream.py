@@ -0,0 +1,163 @@
+"""Streaming frame extraction: FFmpeg pipes raw frames straight into perceptual dedup.
+
+Instead of writing every scene-change frame to disk and re-reading it for
+hashing, FFmpeg emits raw RGB frames on stdout while showinfo lines are parsed
+from stderr as they arrive. Frames are hashed in batches while decoding
+continues and only frames that survive dedup are written as JPG.
+"""
+
+import asyncio
+import logging
+import re
+from collections import deque
+from pathlib import Path
+
+from PIL import Image
+
+from backend.config import PHASH_THRESHOLD, FRAME_MAX_WIDTH
+from backend.models import FrameInfo
+from backend.pipeline.frame_cache import FrameCache
+from backend.pipeline.frame_dedup import UniqueFrameIndex, _apply_frame_cap
+from backend.pipeline.frame_extractor import _build_select_filter
+from backend.pipeline.phash import hash_images
+
+logger = logging.getLogger(__name__)
+
+# showinfo line: ... n:   3 pts: 512000 pts_time:20 ... s:1024x576 ...
+_SHOWINFO_RE = re.compile(r"pts_time:\s*([\d.]+).*?\bs:(\d+)x(\d+)")
+
+# Decoded frames buffered between the stdout reader and the hasher
+_FRAME_QUEUE_SIZE = 8
+
+
+async def stream_unique_frames(
+    video_path: Path,
+    frames_dir: Path,
+    interval: int,
+    extra_outputs: list[str] | None = None,
+    threshold: int = PHASH_THRESHOLD,
+    cache: FrameCache | None = None,
+) -> list[FrameInfo]:
+    """Run scene-detection extraction with frames piped to an in-process dedup.
+
+    Args:
+        video_path: Path to input video.
+        frames_dir: Directory where surviving frames are written as JPG.
+        interval: Minimum frame interval from _compute_frame_interval.
+        extra_outputs: Additional FFmpeg output args placed before the frame
+            pipe (e.g. the audio track for a single-pass demux).
+        threshold: Minimum hamming distance to consider frames unique.
+        cache: When given, the in-memory pixels of each surviving frame are
+            stored here so vision never decodes the JPG again.
+
+    Returns:
+        Deduplicated frames (capped at MAX_TOTAL_FRAMES), indexed by their
+        position in the raw scene-change sequence.
+    """
+    cmd = [
+        "ffmpeg", "-y", "-nostats", "-i", str(video_path),
+        *(extra_outputs or []),
+        "-map", "0:v:0",
+        "-vf", _build_select_filter(interval, max_width=FRAME_MAX_WIDTH),
+        "-vsync", "vfr",
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "pipe:1",
+    ]
+
+    logger.info("Streaming frames into dedup (interval=%ds, threshold=%d)", interval, threshold)
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    frame_meta: asyncio.Queue[tuple[float, int, int] | None] = asyncio.Queue()
+    decoded: asyncio.Queue[tuple[float, Image.Image] | None] = asyncio.Queue(maxsize=_FRAME_QUEUE_SIZE)
+    stderr_tail: deque[str] = deque(maxlen=20)
+
+    async def _read_stderr():
+        # showinfo logs each frame before it reaches the encoder, so metadata
+        # always arrives ahead of the matching bytes on stdout
+        try:
+            while line := await proc.stderr.readline():
+                text = line.decode(errors="replace")
+                stderr_tail.append(text)
+                m = _SHOWINFO_RE.search(text)
+                if m:
+                    await frame_meta.put((float(m.group(1)), int(m.group(2)), int(m.group(3))))
+        finally:
+            await frame_meta.put(None)
+
+    async def _read_frames():
+        try:
+            while (meta := await frame_meta.get()) is not None:
+                ts, width, height = meta
+                try:
+                    data = await proc.stdout.readexactly(width * height * 3)
+                except asyncio.IncompleteReadError:
+                    logger.warning("Frame stream ended mid-frame at %.1fs", ts)
+                    break
+                await decoded.put((ts, Image.frombytes("RGB", (width, height), data)))
+        finally:
+            await decoded.put(None)
+
+    stderr_task = asyncio.create_task(_read_stderr())
+    reader_task = asyncio.create_task(_read_frames())
+
+    unique: list[FrameInfo] = []
+    index = UniqueFrameIndex(threshold)
+    raw_count = 0
+
+    try:
+        done = False
+        while not done and (item := await decoded.get()) is not None:
+            # Hash whatever has queued up behind this frame in one batch
+            batch = [item]
+            while not decoded.empty():
+                if (item := decoded.get_nowait()) is None:
+                    done = True
+                    break
+                batch.append(item)
+            hashes = await asyncio.to_thread(hash_images, [img for _, img in batch])
+
+            for (ts, img), h in zip(batch, hashes):
+                position = raw_count
+                raw_count += 1
+                representative = index.find(h)
+                if representative is not None:
+                    representative.repeat_timestamps.append(ts)
+                    continue
+
+                path = frames_dir / f"frame_{position + 1:04d}.jpg"
+                await asyncio.to_thread(img.save, path, format="JPEG", quality=95)
+                frame = FrameInfo(index=position, timestamp=ts, path=str(path), phash=int(h))
+                if cache is not None:
+                    cache.put(frame.path, img)
+                unique.append(frame)
+                index.add(h, frame)
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+        reader_task.cancel()
+        raise
+    finally:
+        await asyncio.gather(stderr_task, reader_task, return_exceptions=True)
+        await proc.wait()
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"FFmpeg frame streaming failed: {''.join(stderr_tail)[-500:]}")
+
+    logger.info("Streaming dedup: %d -> %d unique (%.0f%% reduction, %d JPGs written)",
+                raw_count, len(unique),
+                (1 - len(unique) / max(raw_count, 1)) * 100, len(unique))
+
+    capped = _apply_frame_cap(unique)
+    if len(capped) < len(unique):
+        kept = {f.path for f in capped}
+        for frame in unique:
+            if frame.path not in kept:
+                Path(frame.path).unlink(missing_ok=True)
+
+    return capped
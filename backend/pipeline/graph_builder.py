@@ -134,28 +134,37 @@ def build_graph(
         if ve.slide_title or ve.ocr_text:
             slide_id = f"slide_{i}"
             label = ve.slide_title or (ve.ocr_text[0][:50] if ve.ocr_text else f"Visual @{ve.timestamp:.0f}s")
+            # Near-duplicate frames dropped by dedup are the same slide shown again
+            shown_at = [ve.timestamp, *ve.repeat_timestamps]
             node = GraphNode(
                 id=slide_id,
                 type=NodeType.SLIDE,
                 label=label,
                 first_seen=ve.timestamp,
-                last_seen=ve.timestamp,
+                last_seen=max(shown_at),
                 attributes={
                     "ocr_text": ve.ocr_text,
                     "scene_description": ve.scene_description,
                     "frame_path": ve.frame_path,
+                    "shown_at": shown_at,
                 },
             )
             nodes.append(node)
             node_index[slide_id] = node
 
-            # Edge: slide shown_during closest topic
-            closest_topic = _find_closest_topic(entities.topics, ve.timestamp)
-            if closest_topic and closest_topic["id"] in node_index:
+            # Edge: slide shown_during closest topic (once per topic it reappears in)
+            linked_topics: set[str] = set()
+            for ts in shown_at:
+                closest_topic = _find_closest_topic(entities.topics, ts)
+                if not closest_topic or closest_topic["id"] not in node_index:
+                    continue
+                if closest_topic["id"] in linked_topics:
+                    continue
+                linked_topics.add(closest_topic["id"])
                 edges.append(GraphEdge(
                     source=closest_topic["id"], target=slide_id,
                     relation=RelationType.SHOWN_DURING,
-                    timestamp=ve.timestamp,
+                    timestamp=ts,
                     confidence=0.85,
                     evidence=Evidence(
                         source_type="visual",
@@ -304,7 +313,8 @@ def _detect_contradictions(
 
         # Check vision events near this timestamp
         for i, ve in enumerate(vision_events):
-            if abs(ve.timestamp - claim_ts) > 60:  # within 60s window
+            shown_at = [ve.timestamp, *ve.repeat_timestamps]
+            if min(abs(ts - claim_ts) for ts in shown_at) > 60:  # within 60s window
                 continue
 
             ocr_combined = " ".join(ve.ocr_text).lower()
@@ -0,0 +1,61 @@
+"""BK-tree over 64-bit perceptual hashes for sublinear near-duplicate lookup.
+
+Each child edge is labelled with the Hamming distance to its parent. By the
+triangle inequality, a query within radius r of a node at distance d can only
+be found under children labelled d-r..d+r, so most of the tree is skipped.
+"""
+
+from typing import Any
+
+
+class BKTree:
+    """Near-duplicate index: insert hashes, query the closest one within a radius."""
+
+    def __init__(self):
+        # Node: [hash, insertion order, item, {distance: child node}]
+        self._root: list | None = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, h: int, item: Any) -> None:
+        """Insert a hash with an attached item."""
+        node = [h, self._size, item, {}]
+        self._size += 1
+        if self._root is None:
+            self._root = node
+            return
+
+        current = self._root
+        while True:
+            d = (h ^ current[0]).bit_count()
+            child = current[3].get(d)
+            if child is None:
+                current[3][d] = node
+                return
+            current = child
+
+    def nearest(self, h: int, max_distance: int) -> tuple[int, Any] | None:
+        """Return (distance, item) of the closest hash within max_distance.
+
+        Ties go to the earliest inserted hash. Returns None when nothing is
+        within range.
+        """
+        if self._root is None:
+            return None
+
+        best: tuple[int, int, Any] | None = None  # (distance, order, item)
+        stack = [self._root]
+        while stack:
+            node_h, order, item, children = stack.pop()
+            d = (h ^ node_h).bit_count()
+            if d <= max_distance and (best is None or (d, order) < best[:2]):
+                best = (d, order, item)
+
+            radius = best[0] if best is not None else max_distance
+            for edge, child in children.items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+
+        return (best[0], best[2]) if best is not None else None
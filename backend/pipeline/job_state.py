@@ -0,0 +1,39 @@
+"""Durable per-job state so a restarted server can resume interrupted pipelines.
+
+job.json records the job's video, status and last progress event. Together
+with the stage cache (stages/*.json) it is enough to re-enqueue a job after a
+crash and skip every stage that already finished.
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+JOB_STATE_FILENAME = "job.json"
+
+
+def load_job_state(job_dir: Path) -> dict[str, Any] | None:
+    """Load a job's durable state, or None if it has none."""
+    try:
+        with open(job_dir / JOB_STATE_FILENAME) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def save_job_state(job_dir: Path, **fields: Any) -> dict[str, Any]:
+    """Merge fields into job.json and write it atomically."""
+    job_dir.mkdir(parents=True, exist_ok=True)
+    state = load_job_state(job_dir) or {}
+    state.update(fields, updated_at=time.time())
+
+    path = job_dir / JOB_STATE_FILENAME
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2, default=str)
+    tmp_path.replace(path)
+    return state
@@ -0,0 +1,156 @@
+"""Incremental parsing of the JSON object a streamed chat completion produces.
+
+The model's answer arrives a few characters at a time. The parser scans it as
+it grows and hands out each top-level section of the object as soon as its
+value is complete, and each element of a top-level array as soon as that
+element is closed. Callers can act on results before the response ends, and a
+truncated answer still yields every part that was completed.
+"""
+
+import json
+import logging
+import re
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+# ("item", key, element) for an element of the array under a top-level key,
+# ("section", key, value) for a complete top-level value
+StreamEvent = tuple[str, str, Any]
+
+
+def _loads(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+
+
+class JsonStreamParser:
+    """Feed text chunks in order; get completed sections and array items back.
+
+    Anything before the first '{' (such as a markdown code fence) is skipped,
+    and so is anything after the object closes.
+    """
+
+    def __init__(self):
+        self.sections: dict[str, Any] = {}
+        self.items: dict[str, list[Any]] = {}
+        self.done = False
+        self._buf = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False      # depth 1: next string is a key
+        self._await_value = False     # depth 1: next token starts a section value
+        self._await_item = False      # depth 2 array: next token starts an element
+        self._key: str | None = None
+        self._key_start = -1
+        self._value_start = -1
+        self._item_start = -1
+
+    def feed(self, text: str) -> list[StreamEvent]:
+        """Add the next chunk; return the items and sections it completed."""
+        self._buf += text
+        buf = self._buf
+        events: list[StreamEvent] = []
+        for pos in range(self._pos, len(buf)):
+            if self.done:
+                break
+            c = buf[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._key_start >= 0:
+                        self._key = json.loads(buf[self._key_start:pos + 1])
+                        self._key_start = -1
+                continue
+            if c.isspace():
+                continue
+            if not self._stack:
+                if c == "{":
+                    self._stack.append(c)
+                    self._expect_key = True
+                continue
+
+            depth = len(self._stack)
+            in_array = depth == 2 and self._stack[1] == "["
+            if depth == 1 and self._await_value:
+                self._await_value = False
+                self._value_start = pos
+            elif in_array and self._await_item and c != "]":
+                self._await_item = False
+                self._item_start = pos
+
+            if c == '"':
+                self._in_string = True
+                if depth == 1 and self._expect_key:
+                    self._expect_key = False
+                    self._key_start = pos
+            elif c in "{[":
+                self._stack.append(c)
+                if depth == 1 and c == "[":
+                    self._await_item = True
+            elif c in "}]":
+                # A scalar still open at this depth ends at the closing bracket
+                if in_array and self._item_start >= 0:
+                    self._emit_item(buf[self._item_start:pos], events)
+                elif depth == 1 and self._value_start >= 0:
+                    self._emit_section(buf[self._value_start:pos], events)
+                self._stack.pop()
+                depth -= 1
+                if depth == 2 and self._stack[1] == "[" and self._item_start >= 0:
+                    self._emit_item(buf[self._item_start:pos + 1], events)
+                elif depth == 1 and self._value_start >= 0:
+                    self._emit_section(buf[self._value_start:pos + 1], events)
+                elif depth == 0:
+                    self.done = True
+            elif c == ",":
+                if in_array:
+                    if self._item_start >= 0:
+                        self._emit_item(buf[self._item_start:pos], events)
+                    self._await_item = True
+                elif depth == 1:
+                    if self._value_start >= 0:
+                        self._emit_section(buf[self._value_start:pos], events)
+                    self._expect_key = True
+            elif c == ":" and depth == 1:
+                self._await_value = True
+        self._pos = len(buf)
+        return events
+
+    def partial(self) -> dict[str, Any]:
+        """Everything completed so far: whole sections, plus the finished
+        elements of an array that was cut off."""
+        return {**self.items, **self.sections}
+
+    def _emit_item(self, text: str, events: list[StreamEvent]) -> None:
+        self._item_start = -1
+        if self._key is None:
+            return
+        try:
+            item = _loads(text)
+        except json.JSONDecodeError:
+            logger.debug("Skipping unparseable element of %r: %s", self._key, text[:200])
+            return
+        self.items.setdefault(self._key, []).append(item)
+        events.append(("item", self._key, item))
+
+    def _emit_section(self, text: str, events: list[StreamEvent]) -> None:
+        self._value_start = -1
+        if self._key is None:
+            return
+        try:
+            value = _loads(text)
+        except json.JSONDecodeError:
+            logger.debug("Skipping unparseable section %r: %s", self._key, text[:200])
+            return
+        self.sections[self._key] = value
+        events.append(("section", self._key, value))
@@ -0,0 +1,126 @@
+"""Single-pass media extraction: one FFmpeg run produces the audio track and scene frames."""
+
+import asyncio
+import logging
+from pathlib import Path
+
+from backend.config import (
+    SCENE_DETECT_THRESHOLD, FRAME_EXTRACTION_MODE,
+    FRAME_EXTRACTION_SHARDS, FRAME_SHARD_MIN_DURATION,
+)
+from backend.models import FrameInfo, MediaProbe
+from backend.pipeline.audio_extractor import plan_audio_output, extract_audio
+from backend.pipeline.frame_cache import FrameCache
+from backend.pipeline.frame_extractor import (
+    _get_video_duration, _compute_frame_interval, _build_select_filter,
+    _parse_showinfo_timestamps, _collect_frames, _extract_first_frame,
+)
+from backend.pipeline.frame_stream import stream_unique_frames
+from backend.pipeline.frame_selector import extract_frames_budgeted
+from backend.pipeline.frame_sharding import extract_frames_sharded
+
+logger = logging.getLogger(__name__)
+
+
+async def extract_media(
+    video_path: Path,
+    output_dir: Path,
+    probe: MediaProbe | None = None,
+    frame_cache: FrameCache | None = None,
+) -> tuple[Path, list[FrameInfo]]:
+    """Demux the video once and write both the ASR audio and the selected frames.
+
+    A single FFmpeg process opens the container and maps two outputs: the
+    ASR audio track and the scene-detected JPG frames (same select filter and
+    showinfo timestamps as extract_frames). This avoids demuxing and decoding
+    the upload twice when audio and frames are extracted side by side.
+
+    In "stream" mode (FRAME_EXTRACTION_MODE) the frames are piped into the
+    perceptual dedup instead of being written to disk, so the returned frames
+    are already unique. In "budget" mode the single pass only scores scene
+    changes and the selected frames are pulled out afterwards with seeks. In
+    "sharded" mode long videos are scanned by parallel seek-bounded processes
+    while the audio track is extracted on its own.
+
+    Args:
+        video_path: Path to input video.
+        output_dir: Directory to write the audio file and frame JPGs.
+        probe: Cached media probe for the job; duration and audio codec are
+            read from it instead of running ffprobe again.
+        frame_cache: Stream mode only: receives the pixels of kept frames.
+
+    Returns:
+        (audio_path, frames) — same contract as extract_audio + extract_frames.
+    """
+    frames_dir = output_dir / "frames"
+    frames_dir.mkdir(exist_ok=True)
+
+    duration = probe.duration if probe else await _get_video_duration(video_path)
+    interval = _compute_frame_interval(duration)
+    audio_args, audio_path = await plan_audio_output(video_path, output_dir, probe)
+    audio_output = ["-map", "0:a:0", *audio_args, str(audio_path)]
+
+    if FRAME_EXTRACTION_MODE == "stream":
+        frames = await stream_unique_frames(video_path, frames_dir, interval, extra_outputs=audio_output,
+                                            cache=frame_cache)
+        if not frames:
+            frames = await _extract_first_frame(video_path, frames_dir)
+        logger.info("Media streamed: %s (%.1f MB), %d unique frames",
+                    audio_path.name, audio_path.stat().st_size / 1e6, len(frames))
+        return audio_path, frames
+
+    if FRAME_EXTRACTION_MODE == "budget":
+        frames = await extract_frames_budgeted(
+            video_path, frames_dir, interval, duration, extra_outputs=audio_output,
+        )
+        if not frames:
+            frames = await _extract_first_frame(video_path, frames_dir)
+        logger.info("Media extracted (budgeted): %s (%.1f MB), %d frames",
+                    audio_path.name, audio_path.stat().st_size / 1e6, len(frames))
+        return audio_path, frames
+
+    if (FRAME_EXTRACTION_MODE == "sharded" and duration is not None
+            and duration >= FRAME_SHARD_MIN_DURATION and FRAME_EXTRACTION_SHARDS > 1):
+        audio_path, frames = await asyncio.gather(
+            extract_audio(video_path, output_dir, probe),
+            extract_frames_sharded(video_path, frames_dir, interval, duration),
+        )
+        if not frames:
+            frames = await _extract_first_frame(video_path, frames_dir)
+        return audio_path, frames
+
+    cmd = [
+        "ffmpeg", "-y", "-i", str(video_path),
+        # Output 1: audio track for ASR
+        *audio_output,
+        # Output 2: scene-selected frames
+        "-map", "0:v:0",
+        "-vf", _build_select_filter(interval),
+        "-vsync", "vfr",
+        "-q:v", "2",
+        str(frames_dir / "frame_%04d.jpg"),
+    ]
+
+    logger.info("Extracting audio + frames in one pass: %s (threshold=%.1f, interval=%ds)",
+                video_path.name, SCENE_DETECT_THRESHOLD, interval)
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await proc.communicate()
+    stderr_text = stderr.decode()
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"FFmpeg media extraction failed: {stderr_text[-500:]}")
+
+    timestamps = _parse_showinfo_timestamps(stderr_text)
+    frames = _collect_frames(frames_dir, timestamps, interval)
+
+    if not frames:
+        frames = await _extract_first_frame(video_path, frames_dir)
+
+    logger.info("Media extracted: %s (%.1f MB), %d frames",
+                audio_path.name, audio_path.stat().st_size / 1e6, len(frames))
+    return audio_path, frames
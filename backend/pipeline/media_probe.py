@@ -0,0 +1,113 @@
+"""Probe uploaded media once with ffprobe and cache the result with the job."""
+
+import asyncio
+import json
+import logging
+from dataclasses import asdict
+from pathlib import Path
+
+from backend.models import MediaProbe
+
+logger = logging.getLogger(__name__)
+
+PROBE_FILENAME = "probe.json"
+
+
+def _parse_rate(rate: str | None) -> float | None:
+    """Parse an ffprobe frame rate such as "30000/1001"."""
+    if not rate:
+        return None
+    num, _, den = rate.partition("/")
+    try:
+        value = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(value, 3) if value > 0 else None
+
+
+def _to_int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def probe_media(video_path: Path) -> MediaProbe:
+    """Read container and stream metadata with a single ffprobe call.
+
+    Raises:
+        ValueError: If ffprobe cannot read the file.
+    """
+    cmd = [
+        "ffprobe",
+        "-v", "quiet",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
+        str(video_path),
+    ]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, _ = await proc.communicate()
+
+    try:
+        info = json.loads(stdout.decode())
+    except json.JSONDecodeError:
+        info = {}
+    if proc.returncode != 0 or "format" not in info:
+        raise ValueError(f"Could not read media file {video_path.name}")
+
+    fmt = info["format"]
+    streams = info.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"
+                  and not s.get("disposition", {}).get("attached_pic")), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    probe = MediaProbe(
+        duration=_to_float(fmt.get("duration")),
+        format_name=fmt.get("format_name", ""),
+        size_bytes=_to_int(fmt.get("size")),
+        bit_rate=_to_int(fmt.get("bit_rate")),
+        has_video=video is not None,
+        has_audio=audio is not None,
+    )
+    if video:
+        probe.video_codec = video.get("codec_name")
+        probe.width = _to_int(video.get("width"))
+        probe.height = _to_int(video.get("height"))
+        probe.fps = _parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate"))
+    if audio:
+        probe.audio_codec = audio.get("codec_name")
+        probe.sample_rate = _to_int(audio.get("sample_rate"))
+        probe.channels = _to_int(audio.get("channels"))
+
+    logger.info("Probed %s: %.1fs, video=%s %sx%s@%s, audio=%s %sHz",
+                video_path.name, probe.duration or 0, probe.video_codec, probe.width,
+                probe.height, probe.fps, probe.audio_codec, probe.sample_rate)
+    return probe
+
+
+def save_probe(probe: MediaProbe, job_dir: Path) -> None:
+    """Persist the probe result next to the job's other artifacts."""
+    job_dir.mkdir(parents=True, exist_ok=True)
+    with open(job_dir / PROBE_FILENAME, "w") as f:
+        json.dump(asdict(probe), f, indent=2)
+
+
+def load_probe(job_dir: Path) -> MediaProbe | None:
+    """Load a cached probe result, or None if the job has none."""
+    try:
+        with open(job_dir / PROBE_FILENAME) as f:
+            return MediaProbe(**json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError, TypeError):
+        return None
@@ -0,0 +1,293 @@
+"""Process-wide pooled HTTP client and request scheduler for the Mistral API.
+
+One httpx.AsyncClient is shared by every pipeline stage, so vision batches,
+LLM calls, transcription and their retries reuse warm keep-alive connections
+instead of paying a TLS handshake each time. It is opened and closed by the
+FastAPI lifespan, and created lazily for code running outside the app.
+
+Every request goes through post() or chat_completion(), which wait on a
+process-wide FairScheduler (rate_limit): jobs take turns within the API key's
+request and token limits, and a circuit breaker pauses all jobs while the
+upstream is failing. chat_completion() streams the answer (MISTRAL_STREAMING)
+and hands each chunk to the caller as it arrives.
+"""
+
+import asyncio
+import contextvars
+import importlib.util
+import json as jsonlib
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+import backend.config as config
+from backend.pipeline.rate_limit import CircuitBreaker, FairScheduler
+
+logger = logging.getLogger(__name__)
+
+CHAT_URL = f"{config.MISTRAL_BASE_URL}/chat/completions"
+TRANSCRIPTION_URL = f"{config.MISTRAL_BASE_URL}/audio/transcriptions"
+
+# Per-endpoint timeouts: connecting should be fast, reading waits on the model
+CHAT_TIMEOUT = httpx.Timeout(config.MISTRAL_CHAT_TIMEOUT, connect=10)
+ASR_TIMEOUT = httpx.Timeout(config.MISTRAL_ASR_TIMEOUT, connect=10)
+
+# Text is ~4 characters per token; images cost a roughly fixed number of tokens
+_CHARS_PER_TOKEN = 4
+_IMAGE_TOKENS = 1500
+
+# Job the current task works for (set by the orchestrator, inherited by subtasks)
+current_job: contextvars.ContextVar[str] = contextvars.ContextVar("mistral_job", default="")
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_scheduler: FairScheduler | None = None
+_scheduler_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _http2_available() -> bool:
+    return config.MISTRAL_HTTP2 and importlib.util.find_spec("h2") is not None
+
+
+def _new_client() -> httpx.AsyncClient:
+    http2 = _http2_available()
+    logger.info("Opening Mistral HTTP client (http2=%s, max_connections=%d)",
+                http2, config.MISTRAL_MAX_CONNECTIONS)
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=CHAT_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=config.MISTRAL_MAX_CONNECTIONS,
+            max_keepalive_connections=config.MISTRAL_MAX_CONNECTIONS,
+            keepalive_expiry=60,
+        ),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use in this event loop."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        # Connections are bound to the loop that opened them
+        _client = _new_client()
+        _client_loop = loop
+    return _client
+
+
+async def start_client() -> None:
+    """Open the shared client (application startup)."""
+    get_client()
+
+
+async def close_client() -> None:
+    """Close the shared client and its pooled connections (application shutdown)."""
+    global _client, _client_loop, _scheduler, _scheduler_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _scheduler = None
+    _scheduler_loop = None
+
+
+def get_scheduler() -> FairScheduler:
+    """Return the process-wide scheduler, creating it on first use in this event loop."""
+    global _scheduler, _scheduler_loop
+    loop = asyncio.get_running_loop()
+    if _scheduler is None or _scheduler_loop is not loop:
+        _scheduler_loop = loop
+        _scheduler = FairScheduler(
+            rps=config.MISTRAL_RPS,
+            tpm=config.MISTRAL_TPM,
+            breaker=CircuitBreaker(
+                failure_threshold=config.MISTRAL_CIRCUIT_FAILURES,
+                cooldown=config.MISTRAL_CIRCUIT_COOLDOWN,
+                max_cooldown=config.MISTRAL_CIRCUIT_MAX_COOLDOWN,
+            ),
+            max_wait=config.MISTRAL_CIRCUIT_MAX_WAIT,
+        )
+    return _scheduler
+
+
+def estimate_tokens(body: dict[str, Any] | None) -> int:
+    """Upper-bound token cost of a chat completion: prompt estimate plus max_tokens."""
+    if not body or "messages" not in body:
+        return 0  # transcription is not billed in tokens
+    chars = images = 0
+    for message in body["messages"]:
+        content = message.get("content", "")
+        if isinstance(content, str):
+            chars += len(content)
+            continue
+        for part in content:
+            if part.get("type") == "image_url":
+                images += 1
+            else:
+                chars += len(part.get("text", ""))
+    return chars // _CHARS_PER_TOKEN + images * _IMAGE_TOKENS + body.get("max_tokens", 0)
+
+
+async def post(url: str, *, json: dict[str, Any] | None = None, **kwargs) -> httpx.Response:
+    """POST to the Mistral API once the scheduler grants this job a turn.
+
+    The outcome feeds the circuit breaker (5xx/timeouts count as failures),
+    reconciles the token reservation with reported usage, and a 429's
+    Retry-After pauses every job. Raises RuntimeError if the circuit stays
+    open longer than MISTRAL_CIRCUIT_MAX_WAIT.
+    """
+    scheduler = get_scheduler()
+    permit = await scheduler.acquire(current_job.get(), estimate_tokens(json))
+    ok: bool | None = None
+    used: int | None = None
+    delay: float | None = None
+    try:
+        sent = time.monotonic()
+        resp = await get_client().post(url, headers=auth_headers(), json=json, **kwargs)
+        # Upstream time only, excluding the wait for a scheduler turn
+        resp.elapsed = timedelta(seconds=time.monotonic() - sent)
+        ok = resp.status_code < 500
+        if resp.status_code == 429:
+            delay = retry_after(resp) or 1.0
+        elif resp.status_code == 200 and json is not None:
+            used = _usage(resp)
+        return resp
+    except (httpx.TimeoutException, httpx.NetworkError):
+        ok = False
+        raise
+    finally:
+        scheduler.release(permit, ok, used, delay)
+
+
+@dataclass
+class ChatCompletion:
+    """Outcome of a chat completion request."""
+    response: httpx.Response    # status and headers; the body is already consumed
+    content: str                # generated text; partial if the stream was cut off
+    finish_reason: str | None   # "stop", "length", ...; None if the stream was cut off
+
+
+async def chat_completion(
+    body: dict[str, Any],
+    on_content: Callable[[str], Awaitable[None]] | None = None,
+) -> ChatCompletion:
+    """Run a chat completion, streamed when MISTRAL_STREAMING is set.
+
+    on_content receives the generated text chunk by chunk as it arrives (in
+    one piece when not streaming). Only a non-200 status leaves content empty.
+    A stream that breaks off midway returns the text received so far with
+    finish_reason None, and counts as an upstream failure for the circuit
+    breaker. Timeouts and network errors before the first byte raise, as with
+    post().
+    """
+    if not config.MISTRAL_STREAMING:
+        resp = await post(CHAT_URL, json=body)
+        return await _whole_completion(resp, on_content)
+
+    scheduler = get_scheduler()
+    permit = await scheduler.acquire(current_job.get(), estimate_tokens(body))
+    ok: bool | None = None
+    used: int | None = None
+    delay: float | None = None
+    parts: list[str] = []
+    finish_reason = None
+    try:
+        sent = time.monotonic()
+        async with get_client().stream("POST", CHAT_URL, headers=auth_headers(),
+                                       json={**body, "stream": True}) as resp:
+            ok = resp.status_code < 500
+            if resp.status_code != 200:
+                await resp.aread()
+                if resp.status_code == 429:
+                    delay = retry_after(resp) or 1.0
+            elif not resp.headers.get("content-type", "").startswith("text/event-stream"):
+                # Answered in one piece despite stream=True
+                await resp.aread()
+                completion = await _whole_completion(resp, on_content)
+                used = _usage(resp)
+                resp.elapsed = timedelta(seconds=time.monotonic() - sent)
+                return completion
+            else:
+                try:
+                    async for line in resp.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            chunk = jsonlib.loads(data)
+                        except ValueError:
+                            continue
+                        used = (chunk.get("usage") or {}).get("total_tokens", used)
+                        for choice in chunk.get("choices") or []:
+                            text = (choice.get("delta") or {}).get("content")
+                            if text:
+                                parts.append(text)
+                                if on_content is not None:
+                                    await on_content(text)
+                            finish_reason = choice.get("finish_reason") or finish_reason
+                except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                    ok = False
+                    finish_reason = None
+                    logger.warning("Mistral stream cut off after %d chars: %s", sum(map(len, parts)), e)
+        # Upstream time only, excluding the wait for a scheduler turn
+        resp.elapsed = timedelta(seconds=time.monotonic() - sent)
+        return ChatCompletion(resp, "".join(parts), finish_reason)
+    except (httpx.TimeoutException, httpx.NetworkError):
+        ok = False
+        raise
+    finally:
+        scheduler.release(permit, ok, used, delay)
+
+
+async def _whole_completion(
+    resp: httpx.Response,
+    on_content: Callable[[str], Awaitable[None]] | None,
+) -> ChatCompletion:
+    """ChatCompletion from a non-streamed response."""
+    content, finish_reason = "", None
+    if resp.status_code == 200:
+        try:
+            choice = resp.json()["choices"][0]
+            content = choice["message"]["content"] or ""
+            finish_reason = choice.get("finish_reason")
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning("Malformed chat completion response: %s", e)
+        if content and on_content is not None:
+            await on_content(content)
+    return ChatCompletion(resp, content, finish_reason)
+
+
+def _usage(resp: httpx.Response) -> int | None:
+    """Tokens billed for a non-streamed chat completion, if reported."""
+    try:
+        return (resp.json().get("usage") or {}).get("total_tokens")
+    except (ValueError, AttributeError):
+        return None
+
+
+def auth_headers() -> dict[str, str]:
+    """Authorization header with the current API key (it can change at runtime via settings)."""
+    return {"Authorization": f"Bearer {config.MISTRAL_API_KEY}"}
+
+
+def retry_after(resp: httpx.Response) -> float | None:
+    """Seconds the server asked us to wait (Retry-After as seconds or HTTP date), if any."""
+    value = resp.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
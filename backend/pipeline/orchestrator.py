@@ -1,7 +1,7 @@
 """Pipeline orchestrator: coordinates all stages with parallelism and SSE progress events.
 
 Orchestration pattern:
-  1. Audio + Frame extraction (parallel)
+  1. Audio + Frame extraction (single FFmpeg pass)
   2. Voxtral ASR + Frame dedup (parallel)
   3. Pass A entities + Pixtral vision (parallel)
   4. Knowledge Graph construction
@@ -18,15 +18,34 @@ from dataclasses import asdict
 from pathlib import Path
 from typing import Any
 
-from backend.config import JOBS_DIR
-from backend.models import JobStatus, KnowledgeGraph
-from backend.pipeline.audio_extractor import extract_audio
-from backend.pipeline.frame_extractor import extract_frames
-from backend.pipeline.frame_dedup import dedup_frames
+from backend.config import (
+    JOBS_DIR, FRAME_EXTRACTION_MODE, VAD_ENABLED, SCENE_DETECT_THRESHOLD, MIN_FRAME_INTERVAL,
+    AUDIO_ENCODE_FORMAT, MODEL_ASR, MODEL_VISION, MODEL_REASONING, ASR_CHUNK_SECONDS,
+    PHASH_THRESHOLD, DEDUP_WINDOW_SIZE, DEDUP_MODE, MAX_TOTAL_FRAMES, FRAME_MAX_WIDTH,
+    VISION_REQUEST_MAX_BYTES, TIMELINE_SNAPSHOT_INTERVAL, PREFILTER_ENABLED, PREFILTER_EDGE_MIN,
+    PREFILTER_BLUR_MAX, PREFILTER_BLUR_RATIO, PREFILTER_STASIS_MAX, VISION_MOSAIC_ENABLED, VISION_MOSAIC_GRID,
+    ASR_PASSTHROUGH_CODECS, FRAME_BUDGET_OVERSAMPLE, VAD_FRAME_MS, VAD_MARGIN_DB, VAD_MIN_SILENCE,
+    VAD_PADDING, VAD_MIN_SAVINGS, ASR_CHUNKING_MIN_DURATION, ASR_CHUNK_OVERLAP,
+)
+from backend.models import (
+    JobStatus, KnowledgeGraph, MediaProbe, FrameInfo, TranscriptSegment, VisionEvent,
+    ExtractedEntities, GraphNode, GraphEdge, Evidence, TimelineSnapshot,
+)
+from backend.pipeline.media_extractor import extract_media
+from backend.pipeline.media_probe import probe_media, save_probe, load_probe
+from backend.pipeline.mistral_client import current_job, get_scheduler
+from backend.pipeline.frame_cache import FrameCache
+from backend.pipeline.frame_dedup import emit_unique_frames
 from backend.pipeline.transcriber import transcribe
-from backend.pipeline.vision_analyzer import analyze_frames
+from backend.pipeline.voice_activity import trim_silence
+from backend.pipeline.vision_analyzer import analyze_frames, analyze_frame_stream
 from backend.pipeline.graph_builder import build_graph, serialize_graph
 from backend.pipeline.reasoner import extract_entities, extract_insights
+from backend.pipeline.stage_cache import StageCache, file_digest, stage_key, prompt_version
+from backend.pipeline.job_state import save_job_state
+from backend.prompts.vision_analysis import VISION_PROMPT
+from backend.prompts.state_reasoning import PASS_A_PROMPT
+from backend.prompts.insight_extraction import PASS_B_PROMPT
 
 logger = logging.getLogger(__name__)
 
@@ -206,18 +225,34 @@ def _normalize_insights(insights, speaker_map):
 class PipelineOrchestrator:
     """Runs the full processing pipeline for a video, emitting progress events."""
 
-    def __init__(self, job_id: str, video_path: Path):
+    def __init__(self, job_id: str, video_path: Path, probe: MediaProbe | None = None,
+                 content_hash: str | None = None):
         self.job_id = job_id
         self.video_path = video_path
         self.job_dir = JOBS_DIR / job_id
         self.job_dir.mkdir(parents=True, exist_ok=True)
+        self.probe = probe or load_probe(self.job_dir)
+        self._cache = StageCache(self.job_dir)
+        self._frame_cache = FrameCache()
+        self._metrics: dict[str, Any] = {}
         self._events: asyncio.Queue[dict] = asyncio.Queue()
         self._status = JobStatus.PROCESSING
+        self._progress: float = 0
+        self._state_lock = asyncio.Lock()
+        state = save_job_state(self.job_dir, job_id=job_id, video_path=str(video_path), status=self._status.value,
+                               **({"content_hash": content_hash} if content_hash else {}))
+        # SHA-256 of the video from upload; re-analyses and resumes read it back from job.json
+        self._content_hash: str | None = state.get("content_hash")
 
     @property
     def events(self) -> asyncio.Queue[dict]:
         return self._events
 
+    @property
+    def running(self) -> bool:
+        """False once the pipeline has completed or failed."""
+        return self._status == JobStatus.PROCESSING
+
     @asynccontextmanager
     async def _progress_ticker(self, step: str, start_pct: float, end_pct: float):
         """Emit interpolated progress events during long operations.
@@ -255,37 +290,83 @@ class PipelineOrchestrator:
     async def run(self) -> dict[str, Any]:
         """Execute the full pipeline. Returns complete results dict."""
         start = time.time()
+        # Tags every Mistral request made by this run (and its subtasks) for fair queuing
+        current_job.set(self.job_id)
 
         try:
             await self._emit("upload", 5, "Video received, starting pipeline")
 
-            # --- Step 1: Audio + Frame extraction (parallel) ---
+            if self.probe is None:
+                self.probe = await probe_media(self.video_path)
+                save_probe(self.probe, self.job_dir)
+
+            # Stage keys chain upstream keys with each stage's own inputs, so a
+            # prompt or model change only invalidates the stages downstream of it
+            if self._content_hash is None:
+                # Job created before content hashes were recorded
+                self._content_hash = await asyncio.to_thread(file_digest, self.video_path)
+                async with self._state_lock:
+                    await asyncio.to_thread(save_job_state, self.job_dir, content_hash=self._content_hash)
+            # Stream mode dedups and caps frames inside the media stage, budget
+            # mode sizes extraction from the frame cap
+            media_key = stage_key("media", self._content_hash, FRAME_EXTRACTION_MODE, DEDUP_MODE,
+                                  SCENE_DETECT_THRESHOLD, MIN_FRAME_INTERVAL, AUDIO_ENCODE_FORMAT,
+                                  ASR_PASSTHROUGH_CODECS, FRAME_MAX_WIDTH, PHASH_THRESHOLD, DEDUP_WINDOW_SIZE,
+                                  MAX_TOTAL_FRAMES, FRAME_BUDGET_OVERSAMPLE)
+            transcript_key = stage_key("transcript", media_key, MODEL_ASR, VAD_ENABLED, VAD_FRAME_MS,
+                                       VAD_MARGIN_DB, VAD_MIN_SILENCE, VAD_PADDING, VAD_MIN_SAVINGS,
+                                       ASR_CHUNKING_MIN_DURATION, ASR_CHUNK_SECONDS, ASR_CHUNK_OVERLAP)
+            frames_key = stage_key("frames", media_key, PHASH_THRESHOLD, DEDUP_WINDOW_SIZE, DEDUP_MODE,
+                                   MAX_TOTAL_FRAMES)
+            vision_key = stage_key("vision", frames_key, MODEL_VISION,
+                                   prompt_version(VISION_PROMPT), FRAME_MAX_WIDTH, VISION_REQUEST_MAX_BYTES,
+                                   PREFILTER_ENABLED, PREFILTER_EDGE_MIN, PREFILTER_BLUR_MAX,
+                                   PREFILTER_BLUR_RATIO, PREFILTER_STASIS_MAX,
+                                   VISION_MOSAIC_ENABLED, VISION_MOSAIC_GRID)
+            entities_key = stage_key("entities", transcript_key, MODEL_REASONING, prompt_version(PASS_A_PROMPT))
+            graph_key = stage_key("graph", transcript_key, vision_key, entities_key,
+                                  self.probe.duration, TIMELINE_SNAPSHOT_INTERVAL)
+            insights_key = stage_key("insights", graph_key, MODEL_REASONING, prompt_version(PASS_B_PROMPT))
+
+            # --- Step 1: Audio + Frame extraction (single demux) ---
             await self._emit("audio", 10, "Extracting audio and frames")
             async with self._progress_ticker("audio", 10, 20):
-                audio_task = extract_audio(self.video_path, self.job_dir)
-                frames_task = extract_frames(self.video_path, self.job_dir)
-                audio_path, raw_frames = await asyncio.gather(audio_task, frames_task)
+                audio_path, raw_frames = await self._stage(
+                    "media", media_key,
+                    lambda: extract_media(self.video_path, self.job_dir, self.probe, self._frame_cache),
+                    encode=_encode_media, decode=_decode_media,
+                )
             await self._emit("audio", 20, f"Audio extracted, {len(raw_frames)} frames found")
 
-            # --- Step 2: Voxtral ASR + Frame dedup (parallel) ---
+            # --- Step 2: Voxtral ASR + Frame dedup -> Pixtral vision (parallel) ---
+            # Vision batches go out as dedup emits unique frames, overlapping ASR
             await self._emit("transcription", 25, "Transcribing audio with Voxtral")
-            async with self._progress_ticker("transcription", 25, 44):
-                transcript_task = transcribe(audio_path)
-                async with self._progress_ticker("frames", 25, 30):
-                    unique_frames = await asyncio.to_thread(dedup_frames, raw_frames)
-                await self._emit("frames", 30, f"{len(unique_frames)} unique frames after dedup")
-                transcript = await transcript_task
-            await self._emit("transcription", 45, f"Transcription complete: {len(transcript)} segments")
-
-            # Get video duration from transcript or estimate
-            duration = transcript[-1].end if transcript else 0
-
-            # --- Step 3: Pass A entities + Pixtral vision (parallel) ---
-            await self._emit("analysis", 50, "Extracting entities and analyzing frames")
-            async with self._progress_ticker("vision", 50, 64):
-                entities_task = extract_entities(transcript)
-                vision_task = analyze_frames(unique_frames)
-                entities, vision_events = await asyncio.gather(entities_task, vision_task)
+            vision_task = asyncio.create_task(self._frames_and_vision(raw_frames, frames_key, vision_key))
+            try:
+                async with self._progress_ticker("transcription", 25, 44):
+                    transcript = await self._stage(
+                        "transcript", transcript_key,
+                        lambda: self._transcribe(audio_path),
+                        encode=_encode_list, decode=_decoder(TranscriptSegment),
+                    )
+                await self._emit("transcription", 45, f"Transcription complete: {len(transcript)} segments")
+
+                # Authoritative duration from the probe; transcript end as fallback
+                duration = self.probe.duration or (transcript[-1].end if transcript else 0)
+
+                # --- Step 3: Pass A entities + remaining Pixtral vision (parallel) ---
+                await self._emit("analysis", 50, "Extracting entities and analyzing frames")
+                async with self._progress_ticker("vision", 50, 64):
+                    entities_task = self._stage(
+                        "entities", entities_key,
+                        lambda: extract_entities(transcript, self._section_progress("analysis", "Pass A")),
+                        encode=asdict, decode=_reject_partial(lambda d: ExtractedEntities(**d)),
+                    )
+                    entities, vision_events = await asyncio.gather(entities_task, vision_task)
+            finally:
+                if not vision_task.done():
+                    vision_task.cancel()
+            self._frame_cache.clear()
             await self._emit("vision", 65, f"Vision: {len(vision_events)} events. Entities extracted.")
 
             # Normalize entity speaker IDs/names to match transcript diarization labels
@@ -295,19 +376,37 @@ class PipelineOrchestrator:
             # --- Step 4: Knowledge Graph construction ---
             await self._emit("graph", 70, "Building Temporal Knowledge Graph")
             async with self._progress_ticker("graph", 70, 79):
-                graph = build_graph(transcript, vision_events, entities, duration)
-                serialized = serialize_graph(graph)
+                graph, serialized = await self._stage(
+                    "graph", graph_key,
+                    lambda: self._build_graph(transcript, vision_events, entities, duration),
+                    encode=lambda gs: {"graph": _graph_to_dict(gs[0]), "serialized": gs[1]},
+                    decode=lambda d: (_graph_from_dict(d["graph"]), d["serialized"]),
+                )
             await self._emit("graph", 80, f"Graph built: {graph.metadata['total_nodes']} nodes, {graph.metadata['total_edges']} edges")
 
             # --- Step 5: Pass B insight reasoning ---
             await self._emit("insights", 85, "Extracting insights from knowledge graph")
             async with self._progress_ticker("insights", 85, 94):
-                insights = await extract_insights(serialized)
+                insights = await self._stage(
+                    "insights", insights_key,
+                    lambda: extract_insights(serialized, self._section_progress(
+                        "insights", "Pass B", 85, 94, sections=7)),
+                    decode=_reject_partial(lambda d: d),
+                )
             # Normalize insight speaker references to match transcript labels
             _normalize_insights(insights, speaker_map)
             await self._emit("insights", 95, "Insights extracted with evidence chains")
 
+            # Tell an analysis cut short by an unparseable LLM answer from one that found nothing
+            partial = {name: missing for name, missing in (
+                ("entities", entities.missing_sections), ("insights", insights.get("missing_sections", [])),
+            ) if missing}
+            if partial:
+                logger.warning("[%s] Partial LLM answers, sections missing: %s", self.job_id, partial)
+                self._metrics["missing_sections"] = partial
+
             # --- Save results ---
+            self._metrics["api"] = get_scheduler().job_metrics(self.job_id)
             results = self._build_results(transcript, graph, insights, vision_events, duration, start)
             self._save_results(results)
 
@@ -318,21 +417,125 @@ class PipelineOrchestrator:
 
         except Exception as e:
             logger.exception("Pipeline failed for job %s", self.job_id)
+            get_scheduler().job_metrics(self.job_id)  # drop this job's queue stats
             self._status = JobStatus.ERROR
             await self._emit("error", 0, f"Pipeline error: {str(e)[:200]}")
             raise
 
+    async def _stage(self, stage: str, key: str, compute, encode=None, decode=None):
+        """Return a stage's cached output when its key matches, else compute and cache it.
+
+        decode may return None to reject a stale entry (e.g. artifacts deleted).
+        """
+        cached = self._cache.load(stage, key)
+        if cached is not None:
+            value = decode(cached) if decode else cached
+            if value is not None:
+                logger.info("[%s] %s: reusing cached output (%s)", self.job_id, stage, key)
+                return value
+        value = await compute()
+        self._cache.save(stage, key, encode(value) if encode else value)
+        return value
+
+    async def _frames_and_vision(self, raw_frames: list[FrameInfo], frames_key: str,
+                                 vision_key: str) -> list[VisionEvent]:
+        """Dedup frames and analyze them, streaming unique frames into vision batching.
+
+        Falls back to analyzing a finished list when the frames stage is cached
+        or frames were already deduplicated while streaming out of FFmpeg.
+        """
+        if FRAME_EXTRACTION_MODE == "stream":
+            unique_frames = raw_frames
+        else:
+            cached = self._cache.load("frames", frames_key)
+            unique_frames = _decoder(FrameInfo)(cached) if cached is not None else None
+            if unique_frames is not None:
+                logger.info("[%s] frames: reusing cached output (%s)", self.job_id, frames_key)
+
+        if unique_frames is not None:
+            await self._emit("frames", max(30, self._progress), f"{len(unique_frames)} unique frames after dedup")
+            return await self._stage(
+                "vision", vision_key,
+                lambda: analyze_frames(unique_frames, self._frame_cache, self._metrics, self._vision_progress),
+                encode=_encode_list, decode=_decoder(VisionEvent),
+            )
+
+        loop = asyncio.get_running_loop()
+        source: asyncio.Queue[FrameInfo | None] = asyncio.Queue()
+
+        async def _dedup():
+            unique = await asyncio.to_thread(
+                emit_unique_frames, raw_frames,
+                lambda frame: loop.call_soon_threadsafe(source.put_nowait, frame),
+                cache=self._frame_cache,
+            )
+            self._cache.save("frames", frames_key, _encode_list(unique))
+            await self._emit("frames", max(30, self._progress), f"{len(unique)} unique frames after dedup")
+
+        tasks = [
+            asyncio.create_task(_dedup()),
+            asyncio.create_task(self._stage(
+                "vision", vision_key,
+                lambda: analyze_frame_stream(source, self._frame_cache, self._metrics, self._vision_progress),
+                encode=_encode_list, decode=_decoder(VisionEvent),
+            )),
+        ]
+        try:
+            # A dedup failure cancels vision before it can cache a partial result
+            _, vision_events = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        return vision_events
+
+    async def _vision_progress(self, analyzed: int) -> None:
+        """Report vision results as they stream in."""
+        await self._emit("vision", self._progress, f"Vision: {analyzed} frames analyzed", ticker=True)
+
+    def _section_progress(self, step: str, label: str, start_pct: float | None = None,
+                          end_pct: float | None = None, sections: int = 1):
+        """Progress callback for an LLM pass, reporting each finished section of its answer.
+
+        With a percentage range, progress advances by section (out of the
+        expected number); otherwise only the message changes.
+        """
+        done = 0
+
+        async def _on_section(name: str) -> None:
+            nonlocal done
+            done += 1
+            progress = self._progress
+            if start_pct is not None and end_pct is not None:
+                progress = max(progress, round(start_pct + (end_pct - start_pct) * min(done / sections, 1), 1))
+            await self._emit(step, progress, f"{label}: {name.replace('_', ' ')} ready", ticker=True)
+
+        return _on_section
+
+    async def _build_graph(self, transcript, vision_events, entities, duration):
+        graph = build_graph(transcript, vision_events, entities, duration)
+        return graph, serialize_graph(graph)
+
+    async def _transcribe(self, audio_path: Path):
+        """Trim silence locally (VAD_ENABLED), then run ASR with timestamps in video time."""
+        if not VAD_ENABLED:
+            return await transcribe(audio_path, duration=self.probe.duration)
+        asr_audio, speech_spans, asr_duration = await trim_silence(audio_path)
+        return await transcribe(asr_audio, duration=asr_duration, speech_spans=speech_spans)
+
     def _build_results(self, transcript, graph, insights, vision_events, duration, start) -> dict:
         """Assemble the final results dict."""
         return {
             "job_id": self.job_id,
             "status": "completed",
+            "partial": "missing_sections" in self._metrics,
             "video_url": f"/api/jobs/{self.job_id}/video",
             "transcript": [asdict(s) for s in transcript],
             "graph": _graph_to_dict(graph),
             "insights": insights,
             "vision_events": [asdict(v) for v in vision_events],
             "processing_time": round(time.time() - start, 1),
+            "metrics": self._metrics,
         }
 
     def _save_results(self, results: dict) -> None:
@@ -349,14 +552,59 @@ class PipelineOrchestrator:
             "progress": progress,
             "message": message,
         }
+        self._progress = progress
         if data:
             event["data"] = data
         if ticker:
             event["ticker"] = True
+        else:
+            # Durable progress so a restarted server knows where the job stopped.
+            # Off the event loop, one write at a time (job.json is read-merge-write)
+            async with self._state_lock:
+                await asyncio.to_thread(save_job_state, self.job_dir, status=self._status.value, step=step,
+                                        progress=progress, message=message)
         await self._events.put(event)
         logger.info("[%s] %s: %s (%.0f%%)", self.job_id, step, message, progress)
 
 
+def _encode_list(items: list) -> list[dict]:
+    return [asdict(item) for item in items]
+
+
+def _decoder(cls):
+    """Build a decoder turning a list of dicts back into dataclass instances."""
+    return lambda items: [cls(**item) for item in items]
+
+
+def _reject_partial(decode):
+    """Wrap a decoder so a cached LLM answer with missing sections is recomputed."""
+    return lambda data: None if data.get("missing_sections") else decode(data)
+
+
+def _encode_media(media: tuple[Path, list[FrameInfo]]) -> dict:
+    audio_path, frames = media
+    return {"audio_path": str(audio_path), "frames": _encode_list(frames)}
+
+
+def _decode_media(data: dict) -> tuple[Path, list[FrameInfo]] | None:
+    """Rebuild extraction output, or None if the files are gone from disk."""
+    audio_path = Path(data["audio_path"])
+    frames = [FrameInfo(**f) for f in data["frames"]]
+    if not audio_path.exists() or not all(Path(f.path).exists() for f in frames):
+        return None
+    return audio_path, frames
+
+
+def _graph_from_dict(data: dict) -> KnowledgeGraph:
+    """Inverse of _graph_to_dict."""
+    return KnowledgeGraph(
+        nodes=[GraphNode(**n) for n in data["nodes"]],
+        edges=[GraphEdge(**{**e, "evidence": Evidence(**e["evidence"])}) for e in data["edges"]],
+        timeline=[TimelineSnapshot(**t) for t in data["timeline"]],
+        metadata=data["metadata"],
+    )
+
+
 def _graph_to_dict(graph: KnowledgeGraph) -> dict:
     """Convert KnowledgeGraph dataclass tree to a plain dict."""
     return {
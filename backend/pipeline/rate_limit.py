@@ -0,0 +1,415 @@
+"""Rate limiting for Mistral API calls.
+
+AdaptiveLimiter: per-job AIMD concurrency window. It grows by one for every
+window's worth of healthy responses (additive increase) and is halved when the
+server signals overload with 429/503 (multiplicative decrease). A Retry-After
+from the server pauses every caller sharing the limiter.
+
+FairScheduler: process-wide admission for all Mistral traffic across jobs.
+Requests are granted round-robin between jobs, within request-per-second and
+token-per-minute buckets, and held back by a circuit breaker while the
+upstream is failing.
+
+RetryBudget: per-job cap on retries and recovery requests across all batches.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# Server signals that we are sending too much
+OVERLOAD_STATUS_CODES = {429, 503}
+
+_DECREASE_FACTOR = 0.5
+_LATENCY_DECREASE_FACTOR = 0.9  # gentler: slow responses are a soft congestion signal
+_EWMA_ALPHA = 0.3
+_MAX_HEALTHY_ERROR_RATE = 0.1
+
+
+class AdaptiveLimiter:
+    """AIMD limiter used as ``async with limiter: ...`` around each API request.
+
+    Callers report how the request went with on_success / on_overload / on_error,
+    passing the time the request started (loop.time()) so a burst of failures
+    from requests already in flight shrinks the window once, not once per request.
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, latency_target: float,
+                 max_retry_after: float = 60.0):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.latency_target = latency_target
+        self.max_retry_after = max_retry_after
+        self._window = float(min(max(initial, min_limit), self.max_limit))
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+        self._cooldown_until = 0.0
+        self._last_decrease = float("-inf")
+        self._latency_ewma: float | None = None
+        self._error_ewma = 0.0
+        # Metrics
+        self._requests = 0
+        self._overloads = 0
+        self._errors = 0
+        self._decreases = 0
+        self._peak_window = self.limit
+        self._min_window = self.limit
+        self._cooldown_total = 0.0
+        self._started_wall = time.monotonic()
+
+    @property
+    def limit(self) -> int:
+        """Requests currently allowed in flight."""
+        return max(self.min_limit, int(self._window))
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        loop = asyncio.get_running_loop()
+        async with self._cond:
+            while True:
+                pause = self._cooldown_until - loop.time()
+                if pause > 0:
+                    # Woken early only to re-check; the cooldown may have been extended
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), pause)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self._in_flight < self.limit:
+                    break
+                await self._cond.wait()
+            self._in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, started: float, latency: float) -> None:
+        """Healthy response: grow the window while latency and error rate stay low."""
+        self._requests += 1
+        self._error_ewma *= 1 - _EWMA_ALPHA
+        self._latency_ewma = latency if self._latency_ewma is None else (
+            _EWMA_ALPHA * latency + (1 - _EWMA_ALPHA) * self._latency_ewma)
+
+        if self._latency_ewma > self.latency_target:
+            self._decrease(started, _LATENCY_DECREASE_FACTOR, "latency %.1fs" % self._latency_ewma)
+        elif self._error_ewma < _MAX_HEALTHY_ERROR_RATE and self._in_flight >= self.limit:
+            # Only grow when the window is actually in use
+            self._window = min(self.max_limit, self._window + 1 / self._window)
+            self._peak_window = max(self._peak_window, self.limit)
+
+    def on_overload(self, started: float, retry_after: float | None = None) -> None:
+        """429/503: halve the window and pause all callers for Retry-After."""
+        self._requests += 1
+        self._overloads += 1
+        self._record_error()
+        self._decrease(started, _DECREASE_FACTOR, "overload")
+        if retry_after is not None:
+            retry_after = min(retry_after, self.max_retry_after)
+            now = asyncio.get_running_loop().time()
+            until = now + retry_after
+            if until > self._cooldown_until:
+                self._cooldown_total += until - max(now, self._cooldown_until)
+                self._cooldown_until = until
+                logger.warning("Server asked to back off %.1fs (window=%d)", retry_after, self.limit)
+
+    def on_error(self) -> None:
+        """Other transient failure (5xx, timeout): counts against growth, keeps the window."""
+        self._requests += 1
+        self._errors += 1
+        self._record_error()
+
+    def _record_error(self) -> None:
+        self._error_ewma = _EWMA_ALPHA + (1 - _EWMA_ALPHA) * self._error_ewma
+
+    def _decrease(self, started: float, factor: float, reason: str) -> None:
+        if started < self._last_decrease:
+            return  # request was sent before the last cut; that cut already reacted
+        before = self.limit
+        self._window = max(float(self.min_limit), self._window * factor)
+        self._last_decrease = asyncio.get_running_loop().time()
+        self._decreases += 1
+        self._min_window = min(self._min_window, self.limit)
+        if self.limit != before:
+            logger.info("Concurrency window %d -> %d (%s)", before, self.limit, reason)
+
+    def metrics(self) -> dict:
+        """Snapshot for job metrics."""
+        return {
+            "window": self.limit,
+            "peak_window": self._peak_window,
+            "min_window": self._min_window,
+            "requests": self._requests,
+            "overloads": self._overloads,
+            "errors": self._errors,
+            "window_decreases": self._decreases,
+            "retry_after_wait_s": round(self._cooldown_total, 1),
+            "latency_ewma_s": round(self._latency_ewma, 2) if self._latency_ewma is not None else None,
+            "elapsed_s": round(time.monotonic() - self._started_wall, 1),
+        }
+
+
+class RetryBudget:
+    """Extra calls a job may spend beyond each request's first attempt.
+
+    Shared by all of a job's batches, so retries and recovery requests stay
+    bounded when the upstream keeps failing, instead of multiplying with the
+    number of batches.
+    """
+
+    def __init__(self, calls: int):
+        self.calls = calls
+        self.spent = 0
+        self.denied = 0
+
+    def take(self) -> bool:
+        """Spend one call if any are left."""
+        if self.spent >= self.calls:
+            self.denied += 1
+            return False
+        self.spent += 1
+        return True
+
+    def metrics(self) -> dict:
+        return {"budget": self.calls, "spent": self.spent, "denied": self.denied}
+
+
+class TokenBucket:
+    """Continuously refilling bucket: `rate` tokens per second, up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        if self.rate <= 0:
+            return 0.0  # unlimited
+        self._refill(now)
+        # A request larger than the bucket waits for a full bucket, never forever
+        missing = min(amount, self.capacity) - self._tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self._tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        """Return over-reserved tokens (negative amount charges extra usage)."""
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive upstream failures -> half-open probe.
+
+    While open nothing is sent. After the cooldown a single probe request goes
+    through; success closes the circuit, failure re-opens it with the cooldown
+    doubled (up to max_cooldown).
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float, max_cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = "closed"
+        self.trips = 0
+        self._failures = 0
+        self._cooldown = cooldown
+        self._retry_at = 0.0
+        self._probe_in_flight = False
+
+    def delay(self, now: float) -> float:
+        """Seconds until a request may be sent; inf while a probe is pending."""
+        if self.state == "closed":
+            return 0.0
+        if self.state == "open":
+            if now < self._retry_at:
+                return self._retry_at - now
+            self.state = "half_open"
+        return math.inf if self._probe_in_flight else 0.0
+
+    def on_dispatch(self) -> None:
+        if self.state == "half_open":
+            self._probe_in_flight = True
+
+    def on_result(self, ok: bool | None, now: float) -> None:
+        """Record an outcome: True success, False upstream failure, None no verdict."""
+        was_probe = self._probe_in_flight
+        self._probe_in_flight = False
+        if ok is None:
+            return
+        if ok:
+            if self.state != "closed":
+                logger.info("Mistral circuit closed: upstream recovered")
+            self.state = "closed"
+            self._failures = 0
+            self._cooldown = self.base_cooldown
+            return
+
+        self._failures += 1
+        if self.state == "half_open" and was_probe:
+            self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+            self._open(now)
+        elif self.state == "closed" and self._failures >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = "open"
+        self.trips += 1
+        self._retry_at = now + self._cooldown
+        logger.warning("Mistral circuit open after %d consecutive failures; pausing all jobs for %.1fs",
+                       self._failures, self._cooldown)
+
+
+@dataclass
+class Permit:
+    """Grant for one request; returned to the scheduler with its outcome."""
+    job: str
+    tokens: int
+    enqueued: float
+    granted: float = 0.0
+
+
+@dataclass
+class _JobStats:
+    requests: int = 0
+    tokens: int = 0
+    queued_s: float = 0.0
+    waiting: deque = field(default_factory=deque)
+
+
+class FairScheduler:
+    """Process-wide admission control shared by every job.
+
+    Each job has its own FIFO; the scheduler serves jobs round-robin, so one
+    job with hundreds of vision batches cannot starve another job's ASR or
+    reasoning calls. Bound to the event loop it was created in.
+    """
+
+    def __init__(self, rps: float, tpm: float, breaker: CircuitBreaker, max_wait: float):
+        self._rps = TokenBucket(rps, max(1.0, rps))
+        self._tpm = TokenBucket(tpm / 60, tpm)
+        self.breaker = breaker
+        self.max_wait = max_wait
+        self._jobs: OrderedDict[str, _JobStats] = OrderedDict()
+        self._paused_until = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop = asyncio.get_running_loop()
+
+    async def acquire(self, job: str, tokens: int) -> Permit:
+        """Wait for this job's turn and for rate/circuit capacity."""
+        permit = Permit(job, tokens, self._loop.time())
+        fut = self._loop.create_future()
+        stats = self._jobs.setdefault(job, _JobStats())
+        stats.waiting.append((fut, permit))
+        self._pump()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Granted just before the cancellation landed: the caller never gets
+            # the permit, so hand it back (a lost probe would pin the circuit open)
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                self.release(permit, None, used_tokens=0)
+            raise
+        return permit
+
+    def release(self, permit: Permit, ok: bool | None, used_tokens: int | None = None,
+                retry_after: float | None = None) -> None:
+        """Report the outcome of a granted request.
+
+        Args:
+            ok: True success, False upstream failure (5xx/timeout), None no verdict.
+            used_tokens: Actual usage; the reservation difference is refunded.
+            retry_after: Server back-off (429), applied to all jobs.
+        """
+        now = self._loop.time()
+        self.breaker.on_result(ok, now)
+        if used_tokens is not None:
+            self._tpm.refund(permit.tokens - used_tokens)
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        self._pump()
+
+    def job_metrics(self, job: str) -> dict:
+        """Stats of a finished job, forgotten unless it still has requests queued."""
+        stats = self._jobs.get(job) or _JobStats()
+        if not stats.waiting:
+            self._jobs.pop(job, None)
+        return {
+            "requests": stats.requests,
+            "tokens_reserved": stats.tokens,
+            "queued_s": round(stats.queued_s, 1),
+            "circuit_state": self.breaker.state,
+            "circuit_trips": self.breaker.trips,
+        }
+
+    def _pump(self) -> None:
+        """Grant as many waiting requests as capacity allows, round-robin by job."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = self._loop.time()
+
+        while True:
+            job, head = self._next_waiter()
+            if head is None:
+                return
+            fut, permit = head
+            wait = max(self.breaker.delay(now), self._paused_until - now)
+            if wait > 0:
+                if self.breaker.state != "closed":
+                    wait = min(wait, self._expire_waiters(now))
+                if math.isfinite(wait):
+                    self._timer = self._loop.call_later(wait, self._pump)
+                return
+            wait = max(self._rps.delay(1, now), self._tpm.delay(permit.tokens, now))
+            if wait > 0:
+                self._timer = self._loop.call_later(wait, self._pump)
+                return
+
+            self._rps.take(1, now)
+            self._tpm.take(permit.tokens, now)
+            self.breaker.on_dispatch()
+            stats = self._jobs[job]
+            stats.waiting.popleft()
+            stats.requests += 1
+            stats.tokens += permit.tokens
+            stats.queued_s += now - permit.enqueued
+            permit.granted = now
+            self._jobs.move_to_end(job)  # next job's turn
+            fut.set_result(None)
+
+    def _next_waiter(self):
+        """First live waiter in round-robin order, dropping cancelled ones."""
+        for job, stats in self._jobs.items():
+            while stats.waiting and stats.waiting[0][0].done():
+                stats.waiting.popleft()
+            if stats.waiting:
+                return job, stats.waiting[0]
+        return None, None
+
+    def _expire_waiters(self, now: float) -> float:
+        """Fail requests that waited max_wait on an open circuit; return time to next expiry."""
+        next_expiry = math.inf
+        for stats in self._jobs.values():
+            for fut, permit in list(stats.waiting):
+                remaining = permit.enqueued + self.max_wait - now
+                if remaining <= 0 and not fut.done():
+                    fut.set_exception(RuntimeError(
+                        f"Mistral API unavailable: circuit open for over {self.max_wait:.0f}s"))
+                elif not fut.done():
+                    next_expiry = min(next_expiry, remaining)
+        return next_expiry
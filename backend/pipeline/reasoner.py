@@ -7,18 +7,17 @@ Pass B: Insight extraction from serialized knowledge graph (reasoning).
 import json
 import logging
 import re
+from collections.abc import Awaitable, Callable
 
-import httpx
-
-from backend.config import MISTRAL_API_KEY, MISTRAL_BASE_URL, MODEL_REASONING
+from backend.config import MODEL_REASONING
 from backend.models import TranscriptSegment, ExtractedEntities
+from backend.pipeline.json_stream import JsonStreamParser
+from backend.pipeline.mistral_client import chat_completion
 from backend.prompts.state_reasoning import PASS_A_PROMPT
 from backend.prompts.insight_extraction import PASS_B_PROMPT
 
 logger = logging.getLogger(__name__)
 
-CHAT_URL = f"{MISTRAL_BASE_URL}/chat/completions"
-
 
 def _clean_json(raw: str) -> str:
     """Strip code fences and fix common LLM JSON issues."""
@@ -32,11 +31,24 @@ def _clean_json(raw: str) -> str:
     return text
 
 
-async def _call_mistral(prompt: str, system: str = "", max_tokens: int = 4096, retries: int = 2) -> dict:
+async def _call_mistral(
+    prompt: str,
+    system: str = "",
+    max_tokens: int = 4096,
+    retries: int = 2,
+    on_section: Callable[[str], Awaitable[None]] | None = None,
+) -> tuple[dict, bool]:
     """Make a chat completion call to Mistral Small with JSON output.
 
     Retries on JSON parse failures (typically truncated output) with
-    increased max_tokens on each attempt.
+    increased max_tokens on each attempt. The answer is parsed as it streams
+    in: on_section is awaited with the name of each top-level section once it
+    is complete, and if every attempt fails to parse, the most complete set of
+    finished sections is returned instead of raising.
+
+    Returns:
+        (result, complete): complete is False when result only holds the
+        sections salvaged from an unparseable answer.
     """
     messages = []
     if system:
@@ -44,36 +56,42 @@ async def _call_mistral(prompt: str, system: str = "", max_tokens: int = 4096, r
     messages.append({"role": "user", "content": prompt})
 
     current_max_tokens = max_tokens
+    salvaged: dict = {}
 
     for attempt in range(retries + 1):
-        async with httpx.AsyncClient(timeout=120) as client:
-            resp = await client.post(
-                CHAT_URL,
-                headers={
-                    "Authorization": f"Bearer {MISTRAL_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": MODEL_REASONING,
-                    "messages": messages,
-                    "response_format": {"type": "json_object"},
-                    "max_tokens": current_max_tokens,
-                    "temperature": 0.1,
-                },
-            )
-
+        parser = JsonStreamParser()
+
+        async def _on_content(text: str) -> None:
+            for kind, key, _ in parser.feed(text):
+                if kind == "section" and on_section is not None:
+                    await on_section(key)
+
+        completion = await chat_completion(
+            {
+                "model": MODEL_REASONING,
+                "messages": messages,
+                "response_format": {"type": "json_object"},
+                "max_tokens": current_max_tokens,
+                "temperature": 0.1,
+            },
+            _on_content,
+        )
+
+        resp = completion.response
         if resp.status_code != 200:
             raise RuntimeError(f"Mistral API error ({resp.status_code}): {resp.text[:500]}")
 
-        content = resp.json()["choices"][0]["message"]["content"]
-        finish_reason = resp.json()["choices"][0].get("finish_reason", "")
+        content = completion.content
+        finish_reason = completion.finish_reason
+        if len(parser.sections) > len(salvaged):
+            salvaged = parser.sections
 
         try:
-            return json.loads(content)
+            return json.loads(content), True
         except json.JSONDecodeError:
             cleaned = _clean_json(content)
             try:
-                return json.loads(cleaned)
+                return json.loads(cleaned), True
             except json.JSONDecodeError:
                 if attempt < retries:
                     # Likely truncated — increase token budget and retry
@@ -84,30 +102,37 @@ async def _call_mistral(prompt: str, system: str = "", max_tokens: int = 4096, r
                         attempt + 1, retries + 1, finish_reason, current_max_tokens,
                     )
                     continue
+                if salvaged:
+                    logger.warning("Failed to parse LLM JSON after %d attempts, keeping %d finished sections: %s",
+                                   retries + 1, len(salvaged), ", ".join(salvaged))
+                    return salvaged, False
                 logger.error("Failed to parse LLM JSON after %d attempts (first 500 chars): %s",
                              retries + 1, content[:500])
                 raise
 
 
-async def extract_entities(transcript: list[TranscriptSegment]) -> ExtractedEntities:
+async def extract_entities(
+    transcript: list[TranscriptSegment],
+    on_section: Callable[[str], Awaitable[None]] | None = None,
+) -> ExtractedEntities:
     """Pass A: Extract speakers, topics, claims, KPIs from transcript.
 
     Runs as soon as transcript is available, in parallel with vision analysis.
+    on_section is awaited with each section name (speakers, topics, ...) as
+    soon as the model has finished it. Sections lost to an unparseable answer
+    are listed in missing_sections.
     """
     # Format transcript for the prompt
     transcript_text = _format_transcript(transcript)
     prompt = PASS_A_PROMPT.format(transcript=transcript_text)
 
     logger.info("Pass A: Extracting entities from %d transcript segments", len(transcript))
-    result = await _call_mistral(prompt, max_tokens=8192)
+    result, complete = await _call_mistral(prompt, max_tokens=8192, on_section=on_section)
 
+    sections = ["speakers", "topics", "claims", "kpis", "decisions_raw", "action_items_raw"]
     entities = ExtractedEntities(
-        speakers=result.get("speakers", []),
-        topics=result.get("topics", []),
-        claims=result.get("claims", []),
-        kpis=result.get("kpis", []),
-        decisions_raw=result.get("decisions_raw", []),
-        action_items_raw=result.get("action_items_raw", []),
+        **{name: result.get(name, []) for name in sections},
+        missing_sections=[] if complete else [name for name in sections if name not in result],
     )
 
     logger.info("Pass A complete: %d speakers, %d topics, %d claims, %d KPIs",
@@ -116,19 +141,26 @@ async def extract_entities(transcript: list[TranscriptSegment]) -> ExtractedEnti
     return entities
 
 
-async def extract_insights(serialized_graph: str) -> dict:
+async def extract_insights(
+    serialized_graph: str,
+    on_section: Callable[[str], Awaitable[None]] | None = None,
+) -> dict:
     """Pass B: Extract insights with evidence chains from serialized knowledge graph.
 
     Takes the compact graph representation (~3.5k tokens) instead of raw transcript
     (~40k tokens). This is 91% more token-efficient with better accuracy.
+    on_section is awaited with each section name as soon as it is finished.
+    Sections lost to an unparseable answer are listed under "missing_sections"
+    and filled with empty defaults.
     """
     prompt = PASS_B_PROMPT.format(graph=serialized_graph)
 
     logger.info("Pass B: Extracting insights from serialized graph (%d chars)", len(serialized_graph))
-    result = await _call_mistral(prompt, max_tokens=6000)
+    result, complete = await _call_mistral(prompt, max_tokens=6000, on_section=on_section)
 
     # Validate expected fields
     expected = ["summary", "topics", "action_items", "decisions", "contradictions", "kpis", "key_quotes"]
+    result["missing_sections"] = [] if complete else [field for field in expected if field not in result]
     for field in expected:
         if field not in result:
             result[field] = [] if field != "summary" else "No summary available."
@@ -0,0 +1,67 @@
+"""Per-stage artifact cache stored under each job directory.
+
+Every stage output is saved with a key derived from its inputs (upstream stage
+keys, model names, prompt versions, tuning constants). Re-running a job only
+recomputes stages whose key changed; everything upstream is served from disk.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+STAGES_DIRNAME = "stages"
+
+
+def stage_key(*parts: Any) -> str:
+    """Stable short hash over the given inputs."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file, read in 1 MB chunks. Runs in a thread."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def prompt_version(prompt: str) -> str:
+    """Version tag for a prompt template: changes whenever its text changes."""
+    return hashlib.sha256(prompt.encode()).hexdigest()[:12]
+
+
+class StageCache:
+    """JSON files of the form {"key": ..., "value": ...}, one per stage."""
+
+    def __init__(self, job_dir: Path):
+        self.dir = job_dir / STAGES_DIRNAME
+
+    def _path(self, stage: str) -> Path:
+        return self.dir / f"{stage}.json"
+
+    def load(self, stage: str, key: str) -> Any | None:
+        """Return the cached value if it was produced under the same key."""
+        try:
+            with open(self._path(stage)) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if entry.get("key") != key:
+            logger.info("Stage %s invalidated (key %s -> %s)", stage, entry.get("key"), key)
+            return None
+        return entry.get("value")
+
+    def save(self, stage: str, key: str, value: Any) -> None:
+        """Write atomically so an interrupted write never leaves a corrupt entry."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(stage)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "value": value}, f, default=str)
+        tmp_path.replace(path)
@@ -1,49 +1,99 @@
 """Transcribe audio using Voxtral API with speaker diarization."""
 
+import asyncio
 import json
 import logging
+import re
+import shutil
 from pathlib import Path
 
-import httpx
-
-from backend.config import MISTRAL_API_KEY, MISTRAL_BASE_URL, MODEL_ASR
+from backend.config import (
+    MODEL_ASR, AUDIO_ENCODE_FORMAT,
+    ASR_CHUNK_SECONDS, ASR_CHUNK_OVERLAP, ASR_CONCURRENCY, ASR_CHUNKING_MIN_DURATION,
+)
 from backend.models import TranscriptSegment
+from backend.pipeline.audio_extractor import _AUDIO_ENCODINGS
+from backend.pipeline.frame_extractor import _get_video_duration
+from backend.pipeline.mistral_client import TRANSCRIPTION_URL, ASR_TIMEOUT, post
+from backend.pipeline.voice_activity import SpeechSpans, remap_segments
 
 logger = logging.getLogger(__name__)
 
-TRANSCRIPTION_URL = f"{MISTRAL_BASE_URL}/audio/transcriptions"
+_AUDIO_MIME_TYPES = {
+    ".wav": "audio/wav",
+    ".flac": "audio/flac",
+    ".ogg": "audio/ogg",
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+}
 
 
-async def transcribe(audio_path: Path) -> list[TranscriptSegment]:
+async def transcribe(
+    audio_path: Path,
+    duration: float | None = None,
+    speech_spans: SpeechSpans | None = None,
+) -> list[TranscriptSegment]:
     """Send audio to Voxtral for transcription with speaker diarization.
 
+    Recordings longer than ASR_CHUNKING_MIN_DURATION are split into
+    overlapping windows transcribed concurrently (see _transcribe_chunked).
+
     Args:
-        audio_path: Path to WAV file.
+        audio_path: Path to the extracted audio file (WAV, FLAC, Opus, ...).
+        duration: Audio duration in seconds, probed when not provided.
+        speech_spans: Span map from trim_silence when audio_path is a
+            silence-trimmed file; timestamps are mapped back to video time.
 
     Returns:
         List of transcript segments with speaker, text, and timestamps.
     """
-    logger.info("Transcribing %s with %s", audio_path.name, MODEL_ASR)
-
-    async with httpx.AsyncClient(timeout=300) as client:
-        with open(audio_path, "rb") as f:
-            resp = await client.post(
-                TRANSCRIPTION_URL,
-                headers={"Authorization": f"Bearer {MISTRAL_API_KEY}"},
-                files={"file": (audio_path.name, f, "audio/wav")},
-                data={
-                    "model": MODEL_ASR,
-                    "response_format": "verbose_json",
-                    "timestamp_granularities[]": "segment",
-                    "diarize": "true",
-                },
-            )
+    if duration is None:
+        duration = await _get_video_duration(audio_path)
+
+    if duration is not None and duration > ASR_CHUNKING_MIN_DURATION:
+        segments = await _transcribe_chunked(audio_path, duration)
+    else:
+        data = await _request_transcription(audio_path)
+        segments = _parse_segments(data)
+
+    if speech_spans:
+        segments = remap_segments(segments, speech_spans)
+
+    # Merge consecutive segments from same speaker if they're close together
+    merged = _merge_consecutive(segments)
+    logger.info("Transcription complete: %d segments", len(merged))
+    return merged
+
+
+async def _request_transcription(audio_path: Path) -> dict:
+    """POST one audio file to the Voxtral transcription endpoint and return the JSON body."""
+    logger.info("Transcribing %s (%.1f MB) with %s",
+                audio_path.name, audio_path.stat().st_size / 1e6, MODEL_ASR)
+    mime_type = _AUDIO_MIME_TYPES.get(audio_path.suffix.lower(), "application/octet-stream")
+
+    with open(audio_path, "rb") as f:
+        resp = await post(
+            TRANSCRIPTION_URL,
+            files={"file": (audio_path.name, f, mime_type)},
+            data={
+                "model": MODEL_ASR,
+                "response_format": "verbose_json",
+                "timestamp_granularities[]": "segment",
+                "diarize": "true",
+            },
+            timeout=ASR_TIMEOUT,
+        )
 
     if resp.status_code != 200:
         raise RuntimeError(f"Voxtral transcription failed ({resp.status_code}): {resp.text[:500]}")
 
     data = resp.json()
     logger.debug("Voxtral raw response: %s", json.dumps(data, indent=2)[:2000])
+    return data
+
+
+def _parse_segments(data: dict, offset: float = 0.0) -> list[TranscriptSegment]:
+    """Convert a Voxtral response into transcript segments shifted by offset seconds."""
     segments: list[TranscriptSegment] = []
 
     # Voxtral returns segments with speaker labels when diarization is available
@@ -56,8 +106,8 @@ async def transcribe(audio_path: Path) -> list[TranscriptSegment]:
             segments.append(TranscriptSegment(
                 speaker="Speaker A",
                 text=text.strip(),
-                start=0.0,
-                end=data.get("duration", 0.0),
+                start=offset,
+                end=offset + data.get("duration", 0.0),
             ))
         return segments
 
@@ -73,14 +123,151 @@ async def transcribe(audio_path: Path) -> list[TranscriptSegment]:
         segments.append(TranscriptSegment(
             speaker=speaker,
             text=seg.get("text", "").strip(),
-            start=seg.get("start", 0.0),
-            end=seg.get("end", 0.0),
+            start=offset + seg.get("start", 0.0),
+            end=offset + seg.get("end", 0.0),
         ))
 
-    # Merge consecutive segments from same speaker if they're close together
-    merged = _merge_consecutive(segments)
-    logger.info("Transcription complete: %d segments", len(merged))
-    return merged
+    return segments
+
+
+def _plan_chunks(duration: float) -> list[tuple[float, float]]:
+    """Split [0, duration) into ASR_CHUNK_SECONDS windows overlapping by ASR_CHUNK_OVERLAP."""
+    step = ASR_CHUNK_SECONDS - ASR_CHUNK_OVERLAP
+    chunks = []
+    start = 0.0
+    while True:
+        end = min(start + ASR_CHUNK_SECONDS, duration)
+        chunks.append((start, end))
+        if end >= duration:
+            return chunks
+        start += step
+
+
+async def _cut_chunk(audio_path: Path, chunk_path: Path, start: float, end: float) -> None:
+    """Cut [start, end) out of the audio track, re-encoded for sample-accurate boundaries."""
+    codec_args, _ = _AUDIO_ENCODINGS[AUDIO_ENCODE_FORMAT]
+    cmd = [
+        "ffmpeg", "-y",
+        "-ss", f"{start:.3f}",
+        "-i", str(audio_path),
+        "-t", f"{end - start:.3f}",
+        "-vn", *codec_args,
+        str(chunk_path),
+    ]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"FFmpeg audio chunking failed: {stderr.decode()[-500:]}")
+
+
+async def _transcribe_chunked(audio_path: Path, duration: float) -> list[TranscriptSegment]:
+    """Transcribe overlapping windows concurrently and stitch them back together.
+
+    Each chunk keeps only the segments centred in its own half of the overlap,
+    so the overlap regions are not duplicated. Diarization labels are local to
+    each request, so every chunk's labels are mapped onto the running
+    transcript's labels using the speech they share in the overlap.
+    """
+    chunks = _plan_chunks(duration)
+    chunks_dir = audio_path.parent / "asr_chunks"
+    chunks_dir.mkdir(exist_ok=True)
+    _, suffix = _AUDIO_ENCODINGS[AUDIO_ENCODE_FORMAT]
+
+    logger.info("Chunked transcription: %.0fs audio in %d chunks (%ds, overlap %ds, concurrency=%d)",
+                duration, len(chunks), ASR_CHUNK_SECONDS, ASR_CHUNK_OVERLAP, ASR_CONCURRENCY)
+
+    semaphore = asyncio.Semaphore(ASR_CONCURRENCY)
+
+    async def _process_chunk(i: int, start: float, end: float) -> list[TranscriptSegment]:
+        chunk_path = chunks_dir / f"chunk_{i:03d}{suffix}"
+        async with semaphore:
+            await _cut_chunk(audio_path, chunk_path, start, end)
+            data = await _request_transcription(chunk_path)
+        return _parse_segments(data, offset=start)
+
+    try:
+        chunk_segments = await asyncio.gather(*(
+            _process_chunk(i, start, end) for i, (start, end) in enumerate(chunks)
+        ))
+    finally:
+        shutil.rmtree(chunks_dir, ignore_errors=True)
+
+    stitched: list[TranscriptSegment] = []
+    previous: list[TranscriptSegment] = []
+    half_overlap = ASR_CHUNK_OVERLAP / 2
+    for i, ((start, end), segments) in enumerate(zip(chunks, chunk_segments)):
+        if i > 0:
+            overlap = (start, chunks[i - 1][1])
+            used = {s.speaker for s in stitched} | {s.speaker for s in previous}
+            label_map = _reconcile_speakers(previous, segments, overlap, used)
+            segments = [
+                TranscriptSegment(speaker=label_map.get(s.speaker, s.speaker),
+                                  text=s.text, start=s.start, end=s.end)
+                for s in segments
+            ]
+        previous = segments
+
+        own_start = start + half_overlap if i > 0 else float("-inf")
+        own_end = end - half_overlap if i < len(chunks) - 1 else float("inf")
+        stitched.extend(
+            s for s in segments if own_start <= (s.start + s.end) / 2 < own_end
+        )
+
+    return stitched
+
+
+def _reconcile_speakers(
+    previous: list[TranscriptSegment],
+    current: list[TranscriptSegment],
+    overlap: tuple[float, float],
+    used: set[str],
+) -> dict[str, str]:
+    """Map the current chunk's speaker labels onto labels already in the transcript.
+
+    Pairs of labels are scored by how long they speak at the same time inside
+    the overlap window and matched greedily. Labels with no counterpart get a
+    fresh label so two different people never share a name.
+    """
+    lo, hi = overlap
+    shared: dict[tuple[str, str], float] = {}
+    for cur in current:
+        for prev in previous:
+            if prev.end <= lo:
+                continue
+            both = min(cur.end, prev.end, hi) - max(cur.start, prev.start, lo)
+            if both > 0:
+                key = (cur.speaker, prev.speaker)
+                shared[key] = shared.get(key, 0.0) + both
+
+    label_map: dict[str, str] = {}
+    taken: set[str] = set()
+    for (cur_label, prev_label), _ in sorted(shared.items(), key=lambda kv: kv[1], reverse=True):
+        if cur_label not in label_map and prev_label not in taken:
+            label_map[cur_label] = prev_label
+            taken.add(prev_label)
+
+    used = set(used)
+    for seg in current:
+        if seg.speaker in label_map:
+            continue
+        if seg.speaker not in used:
+            label_map[seg.speaker] = seg.speaker
+        else:
+            label_map[seg.speaker] = _fresh_speaker_label(used)
+        used.add(label_map[seg.speaker])
+
+    return label_map
+
+
+def _fresh_speaker_label(used: set[str]) -> str:
+    """Next unused "speaker_N" label (N continues the highest existing number)."""
+    numbers = [int(m.group(1)) for label in used if (m := re.search(r"(\d+)$", label))]
+    n = max(numbers, default=0) + 1
+    while f"speaker_{n}" in used:
+        n += 1
+    return f"speaker_{n}"
 
 
 def _merge_consecutive(segments: list[TranscriptSegment], gap_threshold: float = 1.0) -> list[TranscriptSegment]:
@@ -2,140 +2,495 @@
 
 import asyncio
 import base64
-import io
 import json
 import logging
+import math
+import random
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, replace
 
 import httpx
 from PIL import Image
 
 from backend.config import (
-    MISTRAL_API_KEY, MISTRAL_BASE_URL, MODEL_VISION,
-    MAX_FRAMES_PER_BATCH, FRAME_MAX_WIDTH,
-    VISION_CONCURRENCY, VISION_MAX_RETRIES, VISION_RETRY_BASE_DELAY,
+    MODEL_VISION, MAX_FRAMES_PER_BATCH,
+    VISION_CONCURRENCY, VISION_CONCURRENCY_MIN, VISION_CONCURRENCY_MAX, VISION_LATENCY_TARGET,
+    VISION_MAX_RETRIES, VISION_RETRY_BASE_DELAY, VISION_RETRY_AFTER_MAX, VISION_RETRY_BUDGET,
+    VISION_CACHE_ENABLED, VISION_CACHE_MATCH, PREFILTER_ENABLED, VISION_MOSAIC_ENABLED,
 )
 from backend.models import FrameInfo, VisionEvent
+from backend.pipeline.frame_cache import FrameCache
+from backend.pipeline.frame_encoder import encode_frame
+from backend.pipeline.frame_mosaic import BatchPacker, Slot, build_mosaic, tile_position
+from backend.pipeline.frame_prefilter import FramePrefilter, is_low_detail
+from backend.pipeline.json_stream import JsonStreamParser
+from backend.pipeline.mistral_client import chat_completion, retry_after
+from backend.pipeline.phash import hash_files
+from backend.pipeline.rate_limit import AdaptiveLimiter, RetryBudget, OVERLOAD_STATUS_CODES
+from backend.pipeline.vision_cache import VisionResultCache, frame_key, get_vision_cache
 from backend.prompts.vision_analysis import VISION_PROMPT
 
 logger = logging.getLogger(__name__)
 
-CHAT_URL = f"{MISTRAL_BASE_URL}/chat/completions"
-
 # Status codes that are safe to retry
 _RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
 
 
-def _resize_and_encode(frame_path: str) -> str:
-    """Resize frame to max width and encode as base64 JPEG."""
-    with Image.open(frame_path) as img:
-        if img.width > FRAME_MAX_WIDTH:
-            ratio = FRAME_MAX_WIDTH / img.width
-            img = img.resize((FRAME_MAX_WIDTH, int(img.height * ratio)), Image.LANCZOS)
+def _resize_and_encode(frame_path: str, cache: FrameCache | None = None) -> str:
+    """Encode a frame within its byte budget and return it as a base64 data URL.
+
+    Encoded once per job, from the pixels dedup decoded when the frame cache
+    still holds them; retries and re-requests reuse the payload.
+    CPU-bound: runs in a worker thread.
+    """
+    if cache is not None:
+        payload, mime_type = cache.get_or_encode(frame_path)
+    else:
+        with Image.open(frame_path) as img:
+            payload, mime_type = encode_frame(img)
+    return f"data:{mime_type};base64,{base64.b64encode(payload).decode()}"
 
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=85)
-    return base64.b64encode(buf.getvalue()).decode()
 
+def _encode_slot(slot: Slot, first_number: int, cache: FrameCache | None = None) -> str:
+    """Encode one image of a request: a single frame, or a mosaic of low-detail frames.
+
+    CPU-bound: runs in a worker thread.
+    """
+    if len(slot) == 1:
+        return _resize_and_encode(slot[0].path, cache)
+    payload, mime_type = encode_frame(build_mosaic(slot, first_number))
+    return f"data:{mime_type};base64,{base64.b64encode(payload).decode()}"
 
-async def analyze_frames(frames: list[FrameInfo]) -> list[VisionEvent]:
-    """Analyze frames in concurrent batches using Pixtral Large.
 
-    Builds all batches upfront, then launches them in parallel limited by
-    a semaphore (VISION_CONCURRENCY). Each batch includes retry logic with
-    exponential backoff for transient errors (429/5xx).
+async def analyze_frames(
+    frames: list[FrameInfo],
+    cache: FrameCache | None = None,
+    metrics: dict | None = None,
+    on_progress: Callable[[int], Awaitable[None]] | None = None,
+) -> list[VisionEvent]:
+    """Analyze a complete list of frames (see analyze_frame_stream).
 
     Args:
         frames: List of unique frames to analyze.
+        cache: Job frame cache holding the pixels dedup decoded; payloads are
+            encoded from them on first send and reused.
+        metrics: Job metrics dict (see analyze_frame_stream).
+        on_progress: Progress callback (see analyze_frame_stream).
 
     Returns:
-        List of VisionEvent per frame with extracted visual information,
-        in chronological order.
+        List of VisionEvent per frame, in chronological order.
     """
     if not frames:
         return []
+    source: asyncio.Queue[FrameInfo | None] = asyncio.Queue()
+    for frame in frames:
+        source.put_nowait(frame)
+    source.put_nowait(None)
+    return await analyze_frame_stream(source, cache, metrics, on_progress)
+
+
+async def analyze_frame_stream(
+    source: asyncio.Queue[FrameInfo | None],
+    cache: FrameCache | None = None,
+    metrics: dict | None = None,
+    on_progress: Callable[[int], Awaitable[None]] | None = None,
+) -> list[VisionEvent]:
+    """Analyze frames from a queue in concurrent batches using Pixtral Large.
+
+    Consumes unique frames as dedup emits them; None ends the stream. A batch
+    is sent as soon as MAX_FRAMES_PER_BATCH frames are pending and the rest is
+    flushed at end of stream, so API latency overlaps local decoding and
+    hashing instead of following it.
+
+    Each frame first goes through the local prefilter (PREFILTER_ENABLED):
+    static camera shots and blurred transitions get a lightweight event and
+    are never sent. Frames found in the cross-job vision cache
+    (VISION_CACHE_ENABLED) become events without an API call; only the misses
+    are batched and sent, and their results are added to the cache. With
+    VISION_MOSAIC_ENABLED, low-detail frames share image slots as labeled
+    grids (frame_mosaic), so a batch can hold more than MAX_FRAMES_PER_BATCH
+    frames.
+
+    Requests in flight are bounded by an adaptive window (AIMD, see rate_limit)
+    that starts at VISION_CONCURRENCY, grows while responses are fast and
+    healthy, and is halved on 429/503. Each batch retries transient errors
+    (429/5xx), waiting for the server's Retry-After when given, else
+    exponential backoff. A batch that still fails is split in halves, and
+    frames missing from an answer are re-requested; retries and recovery
+    share the job's VISION_RETRY_BUDGET. Answers are streamed
+    (MISTRAL_STREAMING): each frame's result counts as analyzed as soon as its
+    entry is complete, and a truncated answer keeps its finished entries.
 
-    # Build all batches upfront
-    batches: list[tuple[int, list[FrameInfo]]] = []
-    for batch_start in range(0, len(frames), MAX_FRAMES_PER_BATCH):
-        batch = frames[batch_start:batch_start + MAX_FRAMES_PER_BATCH]
-        batches.append((batch_start, batch))
-
-    total_batches = len(batches)
-    logger.info("Vision analysis: %d frames in %d batches (concurrency=%d)",
-                len(frames), total_batches, VISION_CONCURRENCY)
-
-    semaphore = asyncio.Semaphore(VISION_CONCURRENCY)
-
-    async def _process_batch(batch_idx: int, batch_start: int, batch: list[FrameInfo]) -> list[VisionEvent]:
-        async with semaphore:
-            logger.info("Batch %d/%d starting (%d frames, offset %d)",
-                        batch_idx + 1, total_batches, len(batch), batch_start)
-            events = await _analyze_batch_with_retry(batch)
-            logger.info("Batch %d/%d complete: %d events",
-                        batch_idx + 1, total_batches, len(events))
-            return events
-
-    # Launch all batches concurrently (semaphore limits parallelism)
-    tasks = [
-        _process_batch(i, batch_start, batch)
-        for i, (batch_start, batch) in enumerate(batches)
-    ]
-    batch_results = await asyncio.gather(*tasks)
+    Args:
+        source: Queue of unique frames, terminated by None.
+        cache: Job frame cache holding the pixels dedup decoded; payloads are
+            encoded from them on first send and reused.
+        metrics: Job metrics dict; the limiter's stats are stored under
+            "vision", cache hit rate under "vision_cache", prefilter routing
+            and API calls avoided under "prefilter", mosaic packing under
+            "mosaic", retry budget and recovery under "vision_recovery".
+        on_progress: Awaited with the number of frames analyzed so far
+            (including cache hits and skipped frames) as results arrive.
+
+    Returns:
+        List of VisionEvent per frame with extracted visual information,
+        in chronological order.
+    """
+    limiter = AdaptiveLimiter(
+        initial=VISION_CONCURRENCY,
+        min_limit=VISION_CONCURRENCY_MIN,
+        max_limit=VISION_CONCURRENCY_MAX,
+        latency_target=VISION_LATENCY_TARGET,
+        max_retry_after=VISION_RETRY_AFTER_MAX,
+    )
+    vision_cache = get_vision_cache() if VISION_CACHE_ENABLED else None
+    if vision_cache is not None:
+        await asyncio.to_thread(vision_cache.load)
+
+    prefilter = FramePrefilter(cache) if PREFILTER_ENABLED else None
+    packer = BatchPacker()
+    mosaic_stats = {"mosaics": 0, "tiled_frames": 0}
+    budget = RetryBudget(VISION_RETRY_BUDGET)
+    recovery = {"splits": 0, "rerequested_frames": 0, "recovered_frames": 0, "lost_frames": 0}
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first_result: float | None = None
+    analyzed: set[str] = set()
+
+    skipped_events: list[VisionEvent] = []
+    cached_events: list[VisionEvent] = []
+    misses: list[FrameInfo] = []
+    miss_keys: list[str | None] = []
+    tasks: list[asyncio.Task[list[VisionEvent]]] = []
+
+    async def _on_frame(frame: FrameInfo) -> None:
+        nonlocal first_result
+        if first_result is None:
+            first_result = loop.time() - started
+        if frame.path not in analyzed:
+            analyzed.add(frame.path)
+            if on_progress is not None:
+                await on_progress(len(analyzed) + len(cached_events) + len(skipped_events))
+
+    async def _process_batch(batch_no: int, batch: list[Slot]) -> list[VisionEvent]:
+        logger.info("Batch %d starting (%d frames in %d images, from %.1fs)",
+                    batch_no, sum(len(slot) for slot in batch), len(batch), batch[0][0].timestamp)
+        events = await _analyze_batch_with_recovery(batch, limiter, cache, budget, recovery, _on_frame)
+        logger.info("Batch %d complete: %d events (window=%d)", batch_no, len(events), limiter.limit)
+        return events
+
+    def _dispatch(batch: list[Slot]) -> None:
+        for slot in batch:
+            if len(slot) > 1:
+                mosaic_stats["mosaics"] += 1
+                mosaic_stats["tiled_frames"] += len(slot)
+        tasks.append(asyncio.create_task(_process_batch(len(tasks) + 1, batch)))
+
+    async def _admit(frame: FrameInfo, skipped: VisionEvent | None, low_detail: bool | None) -> None:
+        if skipped is not None:
+            skipped_events.append(skipped)
+            return
+        if vision_cache is not None:
+            key = (await asyncio.to_thread(_frame_keys, [frame]))[0]
+            result = vision_cache.get(key) if key else None
+            if result is not None:
+                cached_events.append(_to_event(frame, result))
+                return
+            miss_keys.append(key)
+        misses.append(frame)
+        if VISION_MOSAIC_ENABLED:
+            if low_detail is None:
+                low_detail = await asyncio.to_thread(is_low_detail, frame.path, cache)
+        for batch in packer.add(frame, VISION_MOSAIC_ENABLED and bool(low_detail)):
+            _dispatch(batch)
+
+    try:
+        while (frame := await source.get()) is not None:
+            if prefilter is None:
+                await _admit(frame, None, None)
+                continue
+            for routed, skipped, low_detail in await asyncio.to_thread(prefilter.route, frame):
+                await _admit(routed, skipped, low_detail)
+        if prefilter is not None:
+            for routed, skipped, low_detail in prefilter.flush():
+                await _admit(routed, skipped, low_detail)
+        for batch in packer.flush():
+            _dispatch(batch)
+        batch_results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    if vision_cache is not None:
+        await asyncio.to_thread(_store_results, vision_cache, misses, miss_keys, batch_results)
+        lookups = len(cached_events) + len(misses)
+        logger.info("Vision cache: %d/%d frames hit (%.0f%%)", len(cached_events), lookups,
+                    100 * len(cached_events) / max(lookups, 1))
+        if metrics is not None:
+            metrics["vision_cache"] = {
+                "hits": len(cached_events),
+                "misses": len(misses),
+                "hit_rate": round(len(cached_events) / max(lookups, 1), 3),
+                "entries": len(vision_cache),
+            }
+
+    if prefilter is not None:
+        # Batches the skipped frames would have added to the misses actually sent
+        avoided = (math.ceil((len(misses) + len(skipped_events)) / MAX_FRAMES_PER_BATCH)
+                   - math.ceil(len(misses) / MAX_FRAMES_PER_BATCH))
+        logger.info("Prefilter: %s, %d API calls avoided", prefilter.stats, avoided)
+        if metrics is not None:
+            metrics["prefilter"] = {**prefilter.stats, "api_calls_avoided": avoided}
+
+    if budget.spent or recovery["lost_frames"]:
+        logger.info("Vision recovery: %s, retry budget %d/%d spent",
+                    recovery, budget.spent, budget.calls)
+    if metrics is not None:
+        metrics["vision_recovery"] = {**budget.metrics(), **recovery}
+
+    if VISION_MOSAIC_ENABLED:
+        # Requests the tiled frames would have needed as full image slots
+        avoided = math.ceil(len(misses) / MAX_FRAMES_PER_BATCH) - len(tasks)
+        logger.info("Mosaic: %d frames in %d mosaics, %d API calls avoided",
+                    mosaic_stats["tiled_frames"], mosaic_stats["mosaics"], avoided)
+        if metrics is not None:
+            metrics["mosaic"] = {**mosaic_stats, "api_calls_avoided": avoided}
 
     # Flatten and sort by timestamp to preserve chronological order
-    all_events: list[VisionEvent] = []
+    all_events = cached_events + skipped_events
     for events in batch_results:
         all_events.extend(events)
     all_events.sort(key=lambda e: e.timestamp)
 
-    logger.info("Vision analysis complete: %d events from %d frames",
-                len(all_events), len(frames))
+    stats = limiter.metrics()
+    stats["first_result_s"] = round(first_result, 2) if first_result is not None else None
+    logger.info("Vision analysis complete: %d events from %d frames in %d batches "
+                "(window=%d, peak=%d, %d overloads)",
+                len(all_events), len(skipped_events) + len(cached_events) + len(misses), len(tasks),
+                stats["window"], stats["peak_window"], stats["overloads"])
+    if metrics is not None:
+        metrics["vision"] = stats
     return all_events
 
 
-async def _analyze_batch_with_retry(frames: list[FrameInfo]) -> list[VisionEvent]:
-    """Retry wrapper around _analyze_batch with exponential backoff."""
+def _frame_keys(frames: list[FrameInfo]) -> list[str | None]:
+    """Vision cache key per frame; hashes frames that came without a pHash (older stage caches)."""
+    if VISION_CACHE_MATCH == "phash":
+        missing = [i for i, frame in enumerate(frames) if frame.phash is None]
+        if missing:
+            hashes, ok = hash_files([frames[i].path for i in missing])
+            frames = list(frames)
+            for i, h, readable in zip(missing, hashes, ok):
+                if readable:
+                    frames[i] = replace(frames[i], phash=int(h))
+    return [frame_key(frame) for frame in frames]
+
+
+def _store_results(
+    vision_cache: VisionResultCache,
+    frames: list[FrameInfo],
+    keys: list[str | None],
+    batch_results: list[list[VisionEvent]],
+) -> None:
+    """Add analyzed frames to the vision cache and persist it (runs in a worker thread)."""
+    key_by_path = {frame.path: key for frame, key in zip(frames, keys) if key}
+    stored = 0
+    for events in batch_results:
+        for event in events:
+            key = key_by_path.get(event.frame_path)
+            # Empty events are placeholders for frames Pixtral returned nothing for
+            if key and (event.ocr_text or event.scene_description or event.slide_title or event.objects):
+                vision_cache.put(key, asdict(event))
+                stored += 1
+    if stored:
+        vision_cache.save()
+
+
+def _to_event(frame: FrameInfo, result: dict | None) -> VisionEvent:
+    """VisionEvent for a frame from its per-frame Pixtral result (None: no result)."""
+    if result is None:
+        return VisionEvent(
+            frame_index=frame.index,
+            timestamp=frame.timestamp,
+            frame_path=frame.path,
+            repeat_timestamps=frame.repeat_timestamps,
+        )
+    return VisionEvent(
+        frame_index=frame.index,
+        timestamp=frame.timestamp,
+        frame_path=frame.path,
+        ocr_text=result.get("ocr_text") or [],
+        scene_description=result.get("scene_description") or "",
+        slide_title=result.get("slide_title"),
+        objects=result.get("objects") or [],
+        repeat_timestamps=frame.repeat_timestamps,
+    )
+
+
+def _split(slots: list[Slot]) -> tuple[list[Slot], list[Slot]] | None:
+    """Halve a batch by images; a single mosaic is halved by tiles (None: one frame left)."""
+    if len(slots) > 1:
+        mid = len(slots) // 2
+        return slots[:mid], slots[mid:]
+    if len(slots[0]) > 1:
+        mid = len(slots[0]) // 2
+        return [slots[0][:mid]], [slots[0][mid:]]
+    return None
+
+
+async def _analyze_batch_with_recovery(
+    slots: list[Slot],
+    limiter: AdaptiveLimiter,
+    cache: FrameCache | None,
+    budget: RetryBudget,
+    stats: dict[str, int],
+    on_frame: Callable[[FrameInfo], Awaitable[None]] | None = None,
+    rerequest_missing: bool = True,
+) -> list[VisionEvent]:
+    """Analyze a batch, recovering what a failed or short answer left out.
+
+    A batch that still fails after its retries is split in halves that are
+    analyzed on their own, down to single frames, so one bad image or an
+    over-long answer costs a few small calls instead of the whole batch.
+    Frames missing from an answer (or with an unparseable entry) are
+    re-requested once. Each recovery request is paid from the job's budget;
+    frames it cannot pay for keep their old outcome.
+    """
+    events, missing = await _analyze_batch_with_retry(slots, limiter, cache, budget, on_frame)
+    num_frames = sum(len(slot) for slot in slots)
+
+    if events is None:
+        halves = _split(slots)
+        affordable = [half for half in halves if budget.take()] if halves is not None else []
+        lost = num_frames - sum(len(slot) for half in affordable for slot in half)
+        if lost:
+            stats["lost_frames"] += lost
+            logger.error("Batch failed, skipping %d frames (retry budget %d/%d spent)",
+                         lost, budget.spent, budget.calls)
+        if not affordable:
+            return []
+        stats["splits"] += 1
+        logger.warning("Batch of %d frames failed, retrying as %s", num_frames,
+                       " + ".join(f"{sum(len(slot) for slot in half)} frames" for half in affordable))
+        results = await asyncio.gather(*(
+            _analyze_batch_with_recovery(half, limiter, cache, budget, stats, on_frame, rerequest_missing)
+            for half in affordable
+        ))
+        return [event for events in results for event in events]
+
+    if missing and rerequest_missing and budget.take():
+        stats["rerequested_frames"] += len(missing)
+        logger.warning("Pixtral answer left out %d of %d frames, re-requesting them", len(missing), num_frames)
+        missing_paths = {frame.path for frame in missing}
+        retry_slots = [[frame for frame in slot if frame.path in missing_paths] for slot in slots]
+        recovered = await _analyze_batch_with_recovery(
+            [slot for slot in retry_slots if slot], limiter, cache, budget, stats, on_frame,
+            rerequest_missing=False,
+        )
+        by_path = {event.frame_path: event for event in recovered if event.frame_path in missing_paths}
+        stats["recovered_frames"] += len(by_path)
+        events = [by_path.get(event.frame_path, event) for event in events]
+    return events
+
+
+async def _analyze_batch_with_retry(
+    slots: list[Slot],
+    limiter: AdaptiveLimiter,
+    cache: FrameCache | None,
+    budget: RetryBudget,
+    on_frame: Callable[[FrameInfo], Awaitable[None]] | None = None,
+) -> tuple[list[VisionEvent] | None, list[FrameInfo]]:
+    """Retry wrapper around _analyze_batch.
+
+    Waits for the server's Retry-After when given (on 429/503 the limiter also
+    holds back every other batch for that long); otherwise backs off
+    exponentially with jitter so retries from parallel batches do not align.
+    Every retry is paid from the job's budget.
+
+    Returns:
+        (events, missing) — events is None if the batch failed.
+    """
     for attempt in range(VISION_MAX_RETRIES + 1):
-        events, retryable = await _analyze_batch(frames)
+        events, missing, retryable, server_delay = await _analyze_batch(slots, limiter, cache, on_frame)
         if events is not None:
-            return events
-        if not retryable or attempt == VISION_MAX_RETRIES:
-            logger.error("Batch failed after %d attempts, skipping %d frames",
-                         attempt + 1, len(frames))
-            return []
-        delay = VISION_RETRY_BASE_DELAY * (2 ** attempt)
+            return events, missing
+        if not retryable or attempt == VISION_MAX_RETRIES or not budget.take():
+            logger.warning("Batch of %d frames failed after %d attempts",
+                           sum(len(slot) for slot in slots), attempt + 1)
+            return None, []
+        if server_delay is not None:
+            delay = min(server_delay, VISION_RETRY_AFTER_MAX)
+        else:
+            delay = VISION_RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.0)
         logger.warning("Retryable error, attempt %d/%d — waiting %.1fs",
                        attempt + 1, VISION_MAX_RETRIES, delay)
         await asyncio.sleep(delay)
-    return []
+    return None, []
 
 
-async def _analyze_batch(frames: list[FrameInfo]) -> tuple[list[VisionEvent] | None, bool]:
-    """Send a single batch of frames to Pixtral.
+async def _analyze_batch(
+    slots: list[Slot],
+    limiter: AdaptiveLimiter,
+    cache: FrameCache | None = None,
+    on_frame: Callable[[FrameInfo], Awaitable[None]] | None = None,
+) -> tuple[list[VisionEvent] | None, list[FrameInfo], bool, float | None]:
+    """Send a single batch of frames to Pixtral, one image per slot.
+
+    Frames are numbered across the batch in slot order; mosaic tiles carry
+    their number as a label, and answers are mapped back by frame_number.
+    Images are encoded before taking a limiter slot; only the request itself
+    counts against the concurrency window. on_frame is awaited for each frame
+    whose entry completes in the streamed answer; if the answer is cut off,
+    the finished entries are kept and the rest are reported missing.
 
     Returns:
-        (events, retryable) — events is None on failure, retryable indicates
-        whether the caller should retry.
+        (events, missing, retryable, retry_after) — events is None on failure
+        and has an empty placeholder for each missing frame; missing lists the
+        frames that were sent but have no usable entry in the answer;
+        retryable indicates whether the caller should retry, retry_after is
+        the server's requested delay in seconds, if any.
     """
-    # Build image content blocks
+    frames = [frame for slot in slots for frame in slot]
+    first_numbers, number = [], 1
+    for slot in slots:
+        first_numbers.append(number)
+        number += len(slot)
+
+    # Build image content blocks, encoding images in worker threads
     image_contents = []
     frame_descriptions = []
-
-    for i, frame in enumerate(frames):
-        try:
-            b64 = _resize_and_encode(frame.path)
-        except Exception as e:
-            logger.warning("Failed to encode frame %s: %s", frame.path, e)
+    has_mosaic = any(len(slot) > 1 for slot in slots)
+    if has_mosaic:
+        frame_descriptions.append("Some images are grids of several low-detail frames; each tile is "
+                                  "labeled with its frame number in its top-left corner.")
+
+    unsent: set[str] = set()
+    encoded = await asyncio.gather(
+        *(asyncio.to_thread(_encode_slot, slot, first, cache) for slot, first in zip(slots, first_numbers)),
+        return_exceptions=True,
+    )
+    for slot, first, data_url in zip(slots, first_numbers, encoded):
+        if isinstance(data_url, Exception):
+            logger.warning("Failed to encode frame %s: %s", slot[0].path, data_url)
+            unsent.update(frame.path for frame in slot)
             continue
 
         image_contents.append({
             "type": "image_url",
-            "image_url": {"url": f"data:image/jpeg;base64,{b64}"},
+            "image_url": {"url": data_url},
         })
-        frame_descriptions.append(f"Frame {i + 1} (timestamp: {frame.timestamp:.1f}s)")
+        image_no = len(image_contents)
+        for i, frame in enumerate(slot):
+            description = f"Frame {first + i} (timestamp: {frame.timestamp:.1f}s)"
+            if len(slot) > 1:
+                description += f": image {image_no}, tile {tile_position(i)}"
+            elif has_mosaic:
+                description += f": image {image_no}"
+            frame_descriptions.append(description)
 
     if not image_contents:
-        return [], False
+        return [], [], False, None
 
     prompt_text = VISION_PROMPT.format(
         frame_list="\n".join(frame_descriptions),
@@ -152,62 +507,91 @@ async def _analyze_batch(frames: list[FrameInfo]) -> tuple[list[VisionEvent] | N
         }
     ]
 
-    try:
-        async with httpx.AsyncClient(timeout=120) as client:
-            resp = await client.post(
-                CHAT_URL,
-                headers={
-                    "Authorization": f"Bearer {MISTRAL_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
+    parser = JsonStreamParser()
+    position = 0
+
+    async def _on_content(text: str) -> None:
+        nonlocal position
+        for kind, key, entry in parser.feed(text):
+            if kind != "item" or key != "frames":
+                continue
+            position += 1
+            if on_frame is None or not _is_valid_result(entry):
+                continue
+            number = entry.get("frame_number")
+            if not isinstance(number, int) or not 1 <= number <= len(frames):
+                number = position
+            if number <= len(frames):
+                await on_frame(frames[number - 1])
+
+    loop = asyncio.get_running_loop()
+    async with limiter:
+        started = loop.time()
+        try:
+            completion = await chat_completion(
+                {
                     "model": MODEL_VISION,
                     "messages": messages,
                     "response_format": {"type": "json_object"},
                     "max_tokens": 4096,
                     "temperature": 0.1,
                 },
+                _on_content,
             )
-    except httpx.TimeoutException:
-        logger.warning("Pixtral request timed out")
-        return None, True
-    except httpx.HTTPError as e:
-        logger.warning("Pixtral HTTP error: %s", e)
-        return None, True
-
-    if resp.status_code != 200:
-        retryable = resp.status_code in _RETRYABLE_STATUS_CODES
-        logger.error("Pixtral API error (%d): %s", resp.status_code, resp.text[:500])
-        return None, retryable
+        except httpx.TimeoutException:
+            limiter.on_error()
+            logger.warning("Pixtral request timed out")
+            return None, [], True, None
+        except httpx.HTTPError as e:
+            limiter.on_error()
+            logger.warning("Pixtral HTTP error: %s", e)
+            return None, [], True, None
+
+        resp = completion.response
+        if resp.status_code in OVERLOAD_STATUS_CODES:
+            server_delay = retry_after(resp)
+            limiter.on_overload(started, server_delay)
+            logger.warning("Pixtral overloaded (%d), window now %d", resp.status_code, limiter.limit)
+            return None, [], True, server_delay
+        if resp.status_code != 200:
+            limiter.on_error()
+            retryable = resp.status_code in _RETRYABLE_STATUS_CODES
+            logger.error("Pixtral API error (%d): %s", resp.status_code, resp.text[:500])
+            return None, [], retryable, retry_after(resp) if retryable else None
+        # Upstream latency only, not time spent queued in the shared scheduler (see mistral_client)
+        limiter.on_success(started, resp.elapsed.total_seconds())
 
     try:
-        content = resp.json()["choices"][0]["message"]["content"]
-        result = json.loads(content)
-    except (KeyError, json.JSONDecodeError) as e:
-        logger.error("Failed to parse Pixtral response: %s", e)
-        return None, False
-
-    # Map results to VisionEvents
-    events = []
-    frame_results = result.get("frames", [])
-
-    for i, frame in enumerate(frames):
-        if i < len(frame_results):
-            fr = frame_results[i]
-            events.append(VisionEvent(
-                frame_index=frame.index,
-                timestamp=frame.timestamp,
-                frame_path=frame.path,
-                ocr_text=fr.get("ocr_text", []),
-                scene_description=fr.get("scene_description", ""),
-                slide_title=fr.get("slide_title"),
-                objects=fr.get("objects", []),
-            ))
-        else:
-            events.append(VisionEvent(
-                frame_index=frame.index,
-                timestamp=frame.timestamp,
-                frame_path=frame.path,
-            ))
-
-    return events, False
+        frame_results = json.loads(completion.content).get("frames") or []
+    except (TypeError, AttributeError, ValueError) as e:
+        frame_results = parser.partial().get("frames")
+        if not frame_results:
+            logger.error("Failed to parse Pixtral response (finish_reason=%s): %s", completion.finish_reason, e)
+            return None, [], False, None
+        logger.warning("Pixtral response incomplete (finish_reason=%s), keeping %d finished frames of %d",
+                       completion.finish_reason, len(frame_results), len(frames))
+
+    # Map results to VisionEvents by frame number (position if missing)
+    by_number: dict[int, dict] = {}
+    for i, entry in enumerate(frame_results if isinstance(frame_results, list) else []):
+        if not _is_valid_result(entry):
+            continue
+        number = entry.get("frame_number")
+        if not isinstance(number, int) or not 1 <= number <= len(frames):
+            number = i + 1
+        by_number.setdefault(number, entry)
+    events = [_to_event(frame, by_number.get(number)) for number, frame in enumerate(frames, 1)]
+    missing = [frame for number, frame in enumerate(frames, 1)
+               if number not in by_number and frame.path not in unsent]
+    return events, missing, False, None
+
+
+def _is_valid_result(entry) -> bool:
+    """Whether a per-frame entry of a Pixtral answer has the expected shape."""
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get("ocr_text") or [], list)
+        and isinstance(entry.get("objects") or [], list)
+        and isinstance(entry.get("scene_description") or "", str)
+        and isinstance(entry.get("slide_title") or "", str)
+    )
@@ -0,0 +1,151 @@
+"""Cross-job cache of Pixtral results per frame.
+
+Recordings reuse the same slides, title cards and dashboards, so a frame's
+vision result is stored under its perceptual hash (or exact content hash, see
+VISION_CACHE_MATCH) and served to later jobs without an API call. Entries live
+in one JSON file per namespace (model + prompt version + encoding settings),
+so a model or prompt change starts an empty cache. The least recently used
+entries are evicted once the file exceeds VISION_CACHE_MAX_MB. Namespaces of
+other settings stay on disk, so switching back reuses them, until together
+they exceed VISION_CACHE_IDLE_MAX_MB; the least recently written go first.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from backend.config import (
+    VISION_CACHE_DIR, VISION_CACHE_MAX_MB, VISION_CACHE_IDLE_MAX_MB, VISION_CACHE_MATCH,
+    MODEL_VISION, FRAME_MAX_WIDTH, VISION_REQUEST_MAX_BYTES,
+)
+from backend.models import FrameInfo
+from backend.pipeline.stage_cache import stage_key, prompt_version
+from backend.prompts.vision_analysis import VISION_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Per-frame fields of a Pixtral result that are cached
+RESULT_FIELDS = ("ocr_text", "scene_description", "slide_title", "objects")
+
+
+def frame_key(frame: FrameInfo, match: str = VISION_CACHE_MATCH) -> str | None:
+    """Cache key of a frame, or None if it cannot be keyed (no pHash, unreadable file)."""
+    if match == "content":
+        try:
+            return "c" + hashlib.sha256(Path(frame.path).read_bytes()).hexdigest()[:32]
+        except OSError:
+            return None
+    return f"p{frame.phash:016x}" if frame.phash is not None else None
+
+
+class VisionResultCache:
+    """LRU map of frame key -> cached result fields, persisted as JSON."""
+
+    def __init__(self, path: Path, max_bytes: int = VISION_CACHE_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._size = 0
+        self._lock = threading.Lock()  # jobs read on the event loop, saves run in threads
+        self._loaded = False
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path) as f:
+                self._entries = json.load(f).get("entries", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+        self._size = sum(entry.get("size", 0) for entry in self._entries.values())
+        logger.info("Vision cache: %d entries (%.1f MB) from %s",
+                    len(self._entries), self._size / 1e6, self.path.name)
+
+    def load(self) -> None:
+        """Read the cache file if not done yet; call from a worker thread."""
+        with self._lock:
+            self._load()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["last_used"] = time.time()
+            return entry["result"]
+
+    def put(self, key: str, result: dict[str, Any]) -> None:
+        result = {name: result.get(name) for name in RESULT_FIELDS}
+        size = len(json.dumps(result))
+        with self._lock:
+            self._load()
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.get("size", 0)
+            self._entries[key] = {"result": result, "size": size, "last_used": time.time()}
+            self._size += size
+            self._evict()
+
+    def _evict(self) -> None:
+        if self._size <= self.max_bytes:
+            return
+        for key in sorted(self._entries, key=lambda k: self._entries[k]["last_used"]):
+            self._size -= self._entries.pop(key).get("size", 0)
+            if self._size <= self.max_bytes:
+                break
+
+    def save(self) -> None:
+        """Write atomically; call from a worker thread."""
+        with self._lock:
+            if not self._loaded:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"entries": self._entries}, f)
+            tmp_path.replace(self.path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._entries)
+
+
+_cache: VisionResultCache | None = None
+
+
+def get_vision_cache() -> VisionResultCache:
+    """Process-wide cache for the current model, prompt and encoding settings."""
+    global _cache
+    if _cache is None:
+        namespace = stage_key(MODEL_VISION, prompt_version(VISION_PROMPT),
+                              FRAME_MAX_WIDTH, VISION_REQUEST_MAX_BYTES, VISION_CACHE_MATCH)
+        path = VISION_CACHE_DIR / f"{namespace}.json"
+        _evict_idle_namespaces(path)
+        _cache = VisionResultCache(path)
+    return _cache
+
+
+def _evict_idle_namespaces(current: Path, max_bytes: int = VISION_CACHE_IDLE_MAX_MB * 1024 * 1024) -> None:
+    """Bound the namespaces of other settings, dropping the least recently written."""
+    idle = []
+    for path in VISION_CACHE_DIR.glob("*.json"):
+        if path != current:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            idle.append((stat.st_mtime, stat.st_size, path))
+
+    total = 0
+    for _, size, path in sorted(idle, key=lambda item: item[0], reverse=True):
+        total += size
+        if total > max_bytes:
+            path.unlink(missing_ok=True)
+            logger.info("Vision cache: evicted idle namespace %s", path.name)
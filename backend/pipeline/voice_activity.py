@@ -0,0 +1,207 @@
+"""Local energy-based voice activity detection: drop long silences before ASR.
+
+The audio track is decoded to 16kHz mono PCM and scored in short frames with
+NumPy. Long non-speech stretches are cut out with FFmpeg, and a span map is
+kept so transcript timestamps can be translated back to original video time.
+"""
+
+import asyncio
+import logging
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+import numpy as np
+
+from backend.config import (
+    AUDIO_ENCODE_FORMAT, VAD_FRAME_MS, VAD_MARGIN_DB, VAD_MIN_SILENCE,
+    VAD_PADDING, VAD_MIN_SAVINGS,
+)
+from backend.models import TranscriptSegment
+from backend.pipeline.audio_extractor import _AUDIO_ENCODINGS
+
+logger = logging.getLogger(__name__)
+
+_SAMPLE_RATE = 16000
+_READ_BLOCK_SECONDS = 10
+
+# Below this level a frame is silence regardless of the measured noise floor
+_ABSOLUTE_FLOOR_DB = -60.0
+
+# (compact_start, original_start, length) for each kept stretch, in order
+SpeechSpans = list[tuple[float, float, float]]
+
+
+async def _frame_energies(audio_path: Path) -> np.ndarray:
+    """Decode to 16kHz mono PCM and return per-frame RMS level in dBFS.
+
+    PCM is read in blocks so only the energy curve is held in memory.
+    """
+    cmd = [
+        "ffmpeg", "-nostats", "-i", str(audio_path),
+        "-vn", "-ac", "1", "-ar", str(_SAMPLE_RATE),
+        "-f", "s16le", "pipe:1",
+    ]
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+
+    frame_len = _SAMPLE_RATE * VAD_FRAME_MS // 1000
+    block_bytes = _SAMPLE_RATE * _READ_BLOCK_SECONDS * 2
+    levels: list[np.ndarray] = []
+    carry = np.empty(0, dtype=np.int16)
+
+    while True:
+        try:
+            block = await proc.stdout.readexactly(block_bytes)
+        except asyncio.IncompleteReadError as e:
+            block = e.partial
+        if not block:
+            break
+        samples = np.concatenate([carry, np.frombuffer(block[: len(block) // 2 * 2], dtype=np.int16)])
+        usable = len(samples) // frame_len * frame_len
+        frames = samples[:usable].reshape(-1, frame_len).astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        levels.append(20 * np.log10(rms + 1e-9))
+        carry = samples[usable:]
+        if len(block) < block_bytes:
+            break
+
+    await proc.wait()
+    if proc.returncode != 0:
+        raise RuntimeError(f"FFmpeg PCM decode for VAD failed (exit {proc.returncode})")
+
+    return np.concatenate(levels) if levels else np.empty(0, dtype=np.float32)
+
+
+def _speech_spans(levels: np.ndarray) -> list[tuple[float, float]]:
+    """Return (start, end) seconds of audio to keep.
+
+    A frame is speech when it is VAD_MARGIN_DB above the noise floor (10th
+    percentile level). Speech is padded by VAD_PADDING on each side, and only
+    silences of at least VAD_MIN_SILENCE are removed.
+    """
+    if len(levels) == 0:
+        return []
+
+    frame_sec = VAD_FRAME_MS / 1000
+    threshold = max(float(np.percentile(levels, 10)) + VAD_MARGIN_DB, _ABSOLUTE_FLOOR_DB)
+    speech = levels > threshold
+
+    # Dilate speech frames by the padding so word onsets/tails are kept
+    pad = int(VAD_PADDING / frame_sec)
+    if pad > 0 and speech.any():
+        kernel = np.ones(2 * pad + 1, dtype=np.int32)
+        speech = np.convolve(speech.astype(np.int32), kernel, mode="same") > 0
+
+    # Run-length encode and keep everything except long silent runs
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], (~speech).astype(np.int8), [0]])))
+    min_frames = int(VAD_MIN_SILENCE / frame_sec)
+    total = len(levels) * frame_sec
+
+    spans: list[tuple[float, float]] = []
+    cursor = 0.0
+    for start, end in zip(edges[::2], edges[1::2]):
+        if end - start < min_frames:
+            continue
+        if start * frame_sec > cursor:
+            spans.append((cursor, round(float(start * frame_sec), 3)))
+        cursor = round(float(end * frame_sec), 3)
+    if cursor < total:
+        spans.append((cursor, round(total, 3)))
+    return spans
+
+
+def _concat_list(source_name: str, spans: list[tuple[float, float]]) -> str:
+    """FFmpeg concat-demuxer script that plays each kept span of one file in turn."""
+    lines = ["ffconcat version 1.0"]
+    for start, end in spans:
+        lines += [f"file '{source_name}'", f"inpoint {start:.3f}", f"outpoint {end:.3f}"]
+    return "\n".join(lines) + "\n"
+
+
+async def _write_compacted(audio_path: Path, spans: list[tuple[float, float]]) -> Path:
+    """Concatenate the kept spans into a new audio file with the concat demuxer.
+
+    The spans go to a list file rather than the command line, so there is no
+    argv limit on their number and demuxing stays O(1) per packet.
+    concatdec_select trims the packets around each in/out point, and aresample
+    keeps the output continuous so it matches the span map.
+    """
+    codec_args, suffix = _AUDIO_ENCODINGS[AUDIO_ENCODE_FORMAT]
+    output_path = audio_path.with_name(f"audio_speech{suffix}")
+    list_path = audio_path.with_name("audio_speech.ffconcat")
+    list_path.write_text(_concat_list(audio_path.name, spans))
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-f", "concat", "-segment_time_metadata", "1", "-i", str(list_path),
+        "-af", "aselect=concatdec_select,aresample=async=1",
+        "-vn", *codec_args,
+        str(output_path),
+    ]
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+    finally:
+        list_path.unlink(missing_ok=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"FFmpeg silence trimming failed: {stderr.decode()[-500:]}")
+    return output_path
+
+
+async def trim_silence(audio_path: Path) -> tuple[Path, SpeechSpans | None, float | None]:
+    """Drop long non-speech stretches from the ASR audio.
+
+    Args:
+        audio_path: Extracted audio track.
+
+    Returns:
+        (asr_audio_path, spans, compacted_duration). When trimming would save
+        less than VAD_MIN_SAVINGS of the audio, the original path is returned
+        with spans=None and nothing is written.
+    """
+    levels = await _frame_energies(audio_path)
+    total = len(levels) * VAD_FRAME_MS / 1000
+    kept = _speech_spans(levels)
+    kept_seconds = sum(e - s for s, e in kept)
+
+    if total == 0 or not kept or (total - kept_seconds) / total < VAD_MIN_SAVINGS:
+        logger.info("VAD: %.0fs of %.0fs is speech, skipping trim", kept_seconds, total)
+        return audio_path, None, None
+
+    output_path = await _write_compacted(audio_path, kept)
+
+    spans: SpeechSpans = []
+    compact = 0.0
+    for start, end in kept:
+        spans.append((round(compact, 3), start, round(end - start, 3)))
+        compact += end - start
+
+    logger.info("VAD: kept %d speech spans, %.0fs -> %.0fs (%.0f%% silence removed)",
+                len(kept), total, kept_seconds, (1 - kept_seconds / total) * 100)
+    return output_path, spans, kept_seconds
+
+
+def remap_segments(segments: list[TranscriptSegment], spans: SpeechSpans) -> list[TranscriptSegment]:
+    """Translate segment timestamps from compacted audio time back to video time."""
+    compact_starts = [s[0] for s in spans]
+
+    def _to_original(t: float, is_end: bool) -> float:
+        # An end exactly on a span boundary belongs to the span it closes
+        idx = (bisect_left(compact_starts, t) if is_end else bisect_right(compact_starts, t)) - 1
+        compact_start, original_start, length = spans[max(idx, 0)]
+        return original_start + min(max(t - compact_start, 0.0), length)
+
+    return [
+        TranscriptSegment(
+            speaker=seg.speaker,
+            text=seg.text,
+            start=_to_original(seg.start, is_end=False),
+            end=_to_original(seg.end, is_end=True),
+        )
+        for seg in segments
+    ]
@@ -9,6 +9,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse, StreamingResponse
 
 from backend.config import JOBS_DIR, UPLOADS_DIR
+from backend.pipeline.job_state import load_job_state
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -77,8 +78,11 @@ async def stream_progress(job_id: str):
         else:
             # Pipeline might be done already — check for results
             results_path = JOBS_DIR / job_id / "results.json"
+            state = load_job_state(JOBS_DIR / job_id)
             if results_path.exists():
                 yield f"data: {json.dumps({'step': 'complete', 'progress': 100, 'message': 'Analysis complete'})}\n\n"
+            elif state and state.get("status") == "error":
+                yield f"data: {json.dumps({'step': 'error', 'progress': 0, 'message': state.get('message', 'Pipeline error')})}\n\n"
             else:
                 yield f"data: {json.dumps({'step': 'error', 'progress': 0, 'message': 'Job not found'})}\n\n"
 
@@ -105,6 +109,28 @@ async def get_results(job_id: str):
         raise HTTPException(404, f"Results not found for job {job_id}")
 
 
+@router.post("/api/jobs/{job_id}/reanalyze")
+async def reanalyze(job_id: str):
+    """Re-run a job's pipeline, recomputing only stages whose cache keys changed.
+
+    Use after changing a prompt, model, or tuning constant: upstream stages
+    (extraction, ASR, vision) are served from the job's stage cache.
+    """
+    from backend.routers.upload import active_pipelines, _start_pipeline
+
+    # Finished orchestrators linger in active_pipelines for late SSE subscribers
+    orchestrator = active_pipelines.get(job_id)
+    if orchestrator is not None and orchestrator.running:
+        raise HTTPException(409, f"Job {job_id} is already running")
+
+    video_files = list(UPLOADS_DIR.glob(f"{job_id}_*"))
+    if not video_files:
+        raise HTTPException(404, f"Video not found for job {job_id}")
+
+    logger.info("Re-analyzing job %s", job_id)
+    return _start_pipeline(job_id, video_files[0])
+
+
 @router.get("/api/jobs/{job_id}/video")
 async def serve_video(job_id: str):
     """Serve the uploaded video file with Range support for seeking."""
@@ -100,6 +100,9 @@ async def purge_data():
                 item.unlink()
                 uploads_deleted += 1
 
+    # Dedup index points at the jobs that were just deleted
+    config.UPLOAD_INDEX_PATH.unlink(missing_ok=True)
+
     logger.info(f"Purged {jobs_deleted} jobs and {uploads_deleted} uploads")
     return {
         "status": "ok",
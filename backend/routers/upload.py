@@ -1,6 +1,8 @@
 """Upload router: accepts video files / YouTube URLs and triggers the processing pipeline."""
 
 import asyncio
+import hashlib
+import json
 import re
 import shutil
 import subprocess
@@ -8,10 +10,16 @@ import uuid
 import logging
 from pathlib import Path
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from pydantic import BaseModel
 
-from backend.config import UPLOADS_DIR, MAX_UPLOAD_SIZE_MB, ALLOWED_VIDEO_TYPES
+from backend.config import (
+    JOBS_DIR, UPLOADS_DIR, UPLOAD_INDEX_PATH, MAX_UPLOAD_SIZE_MB, ALLOWED_VIDEO_TYPES,
+    JOB_MAX_RESUMES,
+)
+from backend.models import JobStatus, MediaProbe
+from backend.pipeline.job_state import load_job_state, save_job_state
+from backend.pipeline.media_probe import probe_media, save_probe
 from backend.pipeline.orchestrator import PipelineOrchestrator
 
 logger = logging.getLogger(__name__)
@@ -23,16 +31,19 @@ active_pipelines: dict[str, PipelineOrchestrator] = {}
 YOUTUBE_RE = re.compile(
     r"^https?://(www\.)?(youtube\.com/(watch\?v=|shorts/|embed/)|youtu\.be/)"
 )
+YOUTUBE_ID_RE = re.compile(r"(?:v=|shorts/|embed/|youtu\.be/)([\w-]{11})")
 
 # Cache yt-dlp path at module load to avoid scanning $PATH per request
 _YT_DLP_PATH = shutil.which("yt-dlp")
 
 
 @router.post("/api/upload")
-async def upload_video(file: UploadFile = File(...)):
+async def upload_video(file: UploadFile = File(...), force: bool = Query(False)):
     """Upload a video file and start processing.
 
-    Returns job_id and stream_url for SSE progress tracking.
+    Identical content (SHA-256 computed while streaming to disk) reuses the
+    existing job unless force=true. Returns job_id and stream_url for SSE
+    progress tracking.
     """
     # Validate content type
     content_type = file.content_type or ""
@@ -46,6 +57,7 @@ async def upload_video(file: UploadFile = File(...)):
     upload_path = UPLOADS_DIR / f"{job_id}_{file.filename}"
     max_bytes = MAX_UPLOAD_SIZE_MB * 1024 * 1024
     total_bytes = 0
+    hasher = hashlib.sha256()
 
     with open(upload_path, "wb") as f:
         while chunk := await file.read(1024 * 1024):  # 1 MB chunks
@@ -54,15 +66,25 @@ async def upload_video(file: UploadFile = File(...)):
                 f.close()
                 upload_path.unlink(missing_ok=True)
                 raise HTTPException(413, f"File too large. Maximum size: {MAX_UPLOAD_SIZE_MB}MB")
+            hasher.update(chunk)
             f.write(chunk)
 
-    logger.info("Video uploaded: %s (%s, %.1f MB)", file.filename, job_id, total_bytes / 1e6)
+    content_hash = hasher.hexdigest()
+    logger.info("Video uploaded: %s (%s, %.1f MB, sha256 %s)",
+                file.filename, job_id, total_bytes / 1e6, content_hash[:12])
+
+    if not force and (existing := _find_reusable_job("content", content_hash)):
+        upload_path.unlink(missing_ok=True)
+        return _reuse_job(existing)
 
-    return _start_pipeline(job_id, upload_path)
+    probe = await _probe_or_reject(job_id, upload_path)
+    _record_upload("content", content_hash, job_id)
+    return _start_pipeline(job_id, upload_path, probe, content_hash=content_hash)
 
 
 class UploadUrlRequest(BaseModel):
     url: str
+    force: bool = False
 
 
 @router.post("/api/upload-url")
@@ -78,6 +100,11 @@ async def upload_from_url(body: UploadUrlRequest):
             "Only YouTube URLs are supported for now — this project was built for a hackathon!",
         )
 
+    video_id_match = YOUTUBE_ID_RE.search(url)
+    video_id = video_id_match.group(1) if video_id_match else url
+    if not body.force and (existing := _find_reusable_job("urls", video_id)):
+        return _reuse_job(existing)
+
     if not _YT_DLP_PATH:
         raise HTTPException(500, "yt-dlp is not installed on the server.")
 
@@ -99,17 +126,120 @@ async def upload_from_url(body: UploadUrlRequest):
 
     logger.info("YouTube video downloaded: %s (%s, %.1f MB)", url, job_id, file_size / 1e6)
 
-    return _start_pipeline(job_id, output_path)
+    content_hash = await asyncio.to_thread(file_digest, output_path)
+    if not body.force and (existing := _find_reusable_job("content", content_hash)):
+        output_path.unlink(missing_ok=True)
+        _record_upload("urls", video_id, existing)
+        return _reuse_job(existing)
+
+    probe = await _probe_or_reject(job_id, output_path)
+    _record_upload("content", content_hash, job_id)
+    _record_upload("urls", video_id, job_id)
+    return _start_pipeline(job_id, output_path, probe, content_hash=content_hash)
+
+
+def _load_upload_index() -> dict[str, dict[str, str]]:
+    """Load the persistent upload index: {"content": {sha256: job_id}, "urls": {video_id: job_id}}."""
+    try:
+        with open(UPLOAD_INDEX_PATH) as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        index = {}
+    index.setdefault("content", {})
+    index.setdefault("urls", {})
+    return index
+
+
+def _record_upload(kind: str, key: str, job_id: str) -> None:
+    """Point an index key at a job (atomic replace so a crash never truncates the index)."""
+    index = _load_upload_index()
+    index[kind][key] = job_id
+    tmp_path = UPLOAD_INDEX_PATH.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    tmp_path.replace(UPLOAD_INDEX_PATH)
+
+
+def _find_reusable_job(kind: str, key: str) -> str | None:
+    """Return the job for this key if it completed or is still running."""
+    job_id = _load_upload_index()[kind].get(key)
+    if job_id is None:
+        return None
+    # Finished (possibly failed) orchestrators linger in active_pipelines for late SSE subscribers
+    orchestrator = active_pipelines.get(job_id)
+    if orchestrator is not None and orchestrator.running:
+        return job_id
+    if (JOBS_DIR / job_id / "results.json").exists():
+        return job_id
+    return None
+
+
+def _reuse_job(job_id: str) -> dict:
+    """Response for a duplicate upload: point the client at the existing job."""
+    logger.info("Duplicate upload, reusing job %s", job_id)
+    return {"job_id": job_id, "stream_url": f"/api/jobs/{job_id}/stream", "reused": True}
+
+
+async def _probe_or_reject(job_id: str, video_path: Path) -> MediaProbe:
+    """Probe the upload once and cache it with the job; reject unusable files early."""
+    try:
+        probe = await probe_media(video_path)
+    except ValueError as e:
+        video_path.unlink(missing_ok=True)
+        raise HTTPException(400, str(e))
+
+    if not probe.has_video or not probe.has_audio:
+        video_path.unlink(missing_ok=True)
+        missing = "video" if not probe.has_video else "audio"
+        raise HTTPException(400, f"File has no {missing} stream. Upload a video with both audio and video.")
+
+    save_probe(probe, JOBS_DIR / job_id)
+    return probe
 
 
-def _start_pipeline(job_id: str, video_path: Path) -> dict:
+def _start_pipeline(job_id: str, video_path: Path, probe: MediaProbe | None = None, resumes: int = 0,
+                    content_hash: str | None = None) -> dict:
     """Create orchestrator, register it, kick off background task, and return job info."""
-    orchestrator = PipelineOrchestrator(job_id, video_path)
+    orchestrator = PipelineOrchestrator(job_id, video_path, probe, content_hash)
+    save_job_state(orchestrator.job_dir, resumes=resumes)
     active_pipelines[job_id] = orchestrator
     asyncio.create_task(_run_pipeline(job_id, orchestrator))
     return {"job_id": job_id, "stream_url": f"/api/jobs/{job_id}/stream"}
 
 
+def resume_incomplete_jobs() -> list[str]:
+    """Re-enqueue jobs that were still processing when the server stopped.
+
+    Called once at startup. Each resumed run serves finished stages from the
+    job's stage cache, so only the interrupted stage onwards is recomputed.
+    A job that has already been resumed JOB_MAX_RESUMES times (e.g. it keeps
+    crashing the server) is marked as failed instead.
+    """
+    resumed = []
+    for job_dir in sorted(JOBS_DIR.iterdir()):
+        state = load_job_state(job_dir) if job_dir.is_dir() else None
+        if not state or state.get("status") != JobStatus.PROCESSING.value:
+            continue
+        job_id = job_dir.name
+        video_path = Path(state.get("video_path", ""))
+        resumes = state.get("resumes", 0)
+
+        if not video_path.is_file():
+            logger.warning("Cannot resume job %s: video %s is gone", job_id, video_path)
+            save_job_state(job_dir, status=JobStatus.ERROR.value, message="Video missing after restart")
+            continue
+        if resumes >= JOB_MAX_RESUMES:
+            logger.warning("Not resuming job %s: already resumed %d times", job_id, resumes)
+            save_job_state(job_dir, status=JobStatus.ERROR.value,
+                           message="Pipeline interrupted repeatedly, giving up")
+            continue
+
+        logger.info("Resuming job %s from step %s (%s%%)", job_id, state.get("step"), state.get("progress"))
+        _start_pipeline(job_id, video_path, resumes=resumes + 1)
+        resumed.append(job_id)
+    return resumed
+
+
 def _download_youtube(url: str, output_path: str) -> None:
     """Download best ≤720p via yt-dlp. Runs in a thread."""
     yt_dlp = _YT_DLP_PATH or "yt-dlp"
@@ -140,4 +270,6 @@ async def _run_pipeline(job_id: str, orchestrator: PipelineOrchestrator):
     finally:
         # Keep orchestrator around briefly for late SSE subscribers
         await asyncio.sleep(30)
-        active_pipelines.pop(job_id, None)
+        # A re-analysis may have registered a new orchestrator meanwhile
+        if active_pipelines.get(job_id) is orchestrator:
+            del active_pipelines[job_id]
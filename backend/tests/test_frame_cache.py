@@ -0,0 +1,53 @@
+import numpy as np
+from PIL import Image
+
+from backend.models import FrameInfo
+from backend.pipeline import frame_cache
+from backend.pipeline.frame_cache import FrameCache
+from backend.pipeline.frame_dedup import dedup_frames
+from backend.pipeline.frame_prefilter import compute_features
+
+
+def _write_frames(tmp_path) -> list[FrameInfo]:
+    rng = np.random.default_rng(0)
+    slide, face = (rng.integers(0, 255, (36, 64, 3), dtype=np.uint8) for _ in range(2))
+    frames = []
+    for i, base in enumerate([slide, slide, face]):
+        path = tmp_path / f"frame_{i + 1:04d}.jpg"
+        Image.fromarray(base).resize((1280, 720)).save(path, quality=95)
+        frames.append(FrameInfo(index=i, timestamp=i * 30.0, path=str(path)))
+    return frames
+
+
+def test_kept_frames_are_decoded_once(tmp_path, monkeypatch):
+    frames = _write_frames(tmp_path)
+    opened = []
+    real_open = Image.open
+
+    def counting_open(fp, *args, **kwargs):
+        opened.append(str(fp))
+        return real_open(fp, *args, **kwargs)
+
+    monkeypatch.setattr(frame_cache.Image, "open", counting_open)
+    cache = FrameCache()
+    unique = dedup_frames(frames, cache=cache)
+    assert [f.index for f in unique] == [0, 2]
+
+    for frame in unique:
+        assert compute_features(frame.path, cache) is not None
+        payload, mime_type = cache.get_or_encode(frame.path)
+        assert payload and mime_type.startswith("image/")
+        assert cache.get_or_encode(frame.path) == (payload, mime_type)
+
+    # One decode per raw frame in dedup; prefilter and encoding reuse it
+    assert sorted(opened) == sorted(f.path for f in frames)
+    assert cache.encodes == 2 and cache.hits == 2 and cache.disk_decodes == 0
+
+
+def test_evicted_frame_is_decoded_from_disk(tmp_path):
+    frames = _write_frames(tmp_path)
+    cache = FrameCache(max_bytes=1)
+    dedup_frames(frames, cache=cache)
+    assert cache.image(frames[0].path) is None
+    assert cache.get_or_encode(frames[0].path)[0]
+    assert cache.disk_decodes == 1
@@ -0,0 +1,55 @@
+from backend.models import FrameInfo
+from backend.pipeline.frame_mosaic import BatchPacker
+
+
+def _frames(n: int) -> list[FrameInfo]:
+    return [FrameInfo(index=i, timestamp=i * 10.0, path=f"frame_{i:04d}.jpg") for i in range(n)]
+
+
+def _indices(batches) -> list[list[list[int]]]:
+    return [[[frame.index for frame in slot] for slot in batch] for batch in batches]
+
+
+def test_full_frames_fill_a_batch_one_slot_each():
+    packer = BatchPacker(max_slots=3, tiles=4)
+    frames = _frames(4)
+
+    assert packer.add(frames[0], False) == []
+    assert packer.add(frames[1], False) == []
+    assert _indices(packer.add(frames[2], False)) == [[[0], [1], [2]]]
+    assert packer.add(frames[3], False) == []
+    assert _indices(packer.flush()) == [[[3]]]
+    assert packer.flush() == []
+
+
+def test_low_detail_frames_share_a_mosaic_slot():
+    packer = BatchPacker(max_slots=3, tiles=4)
+    frames = _frames(6)
+    ready = []
+    for frame in frames:
+        ready += packer.add(frame, low_detail=frame.index in (0, 2, 3, 5))
+
+    # Released once all three slots are used and the mosaic is complete
+    assert _indices(ready) == [[[0, 2, 3, 5], [1], [4]]]
+
+
+def test_batch_released_when_next_frame_does_not_fit():
+    packer = BatchPacker(max_slots=3, tiles=4)
+    frames = _frames(5)
+
+    assert packer.add(frames[0], False) == []
+    assert packer.add(frames[1], False) == []
+    # The mosaic slot still has room for more tiles, so the batch waits
+    assert packer.add(frames[2], True) == []
+    assert packer.add(frames[3], True) == []
+    assert _indices(packer.add(frames[4], False)) == [[[0], [1], [2, 3]]]
+    assert _indices(packer.flush()) == [[[4]]]
+
+
+def test_flush_sends_lone_low_detail_frame_alone():
+    packer = BatchPacker(max_slots=3, tiles=4)
+    frames = _frames(2)
+    packer.add(frames[0], True)
+    packer.add(frames[1], False)
+
+    assert _indices(packer.flush()) == [[[0], [1]]]
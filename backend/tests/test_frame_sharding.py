@@ -0,0 +1,42 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from backend.pipeline.frame_selector import _select_timestamps
+from backend.pipeline.frame_sharding import _merge_with_interval
+
+
+def _scene_frames(scores: list[tuple[float, float]]) -> list[tuple[float, Path]]:
+    return [(t, Path(f"frame_{t:.3f}.jpg")) for t, _ in scores]
+
+
+@pytest.mark.parametrize("scores, duration, interval", [
+    # Scene changes exactly one interval after the previous frame, and a
+    # duration exactly one interval after the last one
+    ([(0.0, 0.9), (30.0, 0.5), (45.5, 0.7), (100.0, 0.4), (130.0, 0.6)], 190.0, 30),
+    ([(12.0, 0.5), (72.0, 0.8)], 150.0, 60),
+    ([], 95.0, 30),
+])
+def test_sharded_merge_matches_single_pass(scores, duration, interval):
+    sharded = [t for t, _ in _merge_with_interval(_scene_frames(scores), duration, interval)]
+    single = _select_timestamps(scores, duration, interval, budget=10_000)
+    assert sharded == single
+
+
+def test_sharded_merge_matches_single_pass_random():
+    rng = random.Random(4)
+    for _ in range(200):
+        interval = rng.choice([30, 60, 90])
+        duration = float(rng.randint(1, 40) * 15)
+        # Whole seconds so scene changes regularly land on fallback times
+        times = sorted({float(rng.randrange(int(duration))) for _ in range(rng.randint(0, 25))})
+        scores = [(t, rng.uniform(0.3, 1.0)) for t in times]
+        sharded = [t for t, _ in _merge_with_interval(_scene_frames(scores), duration, interval)]
+        assert sharded == _select_timestamps(scores, duration, interval, budget=10_000)
+
+
+def test_scene_change_on_fallback_time_keeps_extracted_frame():
+    scores = [(30.0, 0.5)]
+    merged = _merge_with_interval(_scene_frames(scores), 45.0, 30)
+    assert merged == [(0.0, None), (30.0, Path("frame_30.000.jpg"))]
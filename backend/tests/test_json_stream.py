@@ -0,0 +1,54 @@
+import json
+
+from backend.pipeline.json_stream import JsonStreamParser
+
+
+def _feed_chars(parser: JsonStreamParser, text: str) -> list:
+    events = []
+    for c in text:
+        events += parser.feed(c)
+    return events
+
+
+def test_items_and_sections_are_emitted_as_they_close():
+    answer = {"summary": "ok", "frames": [{"frame": 1, "text": "a {b} \"c\""}, {"frame": 2}], "count": 2}
+    parser = JsonStreamParser()
+
+    events = _feed_chars(parser, json.dumps(answer))
+
+    assert events == [
+        ("section", "summary", "ok"),
+        ("item", "frames", {"frame": 1, "text": "a {b} \"c\""}),
+        ("item", "frames", {"frame": 2}),
+        ("section", "frames", answer["frames"]),
+        ("section", "count", 2),
+    ]
+    assert parser.done
+    assert parser.sections == answer
+
+
+def test_chunking_does_not_change_events():
+    text = '{"tags": ["x", "y,z", 3], "nested": {"a": [1, 2]}, "flag": true}'
+    whole = JsonStreamParser().feed(text)
+
+    assert _feed_chars(JsonStreamParser(), text) == whole
+    assert [kind for kind, _, _ in whole] == ["item", "item", "item", "section", "section", "section"]
+
+
+def test_code_fence_and_trailing_text_are_skipped():
+    parser = JsonStreamParser()
+
+    events = parser.feed('```json\n{"a": [1, 2,], "b": {"c": 1,},}\n```\n{"ignored": 1}')
+
+    assert parser.sections == {"a": [1, 2], "b": {"c": 1}}
+    assert ("section", "ignored", 1) not in events
+
+
+def test_truncated_answer_keeps_completed_parts():
+    parser = JsonStreamParser()
+
+    parser.feed('{"summary": "done", "topics": [{"name": "revenue"}, {"name": "hiring"}, {"name": "bud')
+
+    assert not parser.done
+    assert parser.sections == {"summary": "done"}
+    assert parser.partial() == {"summary": "done", "topics": [{"name": "revenue"}, {"name": "hiring"}]}
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.pipeline.phash import hamming, hash_images
+
+
+def _images(n: int = 6) -> list[Image.Image]:
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (90, 160, 3), dtype=np.uint8)
+    images = [Image.fromarray(base)]
+    for _ in range(n - 1):
+        noisy = np.clip(base + rng.normal(0, 40, base.shape), 0, 255).astype(np.uint8)
+        images.append(Image.fromarray(noisy))
+    return images
+
+
+def _reference_bits(img: Image.Image) -> np.ndarray:
+    """imagehash.phash's 8x8 bit matrix, from a full 32x32 DCT-II written out."""
+    pixels = np.asarray(img.convert("L").resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    n = np.arange(32)
+    basis = 2 * np.cos(np.pi * n[:, None] * (2 * n[None, :] + 1) / 64)  # scipy.fftpack.dct, norm=None
+    low = (basis @ pixels @ basis.T)[:8, :8]
+    return low > np.median(low)
+
+
+def test_hamming_matches_imagehash_bits():
+    images = _images()
+    hashes = hash_images(images)
+    bits = [_reference_bits(img) for img in images]
+    for i in range(len(images)):
+        expected = [int((bits[i] != other).sum()) for other in bits]
+        assert hamming(hashes[i], hashes).tolist() == expected
+
+
+def test_hex_matches_imagehash():
+    imagehash = pytest.importorskip("imagehash")
+    images = _images()
+    for img, h in zip(images, hash_images(images)):
+        assert f"{int(h):016x}" == str(imagehash.phash(img))
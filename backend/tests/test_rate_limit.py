@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from backend.pipeline.rate_limit import CircuitBreaker, FairScheduler
+
+
+def test_cancelled_probe_does_not_pin_circuit_open():
+    async def scenario():
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=60, max_cooldown=60)
+        scheduler = FairScheduler(rps=0, tpm=0, breaker=breaker, max_wait=5)
+        loop = asyncio.get_running_loop()
+
+        permit = await scheduler.acquire("job", 0)
+        scheduler.release(permit, False)
+        assert breaker.state == "open"
+
+        probe = asyncio.create_task(scheduler.acquire("job", 0))
+        await asyncio.sleep(0)  # waiting on the open circuit
+
+        # Cooldown over: the probe is granted, then cancelled before it resumes
+        breaker._retry_at = loop.time() - 1
+        scheduler._pump()
+        assert breaker._probe_in_flight
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert not breaker._probe_in_flight
+        permit = await asyncio.wait_for(scheduler.acquire("job", 0), timeout=1)
+        scheduler.release(permit, True)
+        assert breaker.state == "closed"
+
+    asyncio.run(scenario())
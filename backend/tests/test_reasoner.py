@@ -0,0 +1,41 @@
+import asyncio
+from types import SimpleNamespace
+
+from backend.models import TranscriptSegment
+from backend.pipeline import reasoner
+
+
+def _answer(monkeypatch, content: str) -> None:
+    """Make every chat completion stream back the same content."""
+    async def fake_completion(payload, on_content=None):
+        if on_content is not None:
+            await on_content(content)
+        return SimpleNamespace(response=SimpleNamespace(status_code=200, text=""),
+                               content=content, finish_reason="length")
+
+    monkeypatch.setattr(reasoner, "chat_completion", fake_completion)
+
+
+def _transcript():
+    return [TranscriptSegment(start=0.0, end=2.0, text="Revenue grew 10%", speaker="speaker_0")]
+
+
+def test_truncated_answer_lists_missing_sections(monkeypatch):
+    _answer(monkeypatch, '{"speakers": [{"id": "speaker_0"}], "topics": [{"name": "rev')
+
+    entities = asyncio.run(reasoner.extract_entities(_transcript()))
+
+    assert entities.speakers == [{"id": "speaker_0"}]
+    assert entities.topics == []
+    assert entities.missing_sections == ["topics", "claims", "kpis", "decisions_raw", "action_items_raw"]
+
+
+def test_complete_answer_has_no_missing_sections(monkeypatch):
+    _answer(monkeypatch, '{"speakers": [], "topics": []}')
+
+    entities = asyncio.run(reasoner.extract_entities(_transcript()))
+    insights = asyncio.run(reasoner.extract_insights("graph"))
+
+    assert entities.missing_sections == []
+    assert insights["missing_sections"] == []
+    assert insights["summary"] == "No summary available."
@@ -0,0 +1,71 @@
+import asyncio
+
+from backend.models import TranscriptSegment
+from backend.pipeline import transcriber
+
+
+def _chunking(monkeypatch, seconds: int = 60, overlap: int = 10) -> None:
+    monkeypatch.setattr(transcriber, "ASR_CHUNK_SECONDS", seconds)
+    monkeypatch.setattr(transcriber, "ASR_CHUNK_OVERLAP", overlap)
+
+
+def _seg(speaker: str, start: float, end: float, text: str = "") -> TranscriptSegment:
+    return TranscriptSegment(speaker=speaker, text=text, start=start, end=end)
+
+
+def test_plan_chunks_overlap_and_cover_the_track(monkeypatch):
+    _chunking(monkeypatch)
+
+    assert transcriber._plan_chunks(60) == [(0.0, 60)]
+    assert transcriber._plan_chunks(110) == [(0.0, 60), (50.0, 110)]
+    assert transcriber._plan_chunks(140) == [(0.0, 60), (50.0, 110), (100.0, 140)]
+
+
+def test_reconcile_speakers_matches_labels_by_shared_speech():
+    previous = [_seg("speaker_0", 40, 52), _seg("speaker_1", 52, 60)]
+    # Same two people, labelled the other way round by the second request
+    current = [_seg("speaker_1", 50, 52), _seg("speaker_0", 52, 60), _seg("speaker_1", 60, 70)]
+
+    label_map = transcriber._reconcile_speakers(previous, current, (50, 60), {"speaker_0", "speaker_1"})
+
+    assert label_map == {"speaker_1": "speaker_0", "speaker_0": "speaker_1"}
+
+
+def test_reconcile_speakers_gives_new_people_fresh_labels():
+    previous = [_seg("speaker_0", 50, 60)]
+    current = [_seg("speaker_1", 50, 60), _seg("speaker_0", 60, 70)]
+
+    label_map = transcriber._reconcile_speakers(previous, current, (50, 60), {"speaker_0", "speaker_1"})
+
+    assert label_map == {"speaker_1": "speaker_0", "speaker_0": "speaker_2"}
+
+
+def test_chunks_are_stitched_without_duplicates(tmp_path, monkeypatch):
+    _chunking(monkeypatch)
+    # Per chunk, segments relative to the chunk start with request-local labels
+    answers = [
+        [("speaker_0", 0, 30, "intro"), ("speaker_1", 30, 56, "reply"), ("speaker_1", 56, 59, "tail")],
+        [("speaker_0", 0, 6, "reply"), ("speaker_0", 6, 9, "tail"), ("speaker_1", 9, 58, "newcomer")],
+        [("speaker_0", 0, 8, "newcomer"), ("speaker_0", 8, 30, "closing")],
+    ]
+
+    async def fake_cut(audio_path, chunk_path, start, end):
+        chunk_path.touch()
+
+    async def fake_request(chunk_path):
+        i = int(chunk_path.stem.rsplit("_", 1)[1])
+        return {"segments": [{"speaker": sp, "start": s, "end": e, "text": t} for sp, s, e, t in answers[i]]}
+
+    monkeypatch.setattr(transcriber, "_cut_chunk", fake_cut)
+    monkeypatch.setattr(transcriber, "_request_transcription", fake_request)
+
+    stitched = asyncio.run(transcriber._transcribe_chunked(tmp_path / "audio.flac", 140))
+
+    assert [(s.speaker, s.start, s.end, s.text) for s in stitched] == [
+        ("speaker_0", 0, 30, "intro"),
+        ("speaker_1", 30, 56, "reply"),
+        ("speaker_1", 56, 59, "tail"),
+        ("speaker_2", 59, 108, "newcomer"),
+        ("speaker_2", 108, 130, "closing"),
+    ]
+    assert not (tmp_path / "asr_chunks").exists()
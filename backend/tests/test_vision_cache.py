@@ -0,0 +1,31 @@
+import os
+
+from backend.pipeline import vision_cache
+from backend.pipeline.vision_cache import VisionResultCache
+
+
+def test_load_is_explicit_and_idempotent(tmp_path):
+    path = tmp_path / "ns.json"
+    cache = VisionResultCache(path)
+    cache.put("p1", {"ocr_text": ["a"], "scene_description": "slide"})
+    cache.save()
+
+    reloaded = VisionResultCache(path)
+    reloaded.load()
+    reloaded.load()
+    assert reloaded.get("p1")["scene_description"] == "slide"
+    assert len(reloaded) == 1
+
+
+def test_idle_namespaces_kept_until_size_bound(tmp_path, monkeypatch):
+    monkeypatch.setattr(vision_cache, "VISION_CACHE_DIR", tmp_path)
+    current = tmp_path / "current.json"
+    for age, name in enumerate(["newest", "middle", "oldest"]):
+        path = tmp_path / f"{name}.json"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1_000_000 - age, 1_000_000 - age))
+    current.write_bytes(b"x" * 1000)
+
+    vision_cache._evict_idle_namespaces(current, max_bytes=250)
+
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["current", "middle", "newest"]
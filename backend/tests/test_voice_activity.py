@@ -0,0 +1,85 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.models import TranscriptSegment
+from backend.pipeline import voice_activity
+
+
+class _FakeProcess:
+    returncode = 0
+
+    async def communicate(self):
+        return b"", b""
+
+
+def test_many_spans_go_to_a_list_file_not_argv(tmp_path, monkeypatch):
+    spans = [(i * 2.0, i * 2.0 + 1.25) for i in range(5000)]
+    audio_path = tmp_path / "audio.flac"
+    seen = {}
+
+    async def fake_exec(*cmd, **kwargs):
+        seen["cmd"] = cmd
+        list_path = cmd[cmd.index("-i") + 1]
+        with open(list_path) as f:
+            seen["list"] = f.read()
+        return _FakeProcess()
+
+    monkeypatch.setattr(voice_activity.asyncio, "create_subprocess_exec", fake_exec)
+    asyncio.run(voice_activity._write_compacted(audio_path, spans))
+
+    # Far below MAX_ARG_STRLEN (128 KiB) regardless of the span count
+    assert max(len(arg) for arg in seen["cmd"]) < 1024
+    lines = seen["list"].splitlines()
+    assert lines[0] == "ffconcat version 1.0"
+    assert len(lines) == 1 + 3 * len(spans)
+    assert lines[1:4] == ["file 'audio.flac'", "inpoint 0.000", "outpoint 1.250"]
+    assert lines[-2:] == ["inpoint 9998.000", "outpoint 9999.250"]
+    assert not list(tmp_path.glob("*.ffconcat"))
+
+
+def _levels(*runs: tuple[float, float]) -> np.ndarray:
+    """Per-frame dBFS levels from (seconds, level) runs of 100 ms frames."""
+    return np.concatenate([np.full(round(seconds * 10), level) for seconds, level in runs])
+
+
+@pytest.fixture
+def vad(monkeypatch):
+    monkeypatch.setattr(voice_activity, "VAD_FRAME_MS", 100)
+    monkeypatch.setattr(voice_activity, "VAD_MARGIN_DB", 10.0)
+    monkeypatch.setattr(voice_activity, "VAD_PADDING", 0.2)
+    monkeypatch.setattr(voice_activity, "VAD_MIN_SILENCE", 1.0)
+
+
+def test_speech_spans_drop_only_long_silences(vad):
+    speech, noise = -20.0, -50.0
+    levels = _levels((2, speech), (3, noise), (0.5, speech), (0.5, noise), (1, speech), (3, noise))
+
+    # Speech padded by 0.2s; the 0.5s pause stays, the 3s silences go
+    assert voice_activity._speech_spans(levels) == [(0.0, 2.2), (4.8, 7.2)]
+
+
+def test_speech_spans_of_silence(vad):
+    assert voice_activity._speech_spans(np.empty(0)) == []
+    assert voice_activity._speech_spans(_levels((5, -50.0))) == []
+
+
+def test_remap_segments_back_to_video_time():
+    spans = [(0.0, 0.0, 2.2), (2.2, 4.8, 2.4)]  # 2.6s of silence cut at 2.2s
+    segments = [
+        TranscriptSegment(speaker="A", text="before", start=1.0, end=2.2),
+        TranscriptSegment(speaker="B", text="after", start=2.2, end=3.0),
+        TranscriptSegment(speaker="A", text="across", start=2.0, end=3.0),
+        TranscriptSegment(speaker="B", text="overrun", start=4.0, end=5.0),
+    ]
+
+    remapped = voice_activity.remap_segments(segments, spans)
+
+    assert [(s.speaker, s.text) for s in remapped] == [(s.speaker, s.text) for s in segments]
+    assert [t for s in remapped for t in (s.start, s.end)] == pytest.approx([
+        1.0, 2.2,  # an end on the boundary stays in the span it closes
+        4.8, 5.6,  # a start on the boundary opens the next span
+        2.0, 5.6,
+        6.6, 7.2,  # clamped to the end of the last span
+    ])